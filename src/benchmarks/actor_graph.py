@@ -0,0 +1,70 @@
+"""
+Benchmark for the in-memory actor graph at catalogue scale.
+
+Generates a synthetic catalogue whose casts draw actors from a Zipf-like popularity distribution,
+builds the graph, and times co-star lookups, degree lookups, shortest-path searches and cast updates
+with and without pending deltas.
+
+Usage (from the `src` directory):
+
+    python -m benchmarks.actor_graph --movies 100000 --actors 200000 --cast-size 8
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services.actor_graph import ActorGraph
+
+
+def _synthetic_memberships(movies: int, actors: int, cast_size: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, actors + 1) ** 0.8
+    actor_ids = rng.choice(np.arange(1, actors + 1), size=movies * cast_size, p=popularity / popularity.sum())
+    return np.repeat(np.arange(1, movies + 1), cast_size), actor_ids
+
+
+def _time_us(func, repeat: int) -> float:  # noqa: ANN001
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=100_000)
+    parser.add_argument("--actors", type=int, default=200_000)
+    parser.add_argument("--cast-size", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    movie_ids, actor_ids = _synthetic_memberships(args.movies, args.actors, args.cast_size, args.seed)
+    graph = ActorGraph()
+    started = time.perf_counter()
+    graph.build(movie_ids, actor_ids, np.arange(1, args.actors + 1))
+    build_s = time.perf_counter() - started
+    print(f"build: {graph.actor_count} actors, {graph.edge_count} edges in {build_s:.2f}s")
+
+    rng = np.random.default_rng(args.seed + 1)
+    connected = np.unique(actor_ids)
+    sample = rng.choice(connected, size=(args.queries, 2)).tolist()
+    pairs = iter(sample * 4)
+
+    print(f"costars (top 20): {_time_us(lambda: graph.costars(next(pairs)[0], 20), args.queries):.1f}us")
+    print(f"degree:           {_time_us(lambda: graph.degree(next(pairs)[0]), args.queries):.1f}us")
+    print(f"shortest path:    {_time_us(lambda: graph.shortest_path(*next(pairs)), args.queries):.1f}us")
+
+    new_movie_ids = iter(range(args.movies + 1, args.movies + 1 + args.queries))
+    update_us = _time_us(
+        lambda: graph.set_movie_cast(next(new_movie_ids), rng.choice(connected, size=args.cast_size).tolist()),
+        args.queries,
+    )
+    print(f"cast update:      {update_us:.1f}us")
+    pairs = iter(sample)
+    print(f"path with delta:  {_time_us(lambda: graph.shortest_path(*next(pairs)), args.queries):.1f}us")
+
+
+if __name__ == "__main__":
+    main()
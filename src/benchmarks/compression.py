@@ -0,0 +1,87 @@
+"""
+Benchmark for response compression and precompressed cache entries.
+
+Seeds a temporary SQLite database, then requests list and detail pages through the ASGI app with
+every available content encoding, once with the response cache disabled (every request serializes
+and compresses) and once with it enabled (hits reuse the stored compressed body). Reports the bytes
+on the wire and the CPU time per request.
+
+Usage (from the `src` directory):
+
+    python -m benchmarks.compression --requests 200
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+
+def _configure_environment(db_path: Path) -> None:
+    os.environ["DATABASE_BACKEND"] = "sqlite"
+    os.environ["PATH_TO_DB"] = str(db_path)
+    os.environ.pop("ENVIRONMENT", None)
+
+
+async def _measure(client, urls: list[str], encoding: str) -> tuple[float, float]:  # noqa: ANN001
+    wire_bytes = 0
+    started = time.process_time()
+    for url in urls:
+        async with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+            async for chunk in response.aiter_raw():
+                wire_bytes += len(chunk)
+    return wire_bytes / len(urls), (time.process_time() - started) / len(urls) * 1e6
+
+
+async def _run(args: argparse.Namespace, csv_path: str) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from config import override_settings
+    from database import get_write_db_contextmanager, reset_database
+    from database.populate import CSVDatabaseSeeder
+    from main import app
+    from services import response_cache
+    from services.compression import available_encodings
+
+    await reset_database()
+    async with get_write_db_contextmanager() as session:
+        await CSVDatabaseSeeder(csv_file_path=csv_path, db_session=session).seed()
+
+    paths = {
+        "list": [f"/api/v1/theater/movies/?page={page % 20 + 1}&per_page=20" for page in range(args.requests)],
+        "detail": [f"/api/v1/theater/movies/{movie_id % 50 + 1}/" for movie_id in range(args.requests)],
+    }
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for cache_ttl, label in ((0.0, "uncached"), (3600.0, "cached")):
+                with override_settings(RESPONSE_CACHE_TTL_SECONDS=cache_ttl):
+                    for name, urls in paths.items():
+                        for encoding in ("identity",) + available_encodings():
+                            response_cache.reset()
+                            await _measure(client, urls, encoding)
+                            size, cpu_us = await _measure(client, urls, encoding)
+                            print(
+                                f"{label:>8} {name:<6} {encoding:<8} "
+                                f"{size:>9.0f} B/request {cpu_us:>8.0f} us CPU/request"
+                            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--csv", default=None, help="Seed CSV; defaults to PATH_TO_MOVIES_CSV.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        _configure_environment(Path(directory) / "compression.db")
+        from config import get_settings
+
+        csv_path = str(Path(directory) / "movies.csv")
+        shutil.copyfile(args.csv or get_settings().PATH_TO_MOVIES_CSV, csv_path)
+        asyncio.run(_run(args, csv_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark for loading the catalogue into pandas: JSON pages versus the columnar export.
+
+Seeds a temporary SQLite database, then loads every movie with its genres into DataFrames through
+the ASGI app twice: by walking the JSON list pages with `include=genres`, and by downloading the
+`movies` and `movie_genres` exports. Each export is measured on its first download, which builds the
+file, and on a later one, which is served from the cache. Reports the bytes transferred and the wall
+time including the conversion to DataFrames.
+
+Usage (from the `src` directory):
+
+    python -m benchmarks.export --format parquet
+"""
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+
+def _configure_environment(directory: Path) -> None:
+    os.environ["DATABASE_BACKEND"] = "sqlite"
+    os.environ["PATH_TO_DB"] = str(directory / "export.db")
+    os.environ["EXPORT_CACHE_DIR"] = str(directory / "exports")
+    os.environ.pop("ENVIRONMENT", None)
+
+
+async def _load_json_pages(client, per_page: int) -> tuple[int, int]:  # noqa: ANN001
+    import pandas as pd
+
+    wire_bytes, movies, url = 0, [], f"/api/v1/theater/movies/?page=1&per_page={per_page}&include=genres"
+    while url:
+        response = await client.get(url)
+        wire_bytes += len(response.content)
+        body = response.json()
+        movies.extend(body["movies"])
+        url = body["next_page"] and f"/api/v1{body['next_page']}"
+    frame = pd.DataFrame(movies)
+    genres = frame[["id", "genres"]].explode("genres").dropna()
+    return wire_bytes, len(frame) + len(genres)
+
+
+async def _load_exports(client, export_format: str) -> tuple[int, int]:  # noqa: ANN001
+    import pandas as pd
+
+    read = pd.read_parquet if export_format == "parquet" else pd.read_feather
+    wire_bytes, rows = 0, 0
+    for table in ("movies", "movie_genres"):
+        response = await client.get(f"/api/v1/theater/exports/{table}/", params={"format": export_format})
+        wire_bytes += len(response.content)
+        rows += len(read(io.BytesIO(response.content)))
+    return wire_bytes, rows
+
+
+async def _run(args: argparse.Namespace, csv_path: str) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from database import get_write_db_contextmanager, reset_database
+    from database.populate import CSVDatabaseSeeder
+    from main import app
+
+    await reset_database()
+    async with get_write_db_contextmanager() as session:
+        await CSVDatabaseSeeder(csv_file_path=csv_path, db_session=session, show_progress=False).seed()
+
+    loaders = {
+        "json pages": lambda client: _load_json_pages(client, args.per_page),
+        f"{args.format} (build)": lambda client: _load_exports(client, args.format),
+        f"{args.format} (cached)": lambda client: _load_exports(client, args.format),
+    }
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for label, load in loaders.items():
+                started = time.perf_counter()
+                wire_bytes, rows = await load(client)
+                elapsed_ms = (time.perf_counter() - started) * 1e3
+                print(f"{label:<18} {rows:>8} rows {wire_bytes:>11} B {elapsed_ms:>9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=("parquet", "arrow"), default="parquet")
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--csv", default=None, help="Seed CSV; defaults to PATH_TO_MOVIES_CSV.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        _configure_environment(Path(directory))
+        from config import get_settings
+
+        csv_path = str(Path(directory) / "movies.csv")
+        shutil.copyfile(args.csv or get_settings().PATH_TO_MOVIES_CSV, csv_path)
+        asyncio.run(_run(args, csv_path))
+
+
+if __name__ == "__main__":
+    main()
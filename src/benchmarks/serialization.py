@@ -0,0 +1,100 @@
+"""
+Benchmark for the JSON and MessagePack response formats.
+
+Builds synthetic list pages and movie details with the schemas from `schemas.movies` and reports,
+per payload, the encoded size (raw and gzip-compressed) and the time to encode and decode it in
+each format. Encoding goes through `routes.negotiation.render`, exactly as the routes do.
+
+Usage (from the `src` directory):
+
+    python -m benchmarks.serialization --iterations 2000
+"""
+import argparse
+import datetime
+import gzip
+import json
+import random
+import time
+from typing import Callable
+
+import msgpack
+
+from database.models import MovieStatusEnum
+from routes.negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, render
+from schemas import MovieDetailSchema, MovieListItemSchema, MovieListResponseSchema
+
+
+def _words(generator: random.Random, count: int) -> str:
+    return " ".join(f"word{generator.randrange(5000)}" for _ in range(count))
+
+
+def _list_page(generator: random.Random, per_page: int) -> MovieListResponseSchema:
+    movies = [
+        MovieListItemSchema(
+            id=generator.randrange(1, 100_000),
+            name=_words(generator, 3),
+            date=datetime.date(2000, 1, 1) + datetime.timedelta(days=generator.randrange(9000)),
+            score=round(generator.uniform(0, 100), 1),
+            overview=_words(generator, 40),
+        )
+        for _ in range(per_page)
+    ]
+    return MovieListResponseSchema(
+        movies=movies,
+        prev_page="/theater/movies/?page=1&per_page=20",
+        next_page="/theater/movies/?page=3&per_page=20",
+        total_pages=500,
+        total_items=10_000,
+    )
+
+
+def _detail(generator: random.Random, cast_size: int) -> MovieDetailSchema:
+    return MovieDetailSchema(
+        id=42,
+        name=_words(generator, 3),
+        date=datetime.date(2015, 6, 1),
+        score=81.5,
+        overview=_words(generator, 60),
+        status=MovieStatusEnum.RELEASED,
+        budget=generator.uniform(1e6, 3e8),
+        revenue=generator.uniform(1e6, 3e9),
+        country={"id": 1, "code": "US", "name": "United States"},
+        genres=[{"id": index, "name": _words(generator, 1)} for index in range(3)],
+        actors=[{"id": generator.randrange(1, 500_000), "name": _words(generator, 2)} for _ in range(cast_size)],
+        languages=[{"id": 1, "name": "English"}],
+    )
+
+
+def _per_call_us(func: Callable[[], object], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    generator = random.Random(7)
+    payloads = {
+        "list/20": _list_page(generator, 20),
+        "detail/10": _detail(generator, 10),
+        "detail/200": _detail(generator, 200),
+    }
+    decoders = {JSON_MEDIA_TYPE: json.loads, MSGPACK_MEDIA_TYPE: msgpack.unpackb}
+
+    for name, payload in payloads.items():
+        for media_type, decode in decoders.items():
+            body = render(payload, media_type)
+            encode_us = _per_call_us(lambda: render(payload, media_type), args.iterations)
+            decode_us = _per_call_us(lambda: decode(body), args.iterations)
+            print(
+                f"{name:<11} {media_type:<20} {len(body):>7} B raw {len(gzip.compress(body)):>6} B gzip "
+                f"{encode_us:>8.1f} us encode {decode_us:>8.1f} us decode"
+            )
+
+
+if __name__ == "__main__":
+    main()
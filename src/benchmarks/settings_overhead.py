@@ -0,0 +1,62 @@
+"""
+Micro-benchmark for reading settings per request.
+
+Compares building a fresh settings object on every call, which is what `get_settings()` used to do,
+with the memoized provider, both as a plain call and as a FastAPI dependency.
+
+Usage (from the `src` directory):
+
+    python -m benchmarks.settings_overhead --calls 20000 --requests 2000
+"""
+import argparse
+import asyncio
+import time
+import timeit
+
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from config import get_settings
+from config.settings import BaseAppSettings, _build_settings
+
+
+def _per_call_us(func, calls: int) -> float:  # noqa: ANN001
+    return min(timeit.repeat(func, number=calls, repeat=3)) / calls * 1e6
+
+
+async def _per_request_us(provider, requests: int) -> float:  # noqa: ANN001
+    app = FastAPI()
+
+    @app.get("/")
+    async def read_config(settings: BaseAppSettings = Depends(provider)) -> dict[str, str]:
+        return {"db": settings.PATH_TO_DB}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get("/")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/")
+        return (time.perf_counter() - started) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    uncached_call = _per_call_us(_build_settings, args.calls)
+    cached_call = _per_call_us(get_settings, args.calls)
+    print(f"per call:    uncached={uncached_call:.2f}us cached={cached_call:.3f}us")
+
+    uncached_request = asyncio.run(_per_request_us(_build_settings, args.requests))
+    cached_request = asyncio.run(_per_request_us(get_settings, args.requests))
+    print(
+        f"per request: uncached={uncached_request:.1f}us cached={cached_request:.1f}us "
+        f"saved={uncached_request - cached_request:.1f}us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Concurrency benchmark for the SQLite production profile.
+
+Runs a mix of concurrent create, update, delete and read requests against a file-backed SQLite
+database through the ASGI app and reports throughput, latency percentiles and failed requests.
+
+Usage (from the `src` directory):
+
+    python -m benchmarks.sqlite_concurrency --writers 32 --readers 32 --requests 50
+    python -m benchmarks.sqlite_concurrency --baseline
+
+`--baseline` swaps the tuned reader/writer sessions for a plain `sqlite+aiosqlite` engine with default
+settings, which is what the routes used before the profile existed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def _configure_environment(db_path: Path) -> None:
+    os.environ["DATABASE_BACKEND"] = "sqlite"
+    os.environ["PATH_TO_DB"] = str(db_path)
+    os.environ.pop("ENVIRONMENT", None)
+
+
+def _percentile(samples: list[float], percentile: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from httpx import ASGITransport, AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from database import reset_database
+    from database.session_sqlite import get_sqlite_database_url
+    from main import app
+    from routes.dependencies import get_db, get_write_db
+
+    await reset_database()
+
+    if args.baseline:
+        plain_engine = create_async_engine(get_sqlite_database_url(), echo=False)
+        plain_session = sessionmaker(bind=plain_engine, class_=AsyncSession, expire_on_commit=False)  # type: ignore
+
+        async def get_plain_db():  # noqa: ANN202
+            async with plain_session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = get_plain_db
+        app.dependency_overrides[get_write_db] = get_plain_db
+
+    latencies: dict[str, list[float]] = {"write": [], "read": []}
+    statuses: Counter = Counter()
+    created_ids: list[int] = []
+
+    async def timed(kind: str, request) -> None:  # noqa: ANN001
+        started = time.perf_counter()
+        try:
+            response = await request
+            statuses[response.status_code] += 1
+            if kind == "write" and response.status_code == 201:
+                created_ids.append(response.json()["id"])
+        except Exception as error:  # noqa: BLE001
+            statuses[type(error).__name__] += 1
+        latencies[kind].append(time.perf_counter() - started)
+
+    async def writer(client: AsyncClient, worker: int) -> None:
+        for i in range(args.requests):
+            payload = {
+                "name": f"Benchmark movie {worker}-{i}",
+                "date": "2020-01-01",
+                "score": 50.0,
+                "overview": "Benchmark payload.",
+                "status": "Released",
+                "budget": 1000.0,
+                "revenue": 2000.0,
+                "country": "US",
+                "genres": ["Drama", f"Genre {i % 10}"],
+                "actors": [f"Actor {worker}", f"Actor {i % 50}"],
+                "languages": ["English"],
+            }
+            await timed("write", client.post("/api/v1/theater/movies/", json=payload))
+            if created_ids and i % 3 == 1:
+                await timed("write", client.patch(
+                    f"/api/v1/theater/movies/{created_ids[-1]}/", json={"score": 75.0}
+                ))
+            if len(created_ids) > 1 and i % 5 == 4:
+                await timed("write", client.delete(f"/api/v1/theater/movies/{created_ids.pop(0)}/"))
+
+    async def reader(client: AsyncClient) -> None:
+        for i in range(args.requests):
+            await timed("read", client.get("/api/v1/theater/movies/?page=1&per_page=20"))
+
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(writer(client, worker) for worker in range(args.writers)),
+            *(reader(client) for _ in range(args.readers)),
+        )
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"profile: {'baseline' if args.baseline else 'tuned'}")
+    print(f"requests: {total} in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    for kind, samples in latencies.items():
+        if samples:
+            print(
+                f"{kind:>5}: n={len(samples)} "
+                f"p50={_percentile(samples, 50) * 1000:.1f}ms "
+                f"p99={_percentile(samples, 99) * 1000:.1f}ms "
+                f"mean={statistics.fmean(samples) * 1000:.1f}ms"
+            )
+    print(f"statuses: {dict(statuses)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--baseline", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _configure_environment(Path(tmp_dir) / "benchmark.db")
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
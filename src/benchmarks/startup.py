@@ -0,0 +1,71 @@
+"""
+Cold-start benchmark for the web worker.
+
+Starts a fresh interpreter for every run, imports `main:app`, runs the lifespan startup and
+shutdown, and reports import time, startup time and the worker's resident memory.
+It also lists any seeding-only dependency that leaked into the web import path.
+
+Usage (from the `src` directory):
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "tqdm", "numpy", "database.populate")
+
+_PROBE = """
+import asyncio, json, resource, sys, time
+
+started = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+
+
+async def run_lifespan():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        with open("/proc/self/statm") as statm:
+            rss_pages = int(statm.read().split()[1])
+    return ready, rss_pages
+
+
+ready, rss_pages = asyncio.run(run_lifespan())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "rss_mib": rss_pages * resource.getpagesize() / 2 ** 20,
+    "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _run_probe() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [_run_probe() for _ in range(args.runs)]
+
+    for metric, unit in (("import_ms", "ms"), ("startup_ms", "ms"), ("rss_mib", "MiB"), ("max_rss_mib", "MiB")):
+        values = [sample[metric] for sample in samples]
+        print(
+            f"{metric:>12}: median={statistics.median(values):.1f}{unit} "
+            f"min={min(values):.1f}{unit} max={max(values):.1f}{unit}"
+        )
+    print(f"heavy modules imported by main:app: {samples[0]['heavy_modules'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
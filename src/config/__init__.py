@@ -1 +1 @@
-from config.settings import get_settings
+from config.settings import get_settings, reload_settings, override_settings
@@ -1,7 +1,10 @@
 import os
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Optional
 
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings
 
 
@@ -10,19 +13,95 @@ class BaseAppSettings(BaseSettings):
     PATH_TO_DB: str = str(BASE_DIR / "database" / "source" / "theater.db")
     PATH_TO_MOVIES_CSV: str = str(BASE_DIR / "database" / "seed_data" / "imdb_movies.csv")
 
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024
+    SQLITE_MMAP_SIZE_BYTES: int = 256 * 1024 * 1024
+    SQLITE_READ_POOL_SIZE: int = 5
+
+    ORPHAN_CLEANUP_INTERVAL_SECONDS: float = 3600.0
+    ORPHAN_CLEANUP_BATCH_SIZE: int = 1000
+
+    STATS_RECONCILE_INTERVAL_SECONDS: float = 3600.0
+
+    ADMISSION_READ_INITIAL_LIMIT: int = 20
+    ADMISSION_READ_MAX_LIMIT: int = 100
+    ADMISSION_WRITE_INITIAL_LIMIT: int = 4
+    ADMISSION_WRITE_MAX_LIMIT: int = 16
+    ADMISSION_MIN_LIMIT: int = 1
+    ADMISSION_TARGET_LATENCY_MS: float = 250.0
+    ADMISSION_BACKOFF_RATIO: float = 0.8
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    REQUEST_TIMEOUT_SECONDS: float = 15.0
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 60.0
+
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_TTL_SECONDS: float = 5.0
+
+    CHANGE_FEED_CHANNEL: str = "movie_changes"
+    CHANGE_FEED_POLL_INTERVAL_SECONDS: float = 1.0
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15.0
+    CHANGE_FEED_MAX_WAIT_SECONDS: float = 30.0
+    CHANGE_FEED_BATCH_SIZE: int = 100
+    CHANGE_FEED_RETENTION_SECONDS: float = 7 * 24 * 3600.0
+
+    SEED_BATCH_SIZE: int = 1000
+
+    EXPORT_CACHE_DIR: str = str(BASE_DIR / "database" / "exports")
+    EXPORT_BATCH_SIZE: int = 10000
+    EXPORT_STALE_GRACE_SECONDS: float = 2 * 60.0
+
+    INGEST_API_KEYS: list[str] = []
+    ADMIN_API_KEYS: list[str] = []
+    INGEST_CHUNK_SIZE: int = 1000
+    INGEST_MAX_UPLOAD_BYTES: int = 512 * 1024 * 1024
+    INGEST_JOB_HISTORY: int = 100
+
+    CATALOGUE_REPLICA_ENABLED: bool = True
+
+    INDEX_SYNC_INTERVAL_SECONDS: float = 1.0
+    INDEX_SYNC_BATCH_SIZE: int = 1000
+
+    ACTOR_CACHE_MAX_ENTRIES: int = 10000
+    ACTOR_AUTOCOMPLETE_INDEX_ENABLED: bool = True
+
+    HOT_MOVIES_CAPACITY: int = 1000
+    HOT_MOVIES_WARM_COUNT: int = 50
+    HOT_MOVIES_WARM_TTL_SECONDS: float = 60.0
+    HOT_MOVIES_SNAPSHOT_INTERVAL_SECONDS: float = 300.0
+
 
 class Settings(BaseAppSettings):
-    POSTGRES_USER: str = os.getenv("POSTGRES_USER", "test_user")
-    POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "test_password")
-    POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "test_host")
-    POSTGRES_DB_PORT: int = int(os.getenv("POSTGRES_DB_PORT", 5432))
-    POSTGRES_DB: str = os.getenv("POSTGRES_DB", "test_db")
+    POSTGRES_USER: str = "test_user"
+    POSTGRES_PASSWORD: str = "test_password"
+    POSTGRES_HOST: str = "test_host"
+    POSTGRES_DB_PORT: int = 5432
+    POSTGRES_DB: str = "test_db"
 
 
 class TestingSettings(BaseAppSettings):
+    TEST_WORKER_ID: str = Field("main", validation_alias=AliasChoices("TEST_WORKER_ID", "PYTEST_XDIST_WORKER"))
+    ORPHAN_CLEANUP_INTERVAL_SECONDS: float = 0.0
+    STATS_RECONCILE_INTERVAL_SECONDS: float = 0.0
+    INDEX_SYNC_INTERVAL_SECONDS: float = 0.0
+    HOT_MOVIES_SNAPSHOT_INTERVAL_SECONDS: float = 0.0
+    CHANGE_FEED_POLL_INTERVAL_SECONDS: float = 0.05
+    EXPORT_STALE_GRACE_SECONDS: float = 0.0
+    INGEST_API_KEYS: list[str] = ["test-ingest-key"]
+    ADMIN_API_KEYS: list[str] = ["test-admin-key"]
 
     def model_post_init(self, __context: dict[str, Any] | None = None) -> None:
-        object.__setattr__(self, 'PATH_TO_DB', ":memory:")
+        object.__setattr__(self, 'PATH_TO_DB', f"file:theater_{self.TEST_WORKER_ID}?mode=memory&uri=true")
+        object.__setattr__(
+            self,
+            'EXPORT_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), f"theater_exports_{self.TEST_WORKER_ID}")
+        )
         object.__setattr__(
             self,
             'PATH_TO_MOVIES_CSV',
@@ -30,8 +109,60 @@ class TestingSettings(BaseAppSettings):
         )
 
 
-def get_settings() -> BaseSettings:
+_settings: Optional[BaseAppSettings] = None
+_settings_override: Optional[BaseAppSettings] = None
+
+
+def _build_settings() -> BaseAppSettings:
     environment = os.getenv("ENVIRONMENT", "developing")
     if environment == "testing":
         return TestingSettings()
     return Settings()
+
+
+def get_settings() -> BaseAppSettings:
+    """
+    Return the process-wide settings object.
+
+    The environment is parsed once, on the first call; later calls return the same instance, so
+    the function is cheap enough to be used as a FastAPI dependency on every request.
+
+    :return: The active settings, or the override installed by `override_settings`.
+    """
+    global _settings
+
+    if _settings_override is not None:
+        return _settings_override
+    if _settings is None:
+        _settings = _build_settings()
+    return _settings
+
+
+def reload_settings() -> BaseAppSettings:
+    """
+    Re-read the environment and replace the cached settings.
+
+    :return: The freshly built settings.
+    """
+    global _settings
+
+    _settings = _build_settings()
+    return _settings
+
+
+@contextmanager
+def override_settings(**changes: Any) -> Iterator[BaseAppSettings]:
+    """
+    Temporarily replace selected settings, e.g. in tests.
+
+    :param changes: Field values to change on a copy of the current settings.
+    :return: An iterator yielding the overriding settings object.
+    """
+    global _settings_override
+
+    previous_override = _settings_override
+    _settings_override = get_settings().model_copy(update=changes)
+    try:
+        yield _settings_override
+    finally:
+        _settings_override = previous_override
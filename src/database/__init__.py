@@ -4,17 +4,31 @@ from database.models import (
     Base,
     MovieModel
 )
-from database.session_sqlite import reset_sqlite_database as reset_database
+from database.deadlines import Deadline, attach_deadline
+from database.session_sqlite import (
+    reset_sqlite_database as reset_database,
+    snapshot_sqlite_database as snapshot_database,
+    restore_sqlite_database as restore_database,
+)
 
 environment = os.getenv("ENVIRONMENT", "developing")
+database_backend = os.getenv("DATABASE_BACKEND", "postgresql")
 
-if environment == "testing":
+if environment == "testing" or database_backend == "sqlite":
     from database.session_sqlite import (
         get_sqlite_db_contextmanager as get_db_contextmanager,
         get_sqlite_db as get_db,
+        get_sqlite_write_db_contextmanager as get_write_db_contextmanager,
+        get_sqlite_write_db as get_write_db,
+        init_sqlite_engines as init_engines,
+        dispose_sqlite_engines as dispose_engines,
     )
 else:
     from database.session_postgresql import (
         get_postgresql_db_contextmanager as get_db_contextmanager,
         get_postgresql_db as get_db,
+        get_postgresql_write_db_contextmanager as get_write_db_contextmanager,
+        get_postgresql_write_db as get_write_db,
+        init_postgresql_engine as init_engines,
+        dispose_postgresql_engine as dispose_engines,
     )
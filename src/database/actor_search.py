@@ -0,0 +1,61 @@
+"""
+Type-ahead search over actor names, in SQL.
+
+An actor matches when a word of its name starts with the query, case-insensitively, which is
+`name ILIKE 'query%' OR name ILIKE '% query%'`. Both patterns start with a wildcard or a literal
+that a B-tree on `name` cannot use case-insensitively, so PostgreSQL gets a `pg_trgm` GIN index on
+`actors.name` that serves them; on SQLite the query scans `actors`. The in-memory index in
+`services.actor_autocomplete` answers the same query without the database.
+"""
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import ActorModel, ActorsMoviesModel
+
+
+@dataclass(frozen=True)
+class ActorMatch:
+    id: int
+    name: str
+    movie_count: int
+
+
+def normalize_query(query: str) -> str:
+    """
+    :param query: The text typed by the user.
+    :return: The query case-folded, with runs of whitespace collapsed to one space.
+    """
+    return " ".join(query.casefold().split())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_actors(session: AsyncSession, query: str, limit: int) -> List[ActorMatch]:
+    """
+    :param session: The async database session.
+    :param query: The text typed so far.
+    :param limit: The maximum number of actors to return.
+    :return: The matching actors that appear in a movie, most movies first; ties by ascending ID.
+    """
+    query = normalize_query(query)
+    if not query:
+        return []
+    escaped = _escape_like(query)
+    movie_count = func.count(ActorsMoviesModel.c.movie_id)
+    result = await session.execute(
+        select(ActorModel.id, ActorModel.name, movie_count)
+        .join(ActorsMoviesModel, ActorsMoviesModel.c.actor_id == ActorModel.id)
+        .where(or_(
+            ActorModel.name.ilike(f"{escaped}%", escape="\\"),
+            ActorModel.name.ilike(f"% {escaped}%", escape="\\"),
+        ))
+        .group_by(ActorModel.id, ActorModel.name)
+        .order_by(movie_count.desc(), ActorModel.id)
+        .limit(limit)
+    )
+    return [ActorMatch(id=id_, name=name, movie_count=count) for id_, name, count in result.tuples()]
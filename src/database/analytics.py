@@ -0,0 +1,148 @@
+"""
+Filtered top-N and range queries over the movies, in SQL.
+
+These are the reference implementations of the analytic routes; `services.catalogue_replica`
+answers the same `MovieFilter`s from memory, and the routes fall back to the functions here when the
+replica is disabled or cannot answer.
+"""
+import datetime
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import (
+    ActorsMoviesModel,
+    CountryModel,
+    GenreModel,
+    LanguageModel,
+    MovieModel,
+    MoviesGenresModel,
+    MoviesLanguagesModel
+)
+
+RANGE_COLUMNS = ("date", "score", "budget", "revenue")
+
+
+@dataclass(frozen=True)
+class MovieFilter:
+    """
+    Conditions a movie must meet; every condition left as None is ignored.
+
+    :param genre: The name of a genre of the movie.
+    :param language: The name of a language of the movie.
+    :param country: The code of the movie's country.
+    :param actor_id: The ID of an actor of the movie.
+    :param ranges: (column, lowest, highest) bounds, inclusive, over `RANGE_COLUMNS`.
+    """
+    genre: Optional[str] = None
+    language: Optional[str] = None
+    country: Optional[str] = None
+    actor_id: Optional[int] = None
+    ranges: Tuple[Tuple[str, Any, Any], ...] = ()
+
+
+@dataclass(frozen=True)
+class RankedMovie:
+    id: int
+    name: str
+    date: datetime.date
+    score: float
+    budget: float
+    revenue: float
+
+
+@dataclass(frozen=True)
+class MovieSummary:
+    movie_count: int
+    average_score: Optional[float]
+    total_revenue: float
+    first_date: Optional[datetime.date]
+    last_date: Optional[datetime.date]
+
+
+def _conditions(movie_filter: MovieFilter) -> list:
+    conditions = []
+    if movie_filter.genre is not None:
+        conditions.append(MovieModel.id.in_(
+            select(MoviesGenresModel.c.movie_id)
+            .join(GenreModel, GenreModel.id == MoviesGenresModel.c.genre_id)
+            .where(GenreModel.name == movie_filter.genre)
+        ))
+    if movie_filter.language is not None:
+        conditions.append(MovieModel.id.in_(
+            select(MoviesLanguagesModel.c.movie_id)
+            .join(LanguageModel, LanguageModel.id == MoviesLanguagesModel.c.language_id)
+            .where(LanguageModel.name == movie_filter.language)
+        ))
+    if movie_filter.country is not None:
+        conditions.append(MovieModel.country_id.in_(
+            select(CountryModel.id).where(CountryModel.code == movie_filter.country)
+        ))
+    if movie_filter.actor_id is not None:
+        conditions.append(MovieModel.id.in_(
+            select(ActorsMoviesModel.c.movie_id).where(ActorsMoviesModel.c.actor_id == movie_filter.actor_id)
+        ))
+    for column_name, low, high in movie_filter.ranges:
+        column = getattr(MovieModel, column_name)
+        if low is not None:
+            conditions.append(column >= low)
+        if high is not None:
+            conditions.append(column <= high)
+    return conditions
+
+
+async def get_top_movies(
+        session: AsyncSession,
+        movie_filter: MovieFilter,
+        order_by: str,
+        descending: bool,
+        limit: int
+) -> List[RankedMovie]:
+    """
+    :param session: The async database session.
+    :param movie_filter: The conditions the movies must meet.
+    :param order_by: One of `RANGE_COLUMNS`.
+    :param descending: Whether the highest values come first.
+    :param limit: The maximum number of movies to return.
+    :return: The first movies in that order; ties are broken by ascending ID.
+    """
+    column = getattr(MovieModel, order_by)
+    result = await session.execute(
+        select(
+            MovieModel.id, MovieModel.name, MovieModel.date, MovieModel.score, MovieModel.budget, MovieModel.revenue
+        )
+        .where(*_conditions(movie_filter))
+        .order_by(column.desc() if descending else column.asc(), MovieModel.id.asc())
+        .limit(limit)
+    )
+    return [
+        RankedMovie(id=id_, name=name, date=date, score=score, budget=float(budget), revenue=revenue)
+        for id_, name, date, score, budget, revenue in result.tuples()
+    ]
+
+
+async def get_movie_summary(session: AsyncSession, movie_filter: MovieFilter) -> MovieSummary:
+    """
+    :param session: The async database session.
+    :param movie_filter: The conditions the movies must meet.
+    :return: The count, average score, total revenue and release date range of the matching movies.
+    """
+    result = await session.execute(
+        select(
+            func.count(MovieModel.id),
+            func.avg(MovieModel.score),
+            func.coalesce(func.sum(MovieModel.revenue), 0.0),
+            func.min(MovieModel.date),
+            func.max(MovieModel.date),
+        ).where(*_conditions(movie_filter))
+    )
+    movie_count, average_score, total_revenue, first_date, last_date = result.one()
+    return MovieSummary(
+        movie_count=movie_count,
+        average_score=average_score,
+        total_revenue=float(total_revenue),
+        first_date=first_date,
+        last_date=last_date,
+    )
@@ -0,0 +1,195 @@
+"""
+Set-based writes for a movie's genres, actors and languages.
+
+Replacing an ORM collection such as `movie.actors` loads every existing link and rewrites the
+association rows one by one. The helpers here work on IDs instead. Names are resolved with one
+bulk INSERT ... ON CONFLICT DO NOTHING followed, if needed, by one SELECT. The links of one association table
+are then replaced with one DELETE of the links that are no longer wanted and one
+INSERT ... ON CONFLICT DO NOTHING of the wanted ones, so the database computes the difference.
+The number of statements does not depend on the size of the cast, and names that are already
+cached in-process (`database.interning`) are not sent to the database at all.
+
+For reads, `load_movie_associations` fetches the linked entities of a whole page of movies at once.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import Column, Table, delete, select, union_all, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import (
+    ActorModel,
+    ActorsMoviesModel,
+    Base,
+    GenreModel,
+    LanguageModel,
+    MoviesGenresModel,
+    MoviesLanguagesModel
+)
+from database.interning import reference_cache
+from database.utils import dialect_insert
+
+
+@dataclass(frozen=True)
+class MovieAssociation:
+    """
+    One many-to-many relation of `movies`: the association table and the entity it links to.
+    """
+    table: Table
+    entity_column: Column
+    model: type[Base]
+
+
+MOVIE_ASSOCIATIONS: Dict[str, MovieAssociation] = {
+    "genres": MovieAssociation(MoviesGenresModel, MoviesGenresModel.c.genre_id, GenreModel),
+    "actors": MovieAssociation(ActorsMoviesModel, ActorsMoviesModel.c.actor_id, ActorModel),
+    "languages": MovieAssociation(MoviesLanguagesModel, MoviesLanguagesModel.c.language_id, LanguageModel),
+}
+
+
+async def resolve_ids(session: AsyncSession, model: type[Base], field: str, values: Iterable[str]) -> Dict[str, int]:
+    """
+    Return the IDs of the rows of `model` whose unique `field` matches `values`, creating missing rows.
+
+    Values cached in `reference_cache` cost no statement. The others are inserted with
+    ON CONFLICT DO NOTHING; only those that already existed, or that a concurrent writer inserted
+    first, are selected afterwards.
+
+    :param session: The async database session.
+    :param model: The SQLAlchemy model class to look up.
+    :param field: The unique column used for the lookup.
+    :param values: The values to look up or insert.
+    :return: A mapping of every value to its row ID.
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        return {}
+    interned = reference_cache.table(model, field)
+    ids = interned.lookup(values) if interned is not None else {}
+    if ids:
+        reference_cache.note_used(session, interned, list(ids))
+    missing = [value for value in values if value not in ids]
+    if not missing:
+        return ids
+
+    column = getattr(model, field)
+    result = await session.execute(
+        dialect_insert(session, model)
+        .values([{field: value} for value in missing])
+        .on_conflict_do_nothing(index_elements=[column])
+        .returning(column, model.id)
+    )
+    resolved = dict(result.tuples().all())
+    existing = [value for value in missing if value not in resolved]
+    if existing:
+        result = await session.execute(select(column, model.id).where(column.in_(existing)))
+        resolved.update(result.tuples().all())
+    if interned is not None:
+        reference_cache.add_on_commit(session, interned, resolved)
+    return {**ids, **resolved}
+
+
+async def replace_movie_association(
+        session: AsyncSession,
+        movie_id: int,
+        association: str,
+        entity_ids: Iterable[int]
+) -> None:
+    """
+    Make the movie's links in one association table exactly `entity_ids`.
+
+    :param session: The async database session.
+    :param movie_id: The ID of the movie.
+    :param association: A key of `MOVIE_ASSOCIATIONS`.
+    :param entity_ids: IDs of the entities the movie must be linked to after the call.
+    :return: None
+    """
+    relation = MOVIE_ASSOCIATIONS[association]
+    table, entity_column = relation.table, relation.entity_column
+    entity_ids = list(dict.fromkeys(entity_ids))
+
+    await session.execute(
+        delete(table).where(table.c.movie_id == movie_id, entity_column.not_in(entity_ids))
+    )
+    if entity_ids:
+        await session.execute(
+            dialect_insert(session, table)
+            .values([{"movie_id": movie_id, entity_column.name: entity_id} for entity_id in entity_ids])
+            .on_conflict_do_nothing()
+        )
+
+
+async def set_movie_associations(
+        session: AsyncSession,
+        movie_id: int,
+        names: Dict[str, List[str]]
+) -> Dict[str, List[int]]:
+    """
+    Resolve entity names and replace the movie's links for every association given in `names`.
+
+    :param session: The async database session.
+    :param movie_id: The ID of the movie.
+    :param names: A mapping of association key ("genres", "actors", "languages") to entity names.
+    :return: For every association given, the IDs of its names, in the order of the names.
+    """
+    linked: Dict[str, List[int]] = {}
+    for association, values in names.items():
+        ids = await resolve_ids(session, MOVIE_ASSOCIATIONS[association].model, "name", values)
+        linked[association] = [ids[value] for value in values]
+        await replace_movie_association(session, movie_id, association, linked[association])
+    return linked
+
+
+async def get_movie_association_ids(session: AsyncSession, movie_id: int) -> Dict[str, List[int]]:
+    """
+    Load the IDs a movie is linked to in every association table with a single query.
+
+    :param session: The async database session.
+    :param movie_id: The ID of the movie.
+    :return: A mapping of association key to linked entity IDs.
+    """
+    stmt = union_all(*(
+        select(literal(association).label("association"), relation.entity_column.label("entity_id"))
+        .where(relation.table.c.movie_id == movie_id)
+        for association, relation in MOVIE_ASSOCIATIONS.items()
+    ))
+    linked: Dict[str, List[int]] = {association: [] for association in MOVIE_ASSOCIATIONS}
+    for association, entity_id in (await session.execute(stmt)).all():
+        linked[association].append(entity_id)
+    return linked
+
+
+async def load_movie_associations(
+        session: AsyncSession,
+        movie_ids: Sequence[int],
+        associations: Iterable[str]
+) -> Dict[str, Dict[int, List[Dict[str, Any]]]]:
+    """
+    Load the linked entities of several movies for several association tables with a single query.
+
+    :param session: The async database session.
+    :param movie_ids: The IDs of the movies.
+    :param associations: Keys of `MOVIE_ASSOCIATIONS` to load.
+    :return: A mapping of association key to movie ID to the linked entities as `{"id", "name"}` dicts,
+        ordered by entity ID.
+    """
+    associations = list(dict.fromkeys(associations))
+    loaded: Dict[str, Dict[int, List[Dict[str, Any]]]] = {association: {} for association in associations}
+    if not associations or not movie_ids:
+        return loaded
+
+    stmt = union_all(*(
+        select(
+            literal(association).label("association"),
+            relation.table.c.movie_id,
+            relation.model.id.label("entity_id"),
+            relation.model.name.label("entity_name"),
+        )
+        .join(relation.model, relation.model.id == relation.entity_column)
+        .where(relation.table.c.movie_id.in_(movie_ids))
+        for association, relation in ((key, MOVIE_ASSOCIATIONS[key]) for key in associations)
+    ))
+    rows = (await session.execute(stmt)).all()
+    for association, movie_id, entity_id, entity_name in sorted(rows, key=lambda row: (row[0], row[1], row[2])):
+        loaded[association].setdefault(movie_id, []).append({"id": entity_id, "name": entity_name})
+    return loaded
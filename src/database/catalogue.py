@@ -0,0 +1,130 @@
+"""
+Reads for browsing the entities movies link to: actors, genres, languages and countries.
+
+Lists and movie lists are paginated by keyset, never by offset, so a page costs the same however
+deep it is:
+
+* entity lists are ordered by ID; a page is the `limit` entities after the last ID of the previous
+  page, and their movie counts come from one grouped query over those IDs only;
+* the movies of an entity are ordered newest (highest ID) first, like `/movies/`; a page is the
+  `limit` movies before the last ID of the previous page. It is read from the
+  `(entity_id, movie_id)` index of the association table (for countries, `movies(country_id, id)`),
+  so it never touches the movies of other entities.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, Table, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import (
+    ActorModel,
+    ActorsMoviesModel,
+    Base,
+    CountryModel,
+    GenreModel,
+    LanguageModel,
+    MovieModel,
+    MoviesGenresModel,
+    MoviesLanguagesModel
+)
+
+
+@dataclass(frozen=True)
+class CatalogueEntity:
+    """
+    An entity and the link between it and movies: `links` has one row per (movie, entity) pair.
+    """
+    model: type[Base]
+    links: Table
+    movie_column: Column
+    entity_column: Column
+
+
+CATALOGUE_ENTITIES: Dict[str, CatalogueEntity] = {
+    "actors": CatalogueEntity(
+        ActorModel, ActorsMoviesModel, ActorsMoviesModel.c.movie_id, ActorsMoviesModel.c.actor_id
+    ),
+    "genres": CatalogueEntity(
+        GenreModel, MoviesGenresModel, MoviesGenresModel.c.movie_id, MoviesGenresModel.c.genre_id
+    ),
+    "languages": CatalogueEntity(
+        LanguageModel, MoviesLanguagesModel, MoviesLanguagesModel.c.movie_id, MoviesLanguagesModel.c.language_id
+    ),
+    "countries": CatalogueEntity(
+        CountryModel, MovieModel.__table__, MovieModel.__table__.c.id, MovieModel.__table__.c.country_id
+    ),
+}
+
+
+async def _movie_counts(session: AsyncSession, entity: CatalogueEntity, entity_ids: List[int]) -> Dict[int, int]:
+    if not entity_ids:
+        return {}
+    result = await session.execute(
+        select(entity.entity_column, func.count())
+        .where(entity.entity_column.in_(entity_ids))
+        .group_by(entity.entity_column)
+    )
+    return dict(result.tuples().all())
+
+
+async def list_entities(
+        session: AsyncSession,
+        entity: CatalogueEntity,
+        after: int,
+        limit: int
+) -> List[Tuple[Base, int]]:
+    """
+    :param session: The async database session.
+    :param entity: A value of `CATALOGUE_ENTITIES`.
+    :param after: Return entities with a higher ID than this one.
+    :param limit: The maximum number of entities to return.
+    :return: (entity, movie count) pairs ordered by ID.
+    """
+    model = entity.model
+    rows = (await session.execute(
+        select(model).where(model.id > after).order_by(model.id).limit(limit)
+    )).scalars().all()
+    counts = await _movie_counts(session, entity, [row.id for row in rows])
+    return [(row, counts.get(row.id, 0)) for row in rows]
+
+
+async def get_entity(session: AsyncSession, entity: CatalogueEntity, entity_id: int) -> Optional[Tuple[Base, int]]:
+    """
+    :param session: The async database session.
+    :param entity: A value of `CATALOGUE_ENTITIES`.
+    :param entity_id: The ID of the entity.
+    :return: The entity and its movie count, or None if it does not exist.
+    """
+    row = await session.get(entity.model, entity_id)
+    if row is None:
+        return None
+    counts = await _movie_counts(session, entity, [entity_id])
+    return row, counts.get(entity_id, 0)
+
+
+async def get_entity_movies(
+        session: AsyncSession,
+        entity: CatalogueEntity,
+        entity_id: int,
+        before: Optional[int],
+        limit: int
+) -> List[MovieModel]:
+    """
+    :param session: The async database session.
+    :param entity: A value of `CATALOGUE_ENTITIES`.
+    :param entity_id: The ID of the entity.
+    :param before: Return movies with a lower ID than this one, or None to start with the newest.
+    :param limit: The maximum number of movies to return.
+    :return: The entity's movies, highest ID first.
+    """
+    movie_ids = select(entity.movie_column).where(entity.entity_column == entity_id)
+    if before is not None:
+        movie_ids = movie_ids.where(entity.movie_column < before)
+    movie_ids = movie_ids.order_by(entity.movie_column.desc()).limit(limit).subquery()
+    result = await session.execute(
+        select(MovieModel)
+        .join(movie_ids, movie_ids.c[entity.movie_column.name] == MovieModel.id)
+        .order_by(MovieModel.id.desc())
+    )
+    return list(result.scalars())
@@ -0,0 +1,141 @@
+"""
+Transactional outbox of movie mutations.
+
+The create, update and delete routes call `record_movie_change` in the same transaction as the
+write, so a change is visible in `movie_changes` exactly when the write is committed. Consumers
+read the table by sequence number through `get_movie_changes` instead of polling the movie list.
+
+Sequence numbers must become visible in increasing order, otherwise a consumer that has already
+moved past sequence 11 would never see a sequence 10 committed later. SQLite writers are serialized
+anyway; on PostgreSQL the insert takes a transaction-level advisory lock first, so the sequence is
+drawn and committed while no other writer can draw one. The same transaction sends
+`NOTIFY <CHANGE_FEED_CHANNEL>` with the sequence number, which PostgreSQL delivers on commit.
+
+Rows older than `CHANGE_FEED_RETENTION_SECONDS` are removed by `prune_movie_changes`, which the
+periodic cleanup job runs. The newest row is always kept, so the latest sequence number never goes
+back and can serve as part of the catalogue version (`get_catalogue_version`).
+"""
+import datetime
+import hashlib
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database.models import MovieChangeModel, SeedCheckpointModel
+
+MOVIE_CHANGE_OPERATIONS = ("created", "updated", "deleted")
+OUTBOX_ADVISORY_LOCK_KEY = 0x6D6F7669
+
+
+async def record_movie_change(session: AsyncSession, movie_id: int, operation: str) -> int:
+    """
+    Append a change to the outbox. The caller commits it together with the write it describes.
+
+    :param session: The async database session of the write.
+    :param movie_id: The ID of the changed movie.
+    :param operation: One of `MOVIE_CHANGE_OPERATIONS`.
+    :return: The sequence number of the change.
+    """
+    return await record_movie_changes(session, [(movie_id, operation)])
+
+
+async def record_movie_changes(session: AsyncSession, changes: Sequence[Tuple[int, str]]) -> int:
+    """
+    Append several changes to the outbox with one INSERT, e.g. for a bulk import.
+
+    :param session: The async database session of the write.
+    :param changes: (movie ID, operation) pairs, in the order they happened.
+    :return: The highest sequence number assigned, or 0 if `changes` is empty.
+    """
+    if not changes:
+        return 0
+    postgresql = session.bind.dialect.name == "postgresql"
+    if postgresql:
+        await session.execute(select(func.pg_advisory_xact_lock(OUTBOX_ADVISORY_LOCK_KEY)))
+    result = await session.execute(
+        insert(MovieChangeModel)
+        .values([{"movie_id": movie_id, "operation": operation} for movie_id, operation in changes])
+        .returning(MovieChangeModel.sequence)
+    )
+    sequence = max(result.scalars())
+    if postgresql:
+        await session.execute(select(func.pg_notify(get_settings().CHANGE_FEED_CHANNEL, str(sequence))))
+    return sequence
+
+
+async def get_movie_changes(session: AsyncSession, after: int, limit: int) -> List[MovieChangeModel]:
+    """
+    :param session: The async database session.
+    :param after: Return only changes with a greater sequence number.
+    :param limit: The maximum number of changes to return.
+    :return: The changes, oldest first.
+    """
+    result = await session.execute(
+        select(MovieChangeModel)
+        .where(MovieChangeModel.sequence > after)
+        .order_by(*MovieChangeModel.default_order_by())
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+
+async def get_latest_sequence(session: AsyncSession) -> int:
+    """
+    :param session: The async database session.
+    :return: The sequence number of the newest change, or 0 if there is none.
+    """
+    return (await session.execute(select(func.max(MovieChangeModel.sequence)))).scalar_one() or 0
+
+
+async def prune_movie_changes(session: AsyncSession, retention_seconds: float) -> int:
+    """
+    Delete changes older than the retention period. The caller is responsible for committing.
+
+    :param session: The async database session.
+    :param retention_seconds: How long changes are kept.
+    :return: The number of deleted rows.
+    """
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=retention_seconds)
+    result = await session.execute(
+        delete(MovieChangeModel)
+        .where(
+            MovieChangeModel.changed_at < cutoff,
+            MovieChangeModel.sequence < select(func.max(MovieChangeModel.sequence)).scalar_subquery()
+        )
+        .returning(MovieChangeModel.sequence)
+    )
+    return len(result.all())
+
+
+async def get_catalogue_version(session: AsyncSession) -> str:
+    """
+    Identify the current state of the catalogue, e.g. to cache data derived from all of it.
+
+    Writes through the API and uploads advance the outbox; the seeder does not, but it advances its
+    checkpoints (`seed_checkpoints`) in the same transactions as its batches. The version therefore
+    combines the latest sequence number with the progress of every seeded file.
+
+    :param session: The async database session.
+    :return: A string that changes whenever the movies or their relations change. It starts with the
+        latest sequence number and a dash, so versions can be ordered by `catalogue_version_sequence`.
+    """
+    sequence = await get_latest_sequence(session)
+    seeded = (await session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(SeedCheckpointModel.rows_done), 0),
+            func.max(SeedCheckpointModel.updated_at)
+        )
+    )).one()
+    return f"{sequence}-{hashlib.sha256(repr((sequence, *seeded)).encode()).hexdigest()[:16]}"
+
+
+def catalogue_version_sequence(version: str) -> int:
+    """
+    :param version: A version returned by `get_catalogue_version`.
+    :return: The latest sequence number when the version was read, or -1 if `version` is malformed.
+    """
+    sequence, _, _ = version.partition("-")
+    return int(sequence) if sequence.isdigit() else -1
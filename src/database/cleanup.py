@@ -0,0 +1,126 @@
+"""
+Batch removal of orphaned actors and languages.
+
+Deleting a movie only removes its association rows (through `ON DELETE CASCADE`); actors and
+languages that no longer appear in any movie are left behind on purpose, so that the delete stays a
+single statement. This job removes them later, in batches of at most `ORPHAN_CLEANUP_BATCH_SIZE`
+rows with one commit per batch, so the writer is never held for long. The same job drops change-feed
+entries older than `CHANGE_FEED_RETENTION_SECONDS` (see `database.changes`).
+
+The web worker runs it every `ORPHAN_CLEANUP_INTERVAL_SECONDS` (0 disables it). It can also be run
+by hand (from the `src` directory):
+
+    python -m database.cleanup
+"""
+import asyncio
+import logging
+from typing import Dict
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database.associations import MOVIE_ASSOCIATIONS
+from database.changes import prune_movie_changes
+from database.interning import reference_cache
+
+ORPHAN_CLEANUP_ASSOCIATIONS = ("actors", "languages")
+
+logger = logging.getLogger(__name__)
+
+
+async def delete_orphans(session: AsyncSession, association: str, batch_size: int) -> int:
+    """
+    Delete up to `batch_size` entities of one association that are not linked to any movie.
+
+    The caller is responsible for committing; the deleted names leave `reference_cache` on commit.
+
+    :param session: The async database session.
+    :param association: A key of `MOVIE_ASSOCIATIONS`.
+    :param batch_size: The maximum number of rows to delete.
+    :return: The number of deleted rows.
+    """
+    relation = MOVIE_ASSOCIATIONS[association]
+    model = relation.model
+    orphan_ids = (
+        select(model.id)
+        .where(~exists().where(relation.entity_column == model.id))
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await session.execute(delete(model).where(model.id.in_(orphan_ids)).returning(model.name))
+    names = list(result.scalars())
+    reference_cache.discard_on_commit(session, reference_cache.table(model, "name"), names)
+    return len(names)
+
+
+async def cleanup_orphans(batch_size: int) -> Dict[str, int]:
+    """
+    Delete every orphaned actor and language, committing after each batch.
+
+    :param batch_size: The maximum number of rows deleted per transaction.
+    :return: The number of deleted rows per association.
+    """
+    from database import get_write_db_contextmanager
+
+    deleted = {association: 0 for association in ORPHAN_CLEANUP_ASSOCIATIONS}
+    for association in ORPHAN_CLEANUP_ASSOCIATIONS:
+        while True:
+            async with get_write_db_contextmanager() as session:
+                count = await delete_orphans(session, association, batch_size)
+                await session.commit()
+            deleted[association] += count
+            if count < batch_size:
+                break
+    return deleted
+
+
+async def cleanup_movie_changes(retention_seconds: float) -> int:
+    """
+    Delete the change-feed entries that are older than the retention period.
+
+    :param retention_seconds: How long changes are kept.
+    :return: The number of deleted rows.
+    """
+    from database import get_write_db_contextmanager
+
+    async with get_write_db_contextmanager() as session:
+        count = await prune_movie_changes(session, retention_seconds)
+        await session.commit()
+    return count
+
+
+async def run_orphan_cleanup_periodically() -> None:
+    """
+    Run `cleanup_orphans` and `cleanup_movie_changes` every `ORPHAN_CLEANUP_INTERVAL_SECONDS` until cancelled.
+
+    Database errors, and the `OSError`s asyncpg raises while the server is unreachable, are logged
+    and retried on the next tick, so a lost connection does not stop the outbox from being pruned.
+
+    :return: None
+    """
+    settings = get_settings()
+    while True:
+        await asyncio.sleep(settings.ORPHAN_CLEANUP_INTERVAL_SECONDS)
+        try:
+            deleted = await cleanup_orphans(settings.ORPHAN_CLEANUP_BATCH_SIZE)
+            deleted["movie_changes"] = await cleanup_movie_changes(settings.CHANGE_FEED_RETENTION_SECONDS)
+        except (SQLAlchemyError, OSError):
+            logger.warning("Orphan cleanup failed; retrying on the next run.", exc_info=True)
+            continue
+        if any(deleted.values()):
+            logger.info("Removed orphaned rows: %s", deleted)
+
+
+async def main() -> None:
+    settings = get_settings()
+    deleted = await cleanup_orphans(settings.ORPHAN_CLEANUP_BATCH_SIZE)
+    for association, count in deleted.items():
+        print(f"{association}: {count} orphaned row(s) removed.")
+    count = await cleanup_movie_changes(settings.CHANGE_FEED_RETENTION_SECONDS)
+    print(f"movie_changes: {count} expired row(s) removed.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
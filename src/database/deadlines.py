@@ -0,0 +1,96 @@
+"""
+Per-request deadlines pushed down to the database.
+
+A `Deadline` is attached to a session with `attach_deadline`. Every transaction the session starts
+then carries the time that is left:
+
+* PostgreSQL gets `SET LOCAL statement_timeout`, so the server itself stops a statement that
+  outlives the request.
+* SQLite connections run a progress handler (installed by the engine profile) that aborts the
+  running statement once the deadline has passed or has been cancelled, e.g. because the client
+  disconnected. Cancelling the awaiting task alone would leave the query running in aiosqlite's
+  thread.
+
+Either way the statement fails with an `OperationalError` that the deadline middleware turns into
+504 Gateway Timeout.
+"""
+import time
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, SessionTransaction
+
+SQLITE_PROGRESS_HANDLER_STEPS = 1000
+
+
+class Deadline:
+    """
+    The point in time after which nobody is waiting for the work any more.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.cancelled = False
+
+    def restart(self) -> None:
+        """
+        Count the timeout from now, e.g. once the request body has arrived.
+
+        :return: None
+        """
+        self.expires_at = time.monotonic() + self.timeout
+
+    def remaining(self) -> float:
+        """
+        :return: Seconds left until the deadline, 0 once it has passed or been cancelled.
+        """
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cancel(self) -> None:
+        """
+        Expire the deadline right away, e.g. because the client went away.
+
+        :return: None
+        """
+        self.cancelled = True
+
+
+def attach_deadline(session: Any, deadline: Optional[Deadline]) -> None:
+    """
+    Make every transaction of `session` respect `deadline`.
+
+    :param session: An AsyncSession or Session.
+    :param deadline: The deadline, or None for no limit.
+    :return: None
+    """
+    session.info["deadline"] = deadline
+
+
+def sqlite_deadline_exceeded(connection_record: Any) -> int:
+    """
+    SQLite progress handler body: a non-zero result aborts the running statement.
+
+    :param connection_record: The pool record of the DBAPI connection.
+    :return: 1 when the attached deadline has expired, otherwise 0.
+    """
+    deadline = connection_record.info.get("deadline")
+    return int(deadline is not None and deadline.expired)
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_deadline(session: Session, transaction: SessionTransaction, connection: Connection) -> None:
+    deadline = session.info.get("deadline")
+    if connection.dialect.name == "postgresql":
+        if deadline is not None:
+            timeout_ms = max(1, int(deadline.remaining() * 1000))
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+    else:
+        connection.connection.info["deadline"] = deadline
@@ -0,0 +1,216 @@
+"""
+Columnar snapshots of the catalogue, as Apache Parquet or Arrow IPC files.
+
+Every table is read through a streaming cursor in batches of `EXPORT_BATCH_SIZE` rows, and every
+batch of rows is transposed into columns and turned into one Arrow record batch (one row group in
+Parquet), so memory stays bounded by the batch size. Besides `movies`, the many-to-many relations
+are exported "exploded", one row per link with the entity's name, so that pandas users only need a
+merge on `movie_id`.
+
+pyarrow is imported when a file is written, not when this module is imported, so the application
+does not pay for it at startup.
+
+Usage (from the `src` directory):
+
+    python -m database.export --format parquet --output exports
+"""
+import argparse
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import get_db_contextmanager
+from database.associations import MOVIE_ASSOCIATIONS
+from database.models import CountryModel, MovieModel
+from database.utils import begin_snapshot
+
+EXPORT_FORMATS: Dict[str, str] = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """
+    One column of an exported table.
+
+    :param name: The column name in the file.
+    :param type: An Arrow type alias such as "int64" or "string".
+    :param convert: Turns a database value into one Arrow accepts, if they differ.
+    """
+    name: str
+    type: str
+    convert: Optional[Callable[[Any], Any]] = None
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """
+    An exported table: its columns and the query producing them, in the same order.
+    """
+    columns: Tuple[ExportColumn, ...]
+    query: Callable[[], Select]
+
+
+def _movies_query() -> Select:
+    return (
+        select(
+            MovieModel.id,
+            MovieModel.name,
+            MovieModel.date,
+            MovieModel.score,
+            MovieModel.overview,
+            MovieModel.status,
+            MovieModel.budget,
+            MovieModel.revenue,
+            CountryModel.code,
+        )
+        .join(CountryModel, CountryModel.id == MovieModel.country_id)
+        .order_by(MovieModel.id)
+    )
+
+
+def _association_table(association: str, entity: str) -> ExportTable:
+    relation = MOVIE_ASSOCIATIONS[association]
+
+    def query() -> Select:
+        return (
+            select(relation.table.c.movie_id, relation.entity_column, relation.model.name)
+            .join(relation.model, relation.model.id == relation.entity_column)
+            .order_by(relation.table.c.movie_id, relation.entity_column)
+        )
+
+    return ExportTable(
+        columns=(
+            ExportColumn("movie_id", "int64"),
+            ExportColumn(f"{entity}_id", "int64"),
+            ExportColumn(entity, "string"),
+        ),
+        query=query,
+    )
+
+
+EXPORT_TABLES: Dict[str, ExportTable] = {
+    "movies": ExportTable(
+        columns=(
+            ExportColumn("id", "int64"),
+            ExportColumn("name", "string"),
+            ExportColumn("date", "date32"),
+            ExportColumn("score", "float64"),
+            ExportColumn("overview", "string"),
+            ExportColumn("status", "string", lambda status: status.value),
+            ExportColumn("budget", "float64", float),
+            ExportColumn("revenue", "float64"),
+            ExportColumn("country", "string"),
+        ),
+        query=_movies_query,
+    ),
+    "movie_genres": _association_table("genres", "genre"),
+    "movie_actors": _association_table("actors", "actor"),
+    "movie_languages": _association_table("languages", "language"),
+}
+
+
+class _BatchWriter:
+    """
+    Turn row batches into Arrow record batches and append them to a Parquet or Arrow IPC file.
+    """
+
+    def __init__(self, table: ExportTable, export_format: str, sink: BinaryIO) -> None:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        self._pa = pa
+        self._columns = table.columns
+        self._schema = pa.schema([(column.name, pa.type_for_alias(column.type)) for column in table.columns])
+        if export_format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(sink, self._schema, compression="zstd")
+        else:
+            options = pyarrow.ipc.IpcWriteOptions(compression="zstd")
+            self._writer = pyarrow.ipc.new_file(sink, self._schema, options=options)
+
+    def write(self, rows: list) -> None:
+        arrays = []
+        for index, column in enumerate(self._columns):
+            values = [row[index] for row in rows]
+            if column.convert is not None:
+                values = [None if value is None else column.convert(value) for value in values]
+            arrays.append(self._pa.array(values, type=self._schema.field(index).type))
+        self._writer.write_batch(self._pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+async def write_export(
+        session: AsyncSession,
+        table: str,
+        export_format: str,
+        sink: BinaryIO,
+        batch_size: Optional[int] = None
+) -> int:
+    """
+    Write one table of the catalogue to a file.
+
+    The conversion and compression of every batch run in a worker thread, so that a large export
+    does not stall the event loop.
+
+    :param session: The async database session to read from.
+    :param table: A key of `EXPORT_TABLES`.
+    :param export_format: A key of `EXPORT_FORMATS`.
+    :param sink: A binary file opened for writing.
+    :param batch_size: Rows per batch; defaults to `EXPORT_BATCH_SIZE`.
+    :return: The number of rows written.
+    """
+    spec = EXPORT_TABLES[table]
+    batch_size = batch_size or get_settings().EXPORT_BATCH_SIZE
+    writer = await asyncio.to_thread(_BatchWriter, spec, export_format, sink)
+    rows = 0
+    try:
+        result = await session.stream(spec.query().execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            await asyncio.to_thread(writer.write, partition)
+            rows += len(partition)
+    finally:
+        await asyncio.to_thread(writer.close)
+    return rows
+
+
+async def export_catalogue(output_dir: str, export_format: str) -> Dict[str, int]:
+    """
+    Write every table of `EXPORT_TABLES` to `<output_dir>/<table>.<format>`, all from one snapshot.
+
+    :param output_dir: The directory to write to; it is created if missing.
+    :param export_format: A key of `EXPORT_FORMATS`.
+    :return: The number of rows written per table.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    async with get_db_contextmanager() as session:
+        await begin_snapshot(session)
+        for table in EXPORT_TABLES:
+            with open(os.path.join(output_dir, f"{table}.{export_format}"), "wb") as sink:
+                counts[table] = await write_export(session, table, export_format, sink)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the catalogue as columnar files.")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--output", default="exports", help="The directory to write the files to.")
+    args = parser.parse_args()
+
+    counts = asyncio.run(export_catalogue(args.output, args.format))
+    for table, rows in counts.items():
+        print(f"{table}: {rows} rows -> {os.path.join(args.output, f'{table}.{args.format}')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Persisted read counts of the hottest movies.
+
+Each worker counts its movie detail reads in memory (`services.hot_movies`) and periodically
+writes its heaviest hitters to `movie_hits`. A worker that starts, e.g. after a deploy, reads the
+table back to seed its counters and to know which detail responses to cache before traffic
+arrives. Rows are upserted by movie, so the table holds the latest count any worker reported, and
+it is trimmed to the `keep` hottest movies after every snapshot.
+"""
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import MovieHitModel, MovieModel
+from database.utils import dialect_insert
+
+
+async def save_movie_hits(session: AsyncSession, hits: Sequence[Tuple[int, int]], keep: int) -> int:
+    """
+    Upsert the read counts of movies, then drop all but the `keep` hottest rows.
+
+    Movies that were deleted in the meantime are skipped. The caller is responsible for committing.
+
+    :param session: The async database session.
+    :param hits: (movie ID, reads) pairs.
+    :param keep: How many rows the table keeps.
+    :return: The number of rows written.
+    """
+    hits = dict(hits)
+    if hits:
+        existing = (await session.execute(select(MovieModel.id).where(MovieModel.id.in_(hits)))).scalars().all()
+        rows = [{"movie_id": movie_id, "hits": hits[movie_id]} for movie_id in existing]
+    else:
+        rows = []
+    if rows:
+        stmt = dialect_insert(session, MovieHitModel).values(rows)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[MovieHitModel.movie_id], set_={"hits": stmt.excluded.hits, "updated_at": func.now()}
+        ))
+    hottest = select(MovieHitModel.movie_id).order_by(MovieHitModel.hits.desc(), MovieHitModel.movie_id).limit(keep)
+    await session.execute(delete(MovieHitModel).where(MovieHitModel.movie_id.not_in(hottest.scalar_subquery())))
+    return len(rows)
+
+
+async def load_movie_hits(session: AsyncSession, limit: int) -> List[Tuple[int, int]]:
+    """
+    :param session: The async database session.
+    :param limit: The maximum number of movies to return.
+    :return: (movie ID, reads) pairs of the hottest movies, hottest first.
+    """
+    result = await session.execute(
+        select(MovieHitModel.movie_id, MovieHitModel.hits)
+        .order_by(MovieHitModel.hits.desc(), MovieHitModel.movie_id)
+        .limit(limit)
+    )
+    return list(result.tuples())
@@ -0,0 +1,204 @@
+"""
+In-process name -> ID caches ("interning") for the entities movies refer to by name.
+
+Writes name their genres, languages, actors and country, and `database.associations.resolve_ids`
+turns the names into IDs. Genres, languages and countries are few and rarely change, so their
+tables are loaded whole at startup (`reference_cache.load`). Actors are too many to preload and
+are kept in an LRU of at most `ACTOR_CACHE_MAX_ENTRIES` names instead. A write whose names are all
+cached resolves them without a database round trip; only the missing names are inserted
+(`INSERT ... ON CONFLICT DO NOTHING RETURNING`) and, when a concurrent writer won the race on the
+unique constraint, selected.
+
+An ID is only cached once the transaction that read or created it has committed: the pending
+entries are kept in `session.info` and applied by an `after_commit` listener, and dropped on
+rollback, so a rolled-back insert never leaves an ID that does not exist. Actors and languages are
+also deleted, by the orphan cleanup (`database.cleanup`), which evicts them here when it commits.
+
+A name deleted by another worker's cleanup is not evicted here, so its cached ID can be stale, and
+a write that uses it fails on the foreign key. To recover, every cached ID a transaction used is
+noted in `session.info`, and a rollback evicts those entries; the write routes then retry once
+(`reference_cache.evicted_by_rollback`), and the retry resolves the names from the database.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database.models import ActorModel, Base, CountryModel, GenreModel, LanguageModel
+
+PENDING_INFO_KEY = "interning_pending"
+USED_INFO_KEY = "interning_used"
+EVICTED_INFO_KEY = "interning_evicted"
+
+
+class InternTable:
+    """
+    The cached IDs of one model, keyed by its unique name column; bounded as an LRU if `bounded`.
+    """
+
+    def __init__(self, model: type[Base], field: str, bounded: bool = False) -> None:
+        self.model = model
+        self.field = field
+        self.bounded = bounded
+        self.reset()
+
+    def reset(self) -> None:
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def lookup(self, values: Iterable[str]) -> Dict[str, int]:
+        """
+        :param values: The names to look up.
+        :return: The cached IDs of the names that are cached.
+        """
+        found = {}
+        for value in values:
+            entity_id = self._ids.get(value)
+            if entity_id is None:
+                self.misses += 1
+                continue
+            self.hits += 1
+            found[value] = entity_id
+            if self.bounded:
+                self._ids.move_to_end(value)
+        return found
+
+    def add(self, ids: Dict[str, int]) -> None:
+        self._ids.update(ids)
+        if self.bounded:
+            for value in ids:
+                self._ids.move_to_end(value)
+            max_entries = get_settings().ACTOR_CACHE_MAX_ENTRIES
+            while len(self._ids) > max_entries:
+                self._ids.popitem(last=False)
+
+    def discard(self, values: Iterable[str]) -> None:
+        for value in values:
+            self._ids.pop(value, None)
+
+    async def load(self, session: AsyncSession) -> None:
+        column = getattr(self.model, self.field)
+        result = await session.execute(select(column, self.model.id))
+        self._ids = OrderedDict(result.tuples().all())
+
+
+class ReferenceCache:
+    """
+    The intern tables of every entity that is resolved by name.
+    """
+
+    def __init__(self) -> None:
+        self._tables = {
+            (GenreModel, "name"): InternTable(GenreModel, "name"),
+            (LanguageModel, "name"): InternTable(LanguageModel, "name"),
+            (CountryModel, "code"): InternTable(CountryModel, "code"),
+            (ActorModel, "name"): InternTable(ActorModel, "name", bounded=True),
+        }
+
+    def table(self, model: type[Base], field: str) -> Optional[InternTable]:
+        return self._tables.get((model, field))
+
+    def reset(self) -> None:
+        """
+        Forget every cached ID and zero the counters.
+
+        :return: None
+        """
+        for table in self._tables.values():
+            table.reset()
+
+    def stats(self) -> dict:
+        return {
+            table.model.__tablename__: {"entries": len(table), "hits": table.hits, "misses": table.misses}
+            for table in self._tables.values()
+        }
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Load the genres, languages and countries; actors are cached as they are used.
+
+        :param session: The async database session.
+        :return: None
+        """
+        for table in self._tables.values():
+            if not table.bounded:
+                await table.load(session)
+
+    def add_on_commit(self, session: AsyncSession | Session, table: InternTable, ids: Dict[str, int]) -> None:
+        """
+        Cache `ids` once the session's current transaction commits.
+
+        :param session: The session that read or created the rows.
+        :param table: The intern table of the rows' model.
+        :param ids: The names and IDs to cache.
+        :return: None
+        """
+        self._pending(session).append((table, ids, True))
+
+    def discard_on_commit(self, session: AsyncSession | Session, table: InternTable, values: List[str]) -> None:
+        """
+        Evict deleted names now, and again once the deleting transaction commits.
+
+        Evicting twice keeps out an ID that a concurrent transaction read before the delete committed.
+
+        :param session: The session that deleted the rows.
+        :param table: The intern table of the rows' model.
+        :param values: The deleted names.
+        :return: None
+        """
+        table.discard(values)
+        self._pending(session).append((table, values, False))
+
+    def note_used(self, session: AsyncSession | Session, table: InternTable, values: List[str]) -> None:
+        """
+        Remember that the session's current transaction relies on cached IDs, to evict them on rollback.
+
+        :param session: The session that used the IDs.
+        :param table: The intern table the IDs were read from.
+        :param values: The names whose cached IDs were used.
+        :return: None
+        """
+        if values:
+            session.info.setdefault(USED_INFO_KEY, []).append((table, values))
+
+    @staticmethod
+    def evicted_by_rollback(session: AsyncSession | Session) -> bool:
+        """
+        :param session: A session that has just rolled back.
+        :return: Whether the rollback evicted cached IDs, i.e. whether a retry may resolve them afresh.
+        """
+        return session.info.pop(EVICTED_INFO_KEY, False)
+
+    @staticmethod
+    def _pending(session: AsyncSession | Session) -> List[Tuple[InternTable, object, bool]]:
+        return session.info.setdefault(PENDING_INFO_KEY, [])
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    session.info.pop(USED_INFO_KEY, None)
+    for table, entries, added in session.info.pop(PENDING_INFO_KEY, []):
+        if added:
+            table.add(entries)
+        else:
+            table.discard(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(PENDING_INFO_KEY, None)
+    used = session.info.pop(USED_INFO_KEY, [])
+    for table, values in used:
+        table.discard(values)
+    if used:
+        session.info[EVICTED_INFO_KEY] = True
+
+
+reference_cache = ReferenceCache()
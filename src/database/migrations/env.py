@@ -4,7 +4,7 @@ from alembic import context
 
 from database import models  # noqa: F401
 from database.models import Base
-from database.session_postgresql import sync_postgresql_engine
+from database.session_postgresql import get_sync_postgresql_engine
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -40,7 +40,7 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    connectable = sync_postgresql_engine
+    connectable = get_sync_postgresql_engine()
 
     with connectable.connect() as connection:
         context.configure(
@@ -61,7 +61,7 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    connectable = sync_postgresql_engine
+    connectable = get_sync_postgresql_engine()
 
     with connectable.connect() as connection:
         context.configure(
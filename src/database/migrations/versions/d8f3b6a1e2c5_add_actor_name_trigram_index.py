@@ -0,0 +1,37 @@
+"""add actor name trigram index
+
+Revision ID: d8f3b6a1e2c5
+Revises: c4e9a2f7b810
+Create Date: 2026-10-19 21:03:44.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3b6a1e2c5'
+down_revision: Union[str, None] = 'c4e9a2f7b810'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_actors_name_trgm',
+        'actors',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index('ix_actors_name_trgm', table_name='actors', postgresql_using='gin')
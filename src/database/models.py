@@ -2,7 +2,10 @@ import datetime
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import String, Float, Text, DECIMAL, UniqueConstraint, Date, ForeignKey, Table, Column
+from sqlalchemy import (
+    String, Float, Integer, Text, DECIMAL, UniqueConstraint, Date, DateTime, ForeignKey, Table, Column, Index, func,
+    DDL, event
+)
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped, relationship
 from sqlalchemy import Enum as SQLAlchemyEnum
 
@@ -13,6 +16,14 @@ class Base(DeclarativeBase):
         return None
 
 
+# The trigram index on actors.name (see ActorModel) needs the extension.
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
 class MovieStatusEnum(str, Enum):
     RELEASED = "Released"
     POST_PRODUCTION = "Post Production"
@@ -28,6 +39,7 @@ MoviesGenresModel = Table(
     Column(
         "genre_id",
         ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True, nullable=False),
+    Index("ix_movies_genres_genre_id_movie_id", "genre_id", "movie_id"),
 )
 
 ActorsMoviesModel = Table(
@@ -39,6 +51,7 @@ ActorsMoviesModel = Table(
     Column(
         "actor_id",
         ForeignKey("actors.id", ondelete="CASCADE"), primary_key=True, nullable=False),
+    Index("ix_actors_movies_actor_id_movie_id", "actor_id", "movie_id"),
 )
 
 MoviesLanguagesModel = Table(
@@ -46,6 +59,7 @@ MoviesLanguagesModel = Table(
     Base.metadata,
     Column("movie_id", ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True),
     Column("language_id", ForeignKey("languages.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_movies_languages_language_id_movie_id", "language_id", "movie_id"),
 )
 
 
@@ -58,7 +72,8 @@ class GenreModel(Base):
     movies: Mapped[list["MovieModel"]] = relationship(
         "MovieModel",
         secondary=MoviesGenresModel,
-        back_populates="genres"
+        back_populates="genres",
+        passive_deletes=True
     )
 
     def __repr__(self):
@@ -74,7 +89,17 @@ class ActorModel(Base):
     movies: Mapped[list["MovieModel"]] = relationship(
         "MovieModel",
         secondary=ActorsMoviesModel,
-        back_populates="actors"
+        back_populates="actors",
+        passive_deletes=True
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_actors_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
     )
 
     def __repr__(self):
@@ -103,7 +128,8 @@ class LanguageModel(Base):
     movies: Mapped[list["MovieModel"]] = relationship(
         "MovieModel",
         secondary=MoviesLanguagesModel,
-        back_populates="languages"
+        back_populates="languages",
+        passive_deletes=True
     )
 
     def __repr__(self):
@@ -130,23 +156,27 @@ class MovieModel(Base):
     genres: Mapped[list["GenreModel"]] = relationship(
         "GenreModel",
         secondary=MoviesGenresModel,
-        back_populates="movies"
+        back_populates="movies",
+        passive_deletes=True
     )
 
     actors: Mapped[list["ActorModel"]] = relationship(
         "ActorModel",
         secondary=ActorsMoviesModel,
-        back_populates="movies"
+        back_populates="movies",
+        passive_deletes=True
     )
 
     languages: Mapped[list["LanguageModel"]] = relationship(
         "LanguageModel",
         secondary=MoviesLanguagesModel,
-        back_populates="movies"
+        back_populates="movies",
+        passive_deletes=True
     )
 
     __table_args__ = (
         UniqueConstraint("name", "date", name="unique_movie_constraint"),
+        Index("ix_movies_country_id_id", "country_id", "id"),
     )
 
     @classmethod
@@ -155,3 +185,64 @@ class MovieModel(Base):
 
     def __repr__(self):
         return f"<Movie(name='{self.name}', release_date='{self.date}', score={self.score})>"
+
+
+class MovieStatsModel(Base):
+    __tablename__ = "movie_stats"
+
+    dimension: Mapped[str] = mapped_column(String(32), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    movie_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    revenue_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<MovieStats(dimension='{self.dimension}', key='{self.key}', movie_count={self.movie_count})>"
+
+
+class MovieChangeModel(Base):
+    __tablename__ = "movie_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    sequence: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    movie_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    operation: Mapped[str] = mapped_column(String(16), nullable=False)
+    changed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    @classmethod
+    def default_order_by(cls):
+        return [cls.sequence.asc()]
+
+    def __repr__(self):
+        return f"<MovieChange(sequence={self.sequence}, movie_id={self.movie_id}, operation='{self.operation}')>"
+
+
+class SeedCheckpointModel(Base):
+    __tablename__ = "seed_checkpoints"
+
+    file_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    file_path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    stage: Mapped[str] = mapped_column(String(16), nullable=False)
+    rows_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_rejected: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f"<SeedCheckpoint(file_path='{self.file_path}', stage='{self.stage}', rows_done={self.rows_done})>"
+
+
+class MovieHitModel(Base):
+    __tablename__ = "movie_hits"
+
+    movie_id: Mapped[int] = mapped_column(ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f"<MovieHit(movie_id={self.movie_id}, hits={self.hits})>"
@@ -1,11 +1,29 @@
+"""
+Loading movies from CSV files in the format of `seed_data/imdb_movies.csv`.
+
+`CSVDatabaseSeeder.seed` loads the catalogue in batches of `SEED_BATCH_SIZE` rows, one transaction
+each. The transaction also advances the file's row in `seed_checkpoints`, keyed by the SHA-256 of
+the file, so a run that fails (a lost connection, a killed process) resumes after the last committed
+batch instead of starting over. Movies are upserted on `unique_movie_constraint`, so a batch that
+runs twice leaves the same rows.
+
+Rows that cannot be stored do not stop the run. Rows that fail validation in `_clean`, and rows the
+database refuses when their batch is retried row by row, are appended to the dead-letter file next
+to the CSV (`<name>.rejected.csv`) with the reason in an `error` column. A row may be written there
+twice if the process dies between a batch's commit and the write.
+
+`upsert_csv_in_chunks` runs the same pipeline for uploads (see `services.ingest`).
+"""
 import asyncio
-import math
-from typing import List, Dict, Tuple
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 
 import pandas as pd
-from sqlalchemy import insert, select
+from sqlalchemy import delete, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
 from tqdm import tqdm
 
 from config import get_settings
@@ -17,11 +35,66 @@ from database.models import (
     ActorsMoviesModel,
     LanguageModel,
     MoviesLanguagesModel,
-    MovieModel
+    MovieModel,
+    MovieStatusEnum,
+    SeedCheckpointModel
 )
-from database import get_db_contextmanager
+from database import get_write_db_contextmanager
+from database.changes import record_movie_changes
+from database.stats import apply_stats_changes, get_movie_stats_entries, rebuild_catalogue_stats
+from database.utils import dialect_insert
 
 CHUNK_SIZE = 1000
+CSV_COLUMNS = (
+    'names', 'date_x', 'score', 'genre', 'overview', 'crew',
+    'orig_title', 'status', 'orig_lang', 'budget_x', 'revenue', 'country'
+)
+UPSERT_COLUMNS = ('score', 'overview', 'status', 'budget', 'revenue', 'country_id')
+MOVIE_STATUSES = tuple(status.value for status in MovieStatusEnum)
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class ChunkResult:
+    """
+    The outcome of one committed chunk of `upsert_csv_in_chunks`.
+    """
+    rows: int
+    bytes_read: int
+    sequence: int
+    rejected: int = 0
+    created_ids: List[int] = field(default_factory=list)
+    updated_ids: List[int] = field(default_factory=list)
+
+
+def file_sha256(path: str) -> str:
+    """
+    :param path: The path of a file.
+    :return: The hex SHA-256 digest of the file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dead_letter_path(csv_file_path: str) -> str:
+    """
+    :param csv_file_path: The path of a movies CSV.
+    :return: The path of the file collecting the CSV's rejected rows.
+    """
+    root, _ = os.path.splitext(csv_file_path)
+    return f"{root}.rejected.csv"
+
+
+def _rejected_rows(raw: pd.DataFrame, errors: pd.Series) -> pd.DataFrame:
+    """
+    :param raw: Rows as read from the CSV.
+    :param errors: The rejection reasons, indexed by row label.
+    :return: The rejected raw rows, with the reason in an `error` column.
+    """
+    return raw.loc[errors.index].assign(error=errors)
 
 
 class CSVDatabaseSeeder:
@@ -29,15 +102,18 @@ class CSVDatabaseSeeder:
     A class responsible for seeding the database from a CSV file using asynchronous SQLAlchemy.
     """
 
-    def __init__(self, csv_file_path: str, db_session: AsyncSession) -> None:
+    def __init__(self, csv_file_path: str, db_session: AsyncSession, show_progress: bool = True) -> None:
         """
         Initialize the seeder with the path to the CSV file and an async database session.
 
         :param csv_file_path: The path to the CSV file containing movie data.
         :param db_session: An instance of AsyncSession for performing database operations.
+        :param show_progress: Whether to draw tqdm progress bars, which only make sense in a terminal.
         """
         self._csv_file_path = csv_file_path
         self._db_session = db_session
+        self._show_progress = show_progress
+        self._file_hash: Optional[str] = None
 
     async def is_db_populated(self) -> bool:
         """
@@ -49,19 +125,53 @@ class CSVDatabaseSeeder:
         first_movie = result.scalars().first()
         return first_movie is not None
 
-    def _preprocess_csv(self) -> pd.DataFrame:
+    async def needs_seeding(self) -> bool:
+        """
+        Check whether `seed` has work to do: an unfinished checkpoint for this file, or an empty database.
+
+        :return: True if seeding should run.
+        """
+        checkpoint = await self._load_checkpoint()
+        if checkpoint is not None:
+            return checkpoint.stage != "done"
+        return not await self.is_db_populated()
+
+    @staticmethod
+    def _clean(data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
-        Load the CSV, remove duplicates, convert relevant columns to strings, and clean up data.
-        Saves the cleaned CSV back to the same path, then returns the Pandas DataFrame.
+        Remove duplicates, convert relevant columns to strings, and clean up data.
+        Rows that cannot be stored (no name, or a date, number or status that does not parse) are
+        split off instead of failing the whole file.
 
-        :return: A Pandas DataFrame containing cleaned movie data.
+        :param data: Raw rows in the format of the movies CSV.
+        :return: The cleaned rows, and the rejected raw rows with the reason in an `error` column.
+        :raises ValueError: If a column is missing.
         """
-        data = pd.read_csv(self._csv_file_path)
-        data = data.drop_duplicates(subset=['names', 'date_x'], keep='first')
+        missing = [column for column in CSV_COLUMNS if column not in data.columns]
+        if missing:
+            raise ValueError(f"Missing CSV columns: {', '.join(missing)}.")
+
+        raw = data
+        data = data.drop_duplicates(subset=['names', 'date_x'], keep='first').copy()
 
         for col in ['crew', 'genre', 'country', 'orig_lang', 'status']:
             data[col] = data[col].fillna('Unknown').astype(str)
 
+        dates = pd.to_datetime(data['date_x'].astype(str).str.strip(), format='%Y-%m-%d', errors='coerce')
+        numbers = {col: pd.to_numeric(data[col], errors='coerce') for col in ['score', 'budget_x', 'revenue']}
+        data['status'] = data['status'].str.strip()
+        checks = [
+            (data['names'].isna() | (data['names'].astype(str).str.strip() == ''), "missing name"),
+            (dates.isna(), "invalid date_x"),
+            *((values.isna(), f"invalid {col}") for col, values in numbers.items()),
+            (~data['status'].isin(MOVIE_STATUSES), "invalid status"),
+        ]
+        errors = pd.Series('', index=data.index)
+        for failed, reason in checks:
+            errors = errors.mask(failed & (errors == ''), reason)
+        rejected = errors != ''
+
+        data = data[~rejected]
         data['crew'] = (
             data['crew']
             .str.replace(r'\s+', '', regex=True)
@@ -69,16 +179,11 @@ class CSVDatabaseSeeder:
         )
 
         data['genre'] = data['genre'].str.replace('\u00A0', '', regex=True)
-        data['date_x'] = data['date_x'].astype(str).str.strip()
-        data['date_x'] = pd.to_datetime(data['date_x'], format='%Y-%m-%d', errors='raise')
-        data['date_x'] = data['date_x'].dt.date
+        data['date_x'] = dates[~rejected].dt.date
+        for col, values in numbers.items():
+            data[col] = values[~rejected]
         data['orig_lang'] = data['orig_lang'].str.replace(r'\s+', '', regex=True)
-        data['status'] = data['status'].str.strip()
-
-        print("Preprocessing CSV file...")
-        data.to_csv(self._csv_file_path, index=False)
-        print(f"CSV file saved to {self._csv_file_path}")
-        return data
+        return data, _rejected_rows(raw, errors[rejected])
 
     async def _get_or_create_bulk(
             self,
@@ -89,8 +194,10 @@ class CSVDatabaseSeeder:
         """
         For a given model and a list of item names/keys (e.g., a list of genres),
         retrieves any existing records in the database matching these items.
-        If some items are not found, they are created in bulk. Returns a dictionary
-        mapping the item string to the corresponding model instance.
+        If some items are not found, they are created in bulk; items a concurrent
+        upload created in the meantime are skipped by the insert and read back with
+        the others. Returns a dictionary mapping the item string to the corresponding
+        model instance.
 
         :param model: The SQLAlchemy model class (e.g., GenreModel).
         :param items: A list of string values to create or retrieve (e.g., ["Comedy", "Action"]).
@@ -116,7 +223,11 @@ class CSVDatabaseSeeder:
         if new_records:
             for i in range(0, len(new_records), CHUNK_SIZE):
                 chunk = new_records[i: i + CHUNK_SIZE]
-                await self._db_session.execute(insert(model).values(chunk))
+                await self._db_session.execute(
+                    dialect_insert(self._db_session, model)
+                    .values(chunk)
+                    .on_conflict_do_nothing(index_elements=[getattr(model, unique_field)])
+                )
                 await self._db_session.flush()
 
             for i in range(0, len(new_items), CHUNK_SIZE):
@@ -131,29 +242,6 @@ class CSVDatabaseSeeder:
 
         return existing_dict
 
-    async def _bulk_insert(self, table, data_list: List[Dict[str, int]]) -> None:
-        """
-        Insert data_list into the given table in chunks, displaying progress via tqdm.
-
-        :param table: The SQLAlchemy table or model to insert into.
-        :param data_list: A list of dictionaries, where each dict represents a row to insert.
-        """
-        total_records = len(data_list)
-        if total_records == 0:
-            return
-
-        num_chunks = math.ceil(total_records / CHUNK_SIZE)
-        table_name = getattr(table, '__tablename__', str(table))
-
-        for chunk_index in tqdm(range(num_chunks), desc=f"Inserting into {table_name}"):
-            start = chunk_index * CHUNK_SIZE
-            end = start + CHUNK_SIZE
-            chunk = data_list[start:end]
-            if chunk:
-                await self._db_session.execute(insert(table).values(chunk))
-
-        await self._db_session.flush()
-
     async def _prepare_reference_data(
             self,
             data: pd.DataFrame
@@ -203,7 +291,9 @@ class CSVDatabaseSeeder:
         :return: A list of dictionaries, each representing a new movie record.
         """
         movies_data: List[Dict[str, object]] = []
-        for _, row in tqdm(data.iterrows(), total=data.shape[0], desc="Processing movies"):
+        for _, row in tqdm(
+                data.iterrows(), total=data.shape[0], desc="Processing movies", disable=not self._show_progress
+        ):
             country = country_map[row['country']]
             movie = {
                 "name": row['names'],
@@ -243,7 +333,10 @@ class CSVDatabaseSeeder:
         movie_actors_data: List[Dict[str, int]] = []
         movie_languages_data: List[Dict[str, int]] = []
 
-        for i, (_, row) in enumerate(tqdm(data.iterrows(), total=data.shape[0], desc="Processing associations")):
+        rows = tqdm(
+            data.iterrows(), total=data.shape[0], desc="Processing associations", disable=not self._show_progress
+        )
+        for i, (_, row) in enumerate(rows):
             movie_id = movie_ids[i]
 
             for genre_name in row['genre'].split(','):
@@ -266,37 +359,181 @@ class CSVDatabaseSeeder:
 
         return movie_genres_data, movie_actors_data, movie_languages_data
 
-    async def seed(self) -> None:
+    async def _replace_links(self, table, movie_ids: List[int], links: List[Dict[str, int]]) -> None:
         """
-        Main method to seed the database with movie data from the CSV.
-        It pre-processes the CSV, prepares reference data (countries, genres, actors, languages),
-        inserts all movies, then inserts many-to-many relationships (genres, actors, languages).
+        Make `links` the only rows of an association table for the given movies.
+
+        :param table: The association table.
+        :param movie_ids: The movies whose links are replaced.
+        :param links: The wanted rows of the table.
         """
-        try:
-            if self._db_session.in_transaction():
-                print("Rolling back existing transaction.")
-                await self._db_session.rollback()
+        for i in range(0, len(movie_ids), CHUNK_SIZE):
+            await self._db_session.execute(
+                delete(table).where(table.c.movie_id.in_(movie_ids[i: i + CHUNK_SIZE]))
+            )
+        for i in range(0, len(links), CHUNK_SIZE):
+            await self._db_session.execute(
+                dialect_insert(self._db_session, table).values(links[i: i + CHUNK_SIZE]).on_conflict_do_nothing()
+            )
 
-            data = self._preprocess_csv()
+    async def upsert_chunk(self, data: pd.DataFrame, update_stats: bool = False) -> Dict[int, str]:
+        """
+        Insert the movies of a cleaned chunk, or update them where `unique_movie_constraint`
+        (name and date) already matches a movie, and replace their genres, actors and languages.
+        The caller is responsible for committing.
+
+        :param data: A chunk of rows cleaned by `_clean`.
+        :param update_stats: Whether to move the movies' contributions to `movie_stats` in the same
+            transaction, for callers that do not rebuild the statistics afterwards.
+        :return: A mapping of movie ID to "created" or "updated", in row order.
+        """
+        if data.empty:
+            return {}
+        country_map, genre_map, actor_map, language_map = await self._prepare_reference_data(data)
+        movies_data = self._prepare_movies_data(data, country_map)
+        keys = [(movie["name"], movie["date"]) for movie in movies_data]
+
+        existing = {}
+        for i in range(0, len(keys), CHUNK_SIZE):
+            result = await self._db_session.execute(
+                select(MovieModel.name, MovieModel.date, MovieModel.id)
+                .where(tuple_(MovieModel.name, MovieModel.date).in_(keys[i: i + CHUNK_SIZE]))
+            )
+            existing.update(((name, date), movie_id) for name, date, movie_id in result.tuples())
+        if update_stats:
+            old_entries = await get_movie_stats_entries(self._db_session, list(existing.values()))
+
+        stmt = dialect_insert(self._db_session, MovieModel).values(movies_data)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MovieModel.name, MovieModel.date],
+            set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS}
+        ).returning(MovieModel.id, MovieModel.name, MovieModel.date)
+        ids = {(name, date): movie_id for movie_id, name, date in (await self._db_session.execute(stmt)).all()}
+        movie_ids = [ids[key] for key in keys]
+
+        movie_genres_data, movie_actors_data, movie_languages_data = self._prepare_associations(
+            data, movie_ids, genre_map, actor_map, language_map
+        )
+        await self._replace_links(MoviesGenresModel, movie_ids, movie_genres_data)
+        await self._replace_links(ActorsMoviesModel, movie_ids, movie_actors_data)
+        await self._replace_links(MoviesLanguagesModel, movie_ids, movie_languages_data)
+        if update_stats:
+            new_entries = await get_movie_stats_entries(self._db_session, movie_ids)
+            await apply_stats_changes(
+                self._db_session,
+                [(entry, -1) for entry in old_entries.values()] + [(entry, 1) for entry in new_entries.values()]
+            )
 
-            country_map, genre_map, actor_map, language_map = await self._prepare_reference_data(data)
+        return {ids[key]: "updated" if key in existing else "created" for key in keys}
 
-            movies_data = self._prepare_movies_data(data, country_map)
+    async def _load_checkpoint(self) -> Optional[SeedCheckpointModel]:
+        if self._file_hash is None:
+            self._file_hash = await asyncio.to_thread(file_sha256, self._csv_file_path)
+        result = await self._db_session.execute(
+            select(SeedCheckpointModel).where(SeedCheckpointModel.file_hash == self._file_hash)
+        )
+        return result.scalars().first()
 
-            result = await self._db_session.execute(
-                insert(MovieModel).returning(MovieModel.id),
-                movies_data
-            )
-            movie_ids = list(result.scalars().all())
+    async def _save_checkpoint(self, **values: object) -> None:
+        """
+        Update this file's checkpoint in the current transaction.
 
-            movie_genres_data, movie_actors_data, movie_languages_data = self._prepare_associations(
-                data, movie_ids, genre_map, actor_map, language_map
-            )
+        :param values: The columns of `SeedCheckpointModel` to change.
+        """
+        await self._db_session.execute(
+            update(SeedCheckpointModel)
+            .where(SeedCheckpointModel.file_hash == self._file_hash)
+            .values(**values)
+        )
+
+    def _write_dead_letter(self, rejected: pd.DataFrame) -> None:
+        if rejected.empty:
+            return
+        path = dead_letter_path(self._csv_file_path)
+        rejected.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+    async def _upsert_batch(self, data: pd.DataFrame, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Upsert a cleaned batch in the current transaction. If the database refuses the batch, roll it
+        back and upsert its rows one by one, committing each, so that only the refused rows are lost.
 
-            await self._bulk_insert(MoviesGenresModel, movie_genres_data)
-            await self._bulk_insert(ActorsMoviesModel, movie_actors_data)
-            await self._bulk_insert(MoviesLanguagesModel, movie_languages_data)
+        :param data: The cleaned rows of the batch.
+        :param raw: The batch as read from the CSV.
+        :return: The raw rows the database refused, with the reason in an `error` column.
+        """
+        try:
+            await self.upsert_chunk(data)
+            return _rejected_rows(raw, pd.Series(dtype=str))
+        except (IntegrityError, DataError):
+            await self._db_session.rollback()
 
+        errors = {}
+        for label in data.index:
+            try:
+                await self.upsert_chunk(data.loc[[label]])
+                await self._db_session.commit()
+            except (IntegrityError, DataError) as e:
+                await self._db_session.rollback()
+                errors[label] = str(e.orig)
+        return _rejected_rows(raw, pd.Series(errors, dtype=str))
+
+    async def seed(self) -> None:
+        """
+        Main method to seed the database with movie data from the CSV.
+        It reads the CSV in batches, starting after the last checkpoint of this file, and upserts every
+        batch with its reference data (countries, genres, actors, languages) and many-to-many
+        relationships in one transaction. The catalogue statistics are rebuilt once all batches are in.
+        """
+        try:
+            if self._db_session.in_transaction():
+                print("Rolling back existing transaction.")
+                await self._db_session.rollback()
+
+            checkpoint = await self._load_checkpoint()
+            if checkpoint is None:
+                checkpoint = SeedCheckpointModel(
+                    file_hash=self._file_hash, file_path=self._csv_file_path, stage="movies"
+                )
+                self._db_session.add(checkpoint)
+                await self._db_session.commit()
+            stage, rows_done, rows_rejected = checkpoint.stage, checkpoint.rows_done, checkpoint.rows_rejected
+
+            if stage == "done":
+                print("This file has already been seeded.")
+                return
+
+            if stage == "movies":
+                if rows_done == 0 and os.path.exists(dead_letter_path(self._csv_file_path)):
+                    os.remove(dead_letter_path(self._csv_file_path))
+                elif rows_done:
+                    print(f"Resuming after row {rows_done}.")
+
+                batches = pd.read_csv(
+                    self._csv_file_path,
+                    chunksize=get_settings().SEED_BATCH_SIZE,
+                    skiprows=range(1, rows_done + 1)
+                )
+                progress = tqdm(
+                    desc="Seeding movies", unit="rows", initial=rows_done, disable=not self._show_progress
+                )
+                for raw in batches:
+                    data, rejected = self._clean(raw)
+                    rejected = pd.concat([rejected, await self._upsert_batch(data, raw)])
+                    rows_done += len(raw)
+                    rows_rejected += len(rejected)
+                    await self._save_checkpoint(rows_done=rows_done, rows_rejected=rows_rejected)
+                    await self._db_session.commit()
+                    self._write_dead_letter(rejected)
+                    progress.update(len(raw))
+                progress.close()
+                if rows_rejected:
+                    print(f"{rows_rejected} rows were rejected, see {dead_letter_path(self._csv_file_path)}")
+
+                await self._save_checkpoint(stage="stats")
+                await self._db_session.commit()
+
+            await rebuild_catalogue_stats(self._db_session)
+            await self._save_checkpoint(stage="done")
             await self._db_session.commit()
             print("Seeding completed.")
 
@@ -308,16 +545,49 @@ class CSVDatabaseSeeder:
             raise
 
 
+async def upsert_csv_in_chunks(csv_file_path: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[ChunkResult]:
+    """
+    Upsert a movies CSV of any size, reading and committing `chunk_size` rows at a time.
+
+    Unlike `CSVDatabaseSeeder.seed`, the run is not checkpointed and a batch the database refuses
+    fails it, but every chunk also records its changes in the outbox (`database.changes`). Every chunk
+    is one write transaction, so readers see whole chunks and a failure keeps the chunks committed
+    before it. Rows that fail validation are skipped and counted. Every chunk also moves its movies'
+    contributions to the catalogue statistics in its transaction, so the statistics stay consistent
+    whichever chunk fails.
+
+    :param csv_file_path: The path to the CSV file containing movie data.
+    :param chunk_size: The number of rows per transaction.
+    :return: An async iterator yielding a `ChunkResult` after each commit.
+    """
+    with open(csv_file_path, "rb") as csv_file:
+        for raw in pd.read_csv(csv_file, chunksize=chunk_size):
+            data, rejected = CSVDatabaseSeeder._clean(raw)
+            async with get_write_db_contextmanager() as db_session:
+                seeder = CSVDatabaseSeeder(csv_file_path, db_session, show_progress=False)
+                changes = await seeder.upsert_chunk(data, update_stats=True)
+                sequence = await record_movie_changes(db_session, list(changes.items()))
+                await db_session.commit()
+            yield ChunkResult(
+                rows=len(raw),
+                bytes_read=csv_file.tell(),
+                sequence=sequence,
+                rejected=len(rejected),
+                created_ids=[movie_id for movie_id, operation in changes.items() if operation == "created"],
+                updated_ids=[movie_id for movie_id, operation in changes.items() if operation == "updated"],
+            )
+
+
 async def main() -> None:
     """
     The main async entry point for running the database seeder.
-    Checks if the database is already populated, and if not, performs the seeding process.
+    Seeds an empty database, or resumes an interrupted run on the same file.
     """
     settings = get_settings()
-    async with get_db_contextmanager() as db_session:
+    async with get_write_db_contextmanager() as db_session:
         seeder = CSVDatabaseSeeder(settings.PATH_TO_MOVIES_CSV, db_session)
 
-        if not await seeder.is_db_populated():
+        if await seeder.needs_seeding():
             try:
                 await seeder.seed()
                 print("Database seeding completed successfully.")
@@ -1,27 +1,78 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker
 
 from config import get_settings
 
-settings = get_settings()
+_postgresql_engine: Optional[AsyncEngine] = None
+_postgresql_session_factory: Optional[sessionmaker] = None
 
-POSTGRESQL_DATABASE_URL = (f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@"
-                           f"{settings.POSTGRES_HOST}:{settings.POSTGRES_DB_PORT}/{settings.POSTGRES_DB}")
-postgresql_engine = create_async_engine(POSTGRESQL_DATABASE_URL, echo=False)
-AsyncPostgresqlSessionLocal = sessionmaker(  # type: ignore
-    bind=postgresql_engine,
-    class_=AsyncSession,
-    autocommit=False,
-    autoflush=False,
-    expire_on_commit=False,
-)
 
-sync_database_url = POSTGRESQL_DATABASE_URL.replace("postgresql+asyncpg", "postgresql")
-sync_postgresql_engine = create_engine(sync_database_url, echo=False)
+def get_postgresql_database_url() -> str:
+    """
+    Build the asyncpg database URL from the current settings.
+
+    :return: The SQLAlchemy URL of the PostgreSQL database.
+    """
+    settings = get_settings()
+    return (f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@"
+            f"{settings.POSTGRES_HOST}:{settings.POSTGRES_DB_PORT}/{settings.POSTGRES_DB}")
+
+
+def init_postgresql_engine() -> AsyncEngine:
+    """
+    Create the async PostgreSQL engine and its session factory if they do not exist yet.
+
+    Creating an engine does not open any connection, so this is safe to call from the application
+    lifespan handler or lazily on the first request.
+
+    :return: The async PostgreSQL engine.
+    """
+    global _postgresql_engine, _postgresql_session_factory
+
+    if _postgresql_engine is None:
+        _postgresql_engine = create_async_engine(get_postgresql_database_url(), echo=False)
+        _postgresql_session_factory = sessionmaker(  # type: ignore
+            bind=_postgresql_engine,
+            class_=AsyncSession,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _postgresql_engine
+
+
+async def dispose_postgresql_engine() -> None:
+    """
+    Close every pooled connection and forget the engine, so the next use creates a fresh one.
+
+    :return: None
+    """
+    global _postgresql_engine, _postgresql_session_factory
+
+    if _postgresql_engine is not None:
+        await _postgresql_engine.dispose()
+    _postgresql_engine = None
+    _postgresql_session_factory = None
+
+
+def get_sync_postgresql_engine() -> Engine:
+    """
+    Create a synchronous PostgreSQL engine, used by Alembic migrations.
+
+    :return: A new synchronous engine.
+    """
+    sync_database_url = get_postgresql_database_url().replace("postgresql+asyncpg", "postgresql")
+    return create_engine(sync_database_url, echo=False)
+
+
+def _get_postgresql_session_factory() -> sessionmaker:
+    init_postgresql_engine()
+    return _postgresql_session_factory
 
 
 async def get_postgresql_db() -> AsyncGenerator[AsyncSession, None]:
@@ -33,7 +84,7 @@ async def get_postgresql_db() -> AsyncGenerator[AsyncSession, None]:
 
     :return: An asynchronous generator yielding an AsyncSession instance.
     """
-    async with AsyncPostgresqlSessionLocal() as session:
+    async with _get_postgresql_session_factory()() as session:
         yield session
 
 
@@ -47,5 +98,10 @@ async def get_postgresql_db_contextmanager() -> AsyncGenerator[AsyncSession, Non
 
     :return: An asynchronous generator yielding an AsyncSession instance.
     """
-    async with AsyncPostgresqlSessionLocal() as session:
+    async with _get_postgresql_session_factory()() as session:
         yield session
+
+
+# PostgreSQL handles concurrent writers itself, so writes share the regular session factory.
+get_postgresql_write_db = get_postgresql_db
+get_postgresql_write_db_contextmanager = get_postgresql_db_contextmanager
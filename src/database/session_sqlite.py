@@ -1,21 +1,198 @@
+import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from functools import partial
+from typing import AsyncGenerator, Optional, TYPE_CHECKING
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker
 
 from config import get_settings
 from database import Base
+from database.deadlines import SQLITE_PROGRESS_HANDLER_STEPS, sqlite_deadline_exceeded
 
-settings = get_settings()
+if TYPE_CHECKING:
+    import aiosqlite
 
-SQLITE_DATABASE_URL = f"sqlite+aiosqlite:///{settings.PATH_TO_DB}"
-sqlite_engine = create_async_engine(SQLITE_DATABASE_URL, echo=False)
-AsyncSQLiteSessionLocal = sessionmaker(  # type: ignore
-    bind=sqlite_engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
+_sqlite_engine: Optional[AsyncEngine] = None
+_sqlite_writer_engine: Optional[AsyncEngine] = None
+_sqlite_session_factory: Optional[sessionmaker] = None
+_sqlite_writer_session_factory: Optional[sessionmaker] = None
+
+
+def get_sqlite_database_url() -> str:
+    """
+    Build the aiosqlite database URL from the current settings.
+
+    :return: The SQLAlchemy URL of the SQLite database.
+    """
+    return f"sqlite+aiosqlite:///{get_settings().PATH_TO_DB}"
+
+
+def is_in_memory_database() -> bool:
+    """
+    Tell whether the configured database lives in memory rather than in a file.
+
+    :return: True for `:memory:` and `mode=memory` URIs, otherwise False.
+    """
+    path_to_db = get_settings().PATH_TO_DB
+    return path_to_db == ":memory:" or "mode=memory" in path_to_db
+
+
+def _configure_sqlite_engine(engine: AsyncEngine, writer: bool) -> AsyncEngine:
+    """
+    Attach the production SQLite profile to an engine.
+
+    Every new DBAPI connection gets WAL journaling, `synchronous=NORMAL`, a memory-mapped I/O window,
+    a larger page cache, a busy timeout and enforced foreign keys, so the `ON DELETE CASCADE` clauses
+    of the association tables behave as they do on PostgreSQL. Writer connections on a file database
+    additionally start their transactions with `BEGIN IMMEDIATE`, so the write lock is taken up front
+    instead of being upgraded mid-transaction, which is what produces `database is locked` errors
+    across processes.
+
+    Every connection also runs the progress handler of `database.deadlines`, which aborts a statement
+    once the deadline of the request that issued it has passed.
+
+    :param engine: The async engine to configure.
+    :param writer: Whether the engine serves the serialized writer.
+    :return: The same engine, for chaining.
+    """
+    settings = get_settings()
+    sync_engine: Engine = engine.sync_engine
+    begin_immediate = writer and not is_in_memory_database()
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_BYTES}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+        dbapi_connection.await_(dbapi_connection.driver_connection.set_progress_handler(
+            partial(sqlite_deadline_exceeded, connection_record), SQLITE_PROGRESS_HANDLER_STEPS
+        ))
+        if begin_immediate:
+            dbapi_connection.isolation_level = None
+
+    # Cleared on checkout rather than checkin: a cancelled request returns its connection while the
+    # aborted statement may still be running in aiosqlite's thread, and only the expired deadline stops it.
+    @event.listens_for(sync_engine, "checkout")
+    def _clear_deadline(dbapi_connection, connection_record, connection_proxy) -> None:  # noqa: ANN001
+        connection_record.info.pop("deadline", None)
+
+    if begin_immediate:
+        @event.listens_for(sync_engine, "begin")
+        def _begin_immediate(connection) -> None:  # noqa: ANN001
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+def init_sqlite_engines() -> AsyncEngine:
+    """
+    Create the reader and writer SQLite engines and their session factories if they do not exist yet.
+
+    An in-memory database lives inside a single connection, so readers and the writer share one engine.
+    A file database gets a pool of reader connections and a separate single-connection writer engine.
+
+    :return: The reader engine.
+    """
+    global _sqlite_engine, _sqlite_writer_engine, _sqlite_session_factory, _sqlite_writer_session_factory
+
+    if _sqlite_engine is not None:
+        return _sqlite_engine
+
+    database_url = get_sqlite_database_url()
+    if is_in_memory_database():
+        reader_engine = _configure_sqlite_engine(create_async_engine(database_url, echo=False), writer=True)
+        writer_engine = reader_engine
+    else:
+        reader_engine = _configure_sqlite_engine(
+            create_async_engine(
+                database_url,
+                echo=False,
+                pool_size=get_settings().SQLITE_READ_POOL_SIZE,
+                max_overflow=0,
+            ),
+            writer=False,
+        )
+        writer_engine = _configure_sqlite_engine(
+            create_async_engine(database_url, echo=False, pool_size=1, max_overflow=0),
+            writer=True,
+        )
+
+    _sqlite_session_factory = sessionmaker(  # type: ignore
+        bind=reader_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    _sqlite_writer_session_factory = sessionmaker(  # type: ignore
+        bind=writer_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    _sqlite_engine, _sqlite_writer_engine = reader_engine, writer_engine
+    return _sqlite_engine
+
+
+async def dispose_sqlite_engines() -> None:
+    """
+    Close every pooled connection and forget the engines, so the next use creates fresh ones.
+
+    Note that disposing an in-memory database discards its contents.
+
+    :return: None
+    """
+    global _sqlite_engine, _sqlite_writer_engine, _sqlite_session_factory, _sqlite_writer_session_factory
+
+    for engine in {_sqlite_engine, _sqlite_writer_engine} - {None}:
+        await engine.dispose()
+    _sqlite_engine = _sqlite_writer_engine = None
+    _sqlite_session_factory = _sqlite_writer_session_factory = None
+
+
+def get_sqlite_engine() -> AsyncEngine:
+    """
+    Return the reader engine, creating it on first use.
+
+    :return: The reader engine.
+    """
+    return init_sqlite_engines()
+
+
+def get_sqlite_writer_engine() -> AsyncEngine:
+    """
+    Return the writer engine, creating it on first use.
+
+    :return: The writer engine.
+    """
+    init_sqlite_engines()
+    return _sqlite_writer_engine
+
+
+_write_locks: dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+
+
+def _get_write_lock() -> asyncio.Lock:
+    """
+    Return the writer queue for the running event loop.
+
+    `asyncio.Lock` wakes waiters in FIFO order, so it doubles as the queue that serializes all writes
+    issued by this process.
+
+    :return: The lock guarding the writer connection.
+    """
+    loop = asyncio.get_running_loop()
+    lock = _write_locks.get(loop)
+    if lock is None:
+        for stale_loop in [known for known in _write_locks if known.is_closed()]:
+            del _write_locks[stale_loop]
+        lock = _write_locks[loop] = asyncio.Lock()
+    return lock
 
 
 async def get_sqlite_db() -> AsyncGenerator[AsyncSession, None]:
@@ -27,10 +204,27 @@ async def get_sqlite_db() -> AsyncGenerator[AsyncSession, None]:
 
     :return: An asynchronous generator yielding an AsyncSession instance.
     """
-    async with AsyncSQLiteSessionLocal() as session:
+    init_sqlite_engines()
+    async with _sqlite_session_factory() as session:
         yield session
 
 
+async def get_sqlite_write_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Provide an asynchronous database session bound to the single serialized writer.
+
+    The session is handed out only once the writer queue reaches this request, so concurrent
+    create, update and delete requests wait their turn in the process instead of contending
+    for the SQLite write lock.
+
+    :return: An asynchronous generator yielding an AsyncSession instance.
+    """
+    async with _get_write_lock():
+        init_sqlite_engines()
+        async with _sqlite_writer_session_factory() as session:
+            yield session
+
+
 @asynccontextmanager
 async def get_sqlite_db_contextmanager() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -41,10 +235,24 @@ async def get_sqlite_db_contextmanager() -> AsyncGenerator[AsyncSession, None]:
 
     :return: An asynchronous generator yielding an AsyncSession instance.
     """
-    async with AsyncSQLiteSessionLocal() as session:
+    init_sqlite_engines()
+    async with _sqlite_session_factory() as session:
         yield session
 
 
+@asynccontextmanager
+async def get_sqlite_write_db_contextmanager() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Provide an asynchronous writer session using a context manager.
+
+    :return: An asynchronous generator yielding an AsyncSession instance.
+    """
+    async with _get_write_lock():
+        init_sqlite_engines()
+        async with _sqlite_writer_session_factory() as session:
+            yield session
+
+
 async def reset_sqlite_database() -> None:
     """
     Reset the SQLite database.
@@ -56,6 +264,40 @@ async def reset_sqlite_database() -> None:
 
     :return: None
     """
-    async with sqlite_engine.begin() as conn:
+    async with get_sqlite_writer_engine().begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def snapshot_sqlite_database() -> "aiosqlite.Connection":
+    """
+    Copy the current contents of the SQLite database into a new in-memory snapshot.
+
+    The copy is made with SQLite's online backup API, page by page, so it is cheap even for
+    a seeded catalogue. The caller owns the returned connection and must close it.
+
+    :return: An aiosqlite connection holding the snapshot.
+    """
+    import aiosqlite
+
+    snapshot = await aiosqlite.connect(":memory:")
+    async with _get_write_lock():
+        async with get_sqlite_writer_engine().connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            await raw_connection.driver_connection.backup(snapshot)
+    return snapshot
+
+
+async def restore_sqlite_database(snapshot: "aiosqlite.Connection") -> None:
+    """
+    Replace the contents of the SQLite database with a snapshot taken by `snapshot_sqlite_database`.
+
+    Warning: This action is irreversible and will overwrite all stored data.
+
+    :param snapshot: The snapshot connection to restore from.
+    :return: None
+    """
+    async with _get_write_lock():
+        async with get_sqlite_writer_engine().connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            await snapshot.backup(raw_connection.driver_connection)
@@ -0,0 +1,427 @@
+"""
+Precomputed catalogue statistics.
+
+`movie_stats` holds one row per (dimension, key) bucket, e.g. ("genre", "Drama") or ("year", "2023"),
+with the number of movies in the bucket and the running sums of their scores and revenues.
+The movie routes and uploads keep the table up to date in the same transaction as the write, so
+reads never need a GROUP BY over `movies`. A write changes all of its buckets with one upsert. The
+score and revenue sums are floats maintained incrementally, so they can drift by rounding; the lifespan runs
+`reconcile_catalogue_stats` every `STATS_RECONCILE_INTERVAL_SECONDS` to rebuild the table if they
+have. `recompute_catalogue_stats` derives the same numbers from scratch and backs both the
+consistency checker and the full rebuild.
+
+Usage (from the `src` directory):
+
+    python -m database.stats            # report buckets that drifted from the source tables
+    python -m database.stats --rebuild  # recompute the whole table
+"""
+import argparse
+import asyncio
+import logging
+import math
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, extract, func, literal, select, text, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database.models import (
+    CountryModel,
+    GenreModel,
+    LanguageModel,
+    MovieModel,
+    MoviesGenresModel,
+    MoviesLanguagesModel,
+    MovieStatsModel,
+    MovieStatusEnum
+)
+from database.utils import dialect_insert
+
+STATS_DIMENSIONS = ("genre", "country", "language", "status", "year")
+LOOKUP_BATCH_SIZE = 1000
+
+BucketKey = Tuple[str, str]
+BucketTotals = Tuple[int, float, float]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MovieStatsEntry:
+    """
+    The buckets a single movie contributes to, together with the values it adds to them.
+    """
+    buckets: Tuple[BucketKey, ...]
+    score: float
+    revenue: float
+
+    @classmethod
+    def build(
+            cls,
+            *,
+            genres: List[str],
+            country: str,
+            languages: List[str],
+            status: MovieStatusEnum,
+            date,  # noqa: ANN001
+            score: float,
+            revenue: float
+    ) -> "MovieStatsEntry":
+        buckets = (
+            [("genre", name) for name in sorted(set(genres))]
+            + [("country", country)]
+            + [("language", name) for name in sorted(set(languages))]
+            + [("status", MovieStatusEnum(status).value), ("year", str(date.year))]
+        )
+        return cls(buckets=tuple(buckets), score=float(score), revenue=float(revenue))
+
+
+async def get_movie_stats_entry(session: AsyncSession, movie_id: int) -> Optional[MovieStatsEntry]:
+    """
+    Load the buckets a stored movie contributes to.
+
+    :param session: The async database session.
+    :param movie_id: The ID of the movie.
+    :return: The movie's stats entry, or None if the movie does not exist.
+    """
+    return (await get_movie_stats_entries(session, [movie_id])).get(movie_id)
+
+
+async def get_movie_stats_entries(session: AsyncSession, movie_ids: Sequence[int]) -> Dict[int, MovieStatsEntry]:
+    """
+    Load the buckets several stored movies contribute to, with three queries per `LOOKUP_BATCH_SIZE` movies.
+
+    :param session: The async database session.
+    :param movie_ids: The IDs of the movies.
+    :return: A mapping of movie ID to stats entry; movies that do not exist are left out.
+    """
+    entries: Dict[int, MovieStatsEntry] = {}
+    for i in range(0, len(movie_ids), LOOKUP_BATCH_SIZE):
+        batch = list(movie_ids[i: i + LOOKUP_BATCH_SIZE])
+        rows = (await session.execute(
+            select(
+                MovieModel.id, MovieModel.score, MovieModel.revenue, MovieModel.status, MovieModel.date,
+                CountryModel.code
+            )
+            .join(CountryModel, MovieModel.country_id == CountryModel.id)
+            .where(MovieModel.id.in_(batch))
+        )).all()
+        genres: Dict[int, List[str]] = {}
+        for movie_id, name in (await session.execute(
+            select(MoviesGenresModel.c.movie_id, GenreModel.name)
+            .join(MoviesGenresModel, MoviesGenresModel.c.genre_id == GenreModel.id)
+            .where(MoviesGenresModel.c.movie_id.in_(batch))
+        )).tuples():
+            genres.setdefault(movie_id, []).append(name)
+        languages: Dict[int, List[str]] = {}
+        for movie_id, name in (await session.execute(
+            select(MoviesLanguagesModel.c.movie_id, LanguageModel.name)
+            .join(MoviesLanguagesModel, MoviesLanguagesModel.c.language_id == LanguageModel.id)
+            .where(MoviesLanguagesModel.c.movie_id.in_(batch))
+        )).tuples():
+            languages.setdefault(movie_id, []).append(name)
+
+        for row in rows:
+            entries[row.id] = MovieStatsEntry.build(
+                genres=genres.get(row.id, []),
+                country=row.code,
+                languages=languages.get(row.id, []),
+                status=row.status,
+                date=row.date,
+                score=row.score,
+                revenue=row.revenue,
+            )
+    return entries
+
+
+async def delete_movie_returning_stats_entry(session: AsyncSession, movie_id: int) -> Optional[MovieStatsEntry]:
+    """
+    Delete a movie and return the buckets it contributed to, with two statements: one read of its
+    genre and language names, which the delete cascades away, and the `DELETE ... RETURNING` itself.
+    The caller is responsible for committing.
+
+    :param session: The async database session.
+    :param movie_id: The ID of the movie.
+    :return: The deleted movie's stats entry, or None if the movie did not exist.
+    """
+    names = (await session.execute(union_all(
+        select(literal("genre").label("kind"), GenreModel.name)
+        .join(MoviesGenresModel, MoviesGenresModel.c.genre_id == GenreModel.id)
+        .where(MoviesGenresModel.c.movie_id == movie_id),
+        select(literal("language").label("kind"), LanguageModel.name)
+        .join(MoviesLanguagesModel, MoviesLanguagesModel.c.language_id == LanguageModel.id)
+        .where(MoviesLanguagesModel.c.movie_id == movie_id),
+    ))).all()
+    country_code = (
+        select(CountryModel.code)
+        .where(CountryModel.id == MovieModel.country_id)
+        .correlate(MovieModel)
+        .scalar_subquery()
+    )
+    row = (await session.execute(
+        delete(MovieModel)
+        .where(MovieModel.id == movie_id)
+        .returning(MovieModel.score, MovieModel.revenue, MovieModel.status, MovieModel.date, country_code)
+    )).first()
+    if row is None:
+        return None
+    score, revenue, status, date, country = row
+    return MovieStatsEntry.build(
+        genres=[name for kind, name in names if kind == "genre"],
+        country=country,
+        languages=[name for kind, name in names if kind == "language"],
+        status=status,
+        date=date,
+        score=score,
+        revenue=revenue,
+    )
+
+
+def _stats_rows(changes: Iterable[Tuple[MovieStatsEntry, int]]) -> List[Dict[str, Any]]:
+    """
+    Net several contributions into one delta row per bucket, in bucket order.
+
+    :param changes: (entry, sign) pairs; sign is 1 to add the movie, -1 to remove it.
+    :return: The rows to upsert, leaving out buckets whose delta is zero.
+    """
+    deltas: Dict[BucketKey, List[float]] = {}
+    for entry, sign in changes:
+        for bucket in entry.buckets:
+            delta = deltas.setdefault(bucket, [0, 0.0, 0.0])
+            delta[0] += sign
+            delta[1] += sign * entry.score
+            delta[2] += sign * entry.revenue
+    return [
+        {"dimension": dimension, "key": key, "movie_count": count, "score_sum": score, "revenue_sum": revenue}
+        for (dimension, key), (count, score, revenue) in sorted(deltas.items())
+        if count or score or revenue
+    ]
+
+
+async def apply_stats_changes(session: AsyncSession, changes: Iterable[Tuple[MovieStatsEntry, int]]) -> None:
+    """
+    Add or remove the contributions of several movies with a single upsert.
+
+    The rows are netted per bucket and sent in bucket order, so concurrent writers lock the shared
+    buckets in the same order and cannot deadlock; buckets left without movies are deleted.
+    The caller is responsible for committing.
+
+    :param session: The async database session.
+    :param changes: (entry, sign) pairs; sign is 1 when the movie is added, -1 when it is removed.
+    :return: None
+    """
+    rows = _stats_rows(changes)
+    if not rows:
+        return
+    stmt = dialect_insert(session, MovieStatsModel).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MovieStatsModel.dimension, MovieStatsModel.key],
+        set_={
+            "movie_count": MovieStatsModel.movie_count + stmt.excluded.movie_count,
+            "score_sum": MovieStatsModel.score_sum + stmt.excluded.score_sum,
+            "revenue_sum": MovieStatsModel.revenue_sum + stmt.excluded.revenue_sum,
+        },
+    )
+    await session.execute(stmt)
+
+    if any(row["movie_count"] < 0 for row in rows):
+        await session.execute(delete(MovieStatsModel).where(MovieStatsModel.movie_count <= 0))
+
+
+async def apply_movie_stats(session: AsyncSession, entry: MovieStatsEntry, sign: int) -> None:
+    """
+    Add (`sign=1`) or remove (`sign=-1`) one movie's contribution to its buckets.
+
+    :param session: The async database session.
+    :param entry: The movie's stats entry.
+    :param sign: 1 when the movie is added, -1 when it is removed.
+    :return: None
+    """
+    await apply_stats_changes(session, [(entry, sign)])
+
+
+async def replace_movie_stats(
+        session: AsyncSession,
+        old_entry: Optional[MovieStatsEntry],
+        new_entry: Optional[MovieStatsEntry]
+) -> None:
+    """
+    Move a movie's contribution from its old buckets to its new ones in one statement.
+
+    Buckets the movie stays in only receive the difference, and a no-op update sends nothing.
+
+    :param session: The async database session.
+    :param old_entry: The entry before the write, or None for a new movie.
+    :param new_entry: The entry after the write, or None for a deleted movie.
+    :return: None
+    """
+    changes = [(entry, sign) for entry, sign in ((old_entry, -1), (new_entry, 1)) if entry is not None]
+    await apply_stats_changes(session, changes)
+
+
+async def recompute_catalogue_stats(session: AsyncSession) -> Dict[BucketKey, BucketTotals]:
+    """
+    Compute every bucket from scratch with GROUP BY queries over the source tables.
+
+    :param session: The async database session.
+    :return: A mapping of (dimension, key) to (movie_count, score_sum, revenue_sum).
+    """
+    aggregates = (func.count(MovieModel.id), func.sum(MovieModel.score), func.sum(MovieModel.revenue))
+    queries = {
+        "genre": select(GenreModel.name, *aggregates)
+        .join(MoviesGenresModel, MoviesGenresModel.c.movie_id == MovieModel.id)
+        .join(GenreModel, GenreModel.id == MoviesGenresModel.c.genre_id)
+        .group_by(GenreModel.name),
+        "country": select(CountryModel.code, *aggregates)
+        .join(CountryModel, CountryModel.id == MovieModel.country_id)
+        .group_by(CountryModel.code),
+        "language": select(LanguageModel.name, *aggregates)
+        .join(MoviesLanguagesModel, MoviesLanguagesModel.c.movie_id == MovieModel.id)
+        .join(LanguageModel, LanguageModel.id == MoviesLanguagesModel.c.language_id)
+        .group_by(LanguageModel.name),
+        "status": select(MovieModel.status, *aggregates).group_by(MovieModel.status),
+        "year": select(extract("year", MovieModel.date), *aggregates).group_by(extract("year", MovieModel.date)),
+    }
+
+    buckets: Dict[BucketKey, BucketTotals] = {}
+    for dimension, stmt in queries.items():
+        for key, movie_count, score_sum, revenue_sum in (await session.execute(stmt)).all():
+            if dimension == "status":
+                key = MovieStatusEnum(key).value
+            elif dimension == "year":
+                key = str(int(key))
+            buckets[(dimension, key)] = (movie_count, float(score_sum or 0), float(revenue_sum or 0))
+    return buckets
+
+
+async def lock_catalogue_stats(session: AsyncSession) -> None:
+    """
+    Keep writers from changing `movie_stats` until the session's transaction ends.
+
+    Every movie write updates `movie_stats` in its own transaction, so once the lock is held, the
+    source tables and the statistics stay in step for the rest of the transaction. On SQLite the
+    session must be a write session, whose transaction already holds the database's write lock.
+
+    :param session: The async database session.
+    :return: None
+    """
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text("LOCK TABLE movie_stats IN SHARE ROW EXCLUSIVE MODE"))
+
+
+async def rebuild_catalogue_stats(session: AsyncSession) -> None:
+    """
+    Replace the contents of `movie_stats` with freshly recomputed buckets. The caller commits.
+
+    The table is locked first (see `lock_catalogue_stats`), so concurrent writes are not lost.
+
+    :param session: The async database session.
+    :return: None
+    """
+    await lock_catalogue_stats(session)
+    buckets = await recompute_catalogue_stats(session)
+    await session.execute(delete(MovieStatsModel))
+    if buckets:
+        await session.execute(
+            dialect_insert(session, MovieStatsModel).values([
+                {
+                    "dimension": dimension,
+                    "key": key,
+                    "movie_count": movie_count,
+                    "score_sum": score_sum,
+                    "revenue_sum": revenue_sum,
+                }
+                for (dimension, key), (movie_count, score_sum, revenue_sum) in buckets.items()
+            ])
+        )
+
+
+async def check_catalogue_stats(session: AsyncSession) -> List[str]:
+    """
+    Compare `movie_stats` with a from-scratch recomputation.
+
+    :param session: The async database session.
+    :return: A human-readable description of every bucket that differs; empty when consistent.
+    """
+    expected = await recompute_catalogue_stats(session)
+    stored = {
+        (row.dimension, row.key): (row.movie_count, row.score_sum, row.revenue_sum)
+        for row in (await session.execute(select(MovieStatsModel))).scalars()
+    }
+
+    mismatches = []
+    for bucket in sorted(expected.keys() | stored.keys()):
+        expected_totals, stored_totals = expected.get(bucket), stored.get(bucket)
+        if expected_totals is None or stored_totals is None or not (
+                expected_totals[0] == stored_totals[0]
+                and math.isclose(expected_totals[1], stored_totals[1], rel_tol=1e-9, abs_tol=1e-6)
+                and math.isclose(expected_totals[2], stored_totals[2], rel_tol=1e-9, abs_tol=1e-6)
+        ):
+            mismatches.append(f"{bucket[0]}={bucket[1]!r}: expected {expected_totals}, stored {stored_totals}")
+    return mismatches
+
+
+async def reconcile_catalogue_stats(session: AsyncSession) -> int:
+    """
+    Rebuild `movie_stats` if it drifted from the source tables, e.g. through float rounding of the
+    incremental score and revenue sums. The caller commits.
+
+    :param session: A write session.
+    :return: The number of buckets that had drifted.
+    """
+    await lock_catalogue_stats(session)
+    mismatches = await check_catalogue_stats(session)
+    if mismatches:
+        await rebuild_catalogue_stats(session)
+    return len(mismatches)
+
+
+async def run_stats_reconciliation_periodically() -> None:
+    """
+    Run `reconcile_catalogue_stats` every `STATS_RECONCILE_INTERVAL_SECONDS` until cancelled.
+
+    Database errors, and the `OSError`s asyncpg raises while the server is unreachable, are logged
+    and retried on the next tick.
+
+    :return: None
+    """
+    from database import get_write_db_contextmanager
+
+    settings = get_settings()
+    while True:
+        await asyncio.sleep(settings.STATS_RECONCILE_INTERVAL_SECONDS)
+        try:
+            async with get_write_db_contextmanager() as db_session:
+                drifted = await reconcile_catalogue_stats(db_session)
+                await db_session.commit()
+        except (SQLAlchemyError, OSError):
+            logger.warning("Reconciling the catalogue statistics failed; retrying on the next run.", exc_info=True)
+            continue
+        if drifted:
+            logger.warning("Rebuilt the catalogue statistics: %d bucket(s) had drifted.", drifted)
+
+
+async def main(rebuild: bool) -> int:
+    from database import get_write_db_contextmanager
+
+    async with get_write_db_contextmanager() as db_session:
+        if rebuild:
+            await rebuild_catalogue_stats(db_session)
+            await db_session.commit()
+            print("Catalogue statistics rebuilt.")
+            return 0
+
+        mismatches = await check_catalogue_stats(db_session)
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f"{len(mismatches)} inconsistent bucket(s) found.")
+        return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the table instead of checking it.")
+    sys.exit(asyncio.run(main(parser.parse_args().rebuild)))
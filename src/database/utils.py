@@ -0,0 +1,37 @@
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(session: AsyncSession, table):  # noqa: ANN001, ANN201
+    """
+    Build an INSERT for `table` using the dialect of the session's engine.
+
+    The dialect-specific constructs support `on_conflict_do_nothing` and `on_conflict_do_update`,
+    which both PostgreSQL and SQLite understand.
+
+    :param session: The async database session whose engine decides the dialect.
+    :param table: The table or model to insert into.
+    :return: A dialect-specific Insert construct.
+    """
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+async def begin_snapshot(session: AsyncSession) -> None:
+    """
+    Make every read of the session's transaction see the same committed state.
+
+    PostgreSQL runs the transaction as REPEATABLE READ. SQLite's reader connections run each SELECT
+    in its own implicit transaction, so an explicit BEGIN is issued instead; in WAL mode the first
+    read then takes the snapshot. Call it before the session's first statement; closing the session
+    ends the transaction.
+
+    :param session: A fresh async database session.
+    :return: None
+    """
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"))
+    else:
+        await session.execute(text("BEGIN"))
@@ -1,13 +1,117 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Optional
+
 from fastapi import FastAPI
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import get_settings
+from database import init_engines, dispose_engines, get_db_contextmanager
+from database.cleanup import run_orphan_cleanup_periodically
+from database.stats import run_stats_reconciliation_periodically
+from middleware import CompressionMiddleware, RequestDeadlineMiddleware
+from routes import (
+    actor_router,
+    admin_router,
+    analytics_router,
+    catalogue_router,
+    export_router,
+    movie_router,
+    stats_router,
+    upload_router
+)
+from routes.movies import warm_movie_details
+from services import (
+    actor_autocomplete,
+    actor_graph,
+    catalogue_replica,
+    change_feed,
+    hot_movies,
+    index_sync,
+    ingest_jobs,
+    reference_cache,
+    related_movies_index
+)
+
+logger = logging.getLogger(__name__)
+
 
-from routes import movie_router
+async def warm_up_services(app: FastAPI) -> None:
+    """
+    Build the in-process indexes and cache the hottest movies before the first request arrives.
+
+    A failure only costs the warm-up: every index also loads itself lazily on first use. asyncpg
+    reports an unreachable server with `OSError`s (a refused connection, an unknown host), not
+    with SQLAlchemy errors, so those are caught as well.
+    """
+    try:
+        async with get_db_contextmanager() as session:
+            await related_movies_index.load(session)
+            await actor_graph.load(session)
+            if get_settings().ACTOR_AUTOCOMPLETE_INDEX_ENABLED:
+                await actor_autocomplete.load(session)
+            await reference_cache.load(session)
+            if get_settings().CATALOGUE_REPLICA_ENABLED:
+                await catalogue_replica.load(session)
+        hot_movies.warmed += await warm_movie_details(app, await hot_movies.restore())
+    except (SQLAlchemyError, OSError):
+        logger.warning("Skipping service warm-up: the database is not ready.", exc_info=True)
+
+
+async def _stop_task(task: Optional[asyncio.Task]) -> None:
+    if task is not None:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    init_engines()
+    await warm_up_services(app)
+    cleanup_task = reconcile_task = snapshot_task = sync_task = None
+    if settings.ORPHAN_CLEANUP_INTERVAL_SECONDS > 0:
+        cleanup_task = asyncio.create_task(run_orphan_cleanup_periodically())
+    if settings.STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        reconcile_task = asyncio.create_task(run_stats_reconciliation_periodically())
+    if settings.HOT_MOVIES_SNAPSHOT_INTERVAL_SECONDS > 0:
+        snapshot_task = asyncio.create_task(hot_movies.save_periodically())
+    if settings.INDEX_SYNC_INTERVAL_SECONDS > 0:
+        sync_task = asyncio.create_task(index_sync.run())
+    yield
+    await _stop_task(cleanup_task)
+    await _stop_task(reconcile_task)
+    await _stop_task(snapshot_task)
+    await _stop_task(sync_task)
+    await index_sync.stop()
+    await change_feed.stop()
+    await ingest_jobs.stop()
+    await hot_movies.stop()
+    try:
+        await hot_movies.save()
+    except (SQLAlchemyError, OSError):
+        logger.warning("Could not save the hot movies on shutdown.", exc_info=True)
+    await dispose_engines()
 
 
 app = FastAPI(
     title="Movies homework",
-    description="Description of project"
+    description="Description of project",
+    lifespan=lifespan
 )
 
+app.add_middleware(RequestDeadlineMiddleware)
+app.add_middleware(CompressionMiddleware)
+
 api_version_prefix = "/api/v1"
 
 app.include_router(movie_router, prefix=f"{api_version_prefix}/theater", tags=["theater"])
+app.include_router(stats_router, prefix=f"{api_version_prefix}/theater", tags=["stats"])
+app.include_router(actor_router, prefix=f"{api_version_prefix}/theater", tags=["actors"])
+app.include_router(catalogue_router, prefix=f"{api_version_prefix}/theater", tags=["catalogue"])
+app.include_router(upload_router, prefix=f"{api_version_prefix}/theater", tags=["uploads"])
+app.include_router(export_router, prefix=f"{api_version_prefix}/theater", tags=["exports"])
+app.include_router(analytics_router, prefix=f"{api_version_prefix}/theater", tags=["analytics"])
+app.include_router(admin_router, prefix=f"{api_version_prefix}/admin", tags=["admin"])
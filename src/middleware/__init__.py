@@ -0,0 +1,2 @@
+from middleware.compression import CompressionMiddleware
+from middleware.deadline import RequestDeadlineMiddleware
@@ -0,0 +1,61 @@
+"""
+Compression of responses built by the routes.
+
+The body is compressed with the encoding negotiated from `Accept-Encoding` when its media type is
+compressible and it reaches `COMPRESSION_MINIMUM_SIZE` bytes. Responses that already carry a
+`Content-Encoding` (the precompressed entries of `services.response_cache`) and streamed responses
+are passed through untouched.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.compression import compress, negotiate_encoding, should_compress
+
+
+class CompressionMiddleware:
+    """
+    Negotiate gzip, Brotli or Zstandard for single-body responses.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message = {}
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or not start_message:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            body = message.get("body", b"")
+            if (
+                not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and should_compress(headers.get("content-type"), len(body))
+            ):
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+
+            await send(start_message)
+            start_message = {}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,164 @@
+"""
+Request deadlines and cancellation on client disconnect.
+
+Every HTTP request gets a `Deadline` of `REQUEST_TIMEOUT_SECONDS`, or of the number of seconds in its
+`X-Request-Timeout` header (capped at `REQUEST_TIMEOUT_MAX_SECONDS`). It is stored on
+`request.state.deadline`; the database dependencies attach it to their session, which bounds the
+admission wait and every SQL statement of the request (see `database.deadlines`).
+
+The deadline bounds the server's work, not the client's transfer: it is restarted once the request
+body has arrived, so a slow upload is not cut short, and it stops applying once the response has
+started, so a long download (an export file, a server-sent event stream) is not truncated. A
+streamed response that reads the database after it started bounds those reads itself.
+
+The middleware runs the application in its own task and watches the client at the same time:
+
+* if the client disconnects before the response is complete, the deadline is cancelled (which
+  aborts a running SQLite statement) and the task is cancelled (which makes asyncpg cancel the
+  PostgreSQL query);
+* if the deadline passes before the response has started, the same happens and the client gets
+  504 Gateway Timeout.
+
+To watch for the disconnect, the watcher reads the client's messages and hands them to the
+application through a queue of one message, so the request body is still read only as fast as the
+application consumes it. Once the response is complete, the application is left to finish (e.g.
+its background tasks).
+"""
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Callable, Optional
+
+from sqlalchemy.exc import OperationalError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import get_settings
+from database import Deadline
+
+REQUEST_TIMEOUT_HEADER = b"x-request-timeout"
+
+logger = logging.getLogger(__name__)
+
+
+def requested_timeout(scope: Scope) -> float:
+    """
+    Read the request's time budget from its `X-Request-Timeout` header, falling back to the default.
+
+    :param scope: The ASGI scope of the request.
+    :return: The timeout in seconds.
+    """
+    settings = get_settings()
+    for name, value in scope.get("headers", []):
+        if name == REQUEST_TIMEOUT_HEADER:
+            try:
+                timeout = float(value)
+            except ValueError:
+                break
+            if timeout > 0:
+                return min(timeout, settings.REQUEST_TIMEOUT_MAX_SECONDS)
+            break
+    return settings.REQUEST_TIMEOUT_SECONDS
+
+
+class RequestDeadlineMiddleware:
+    """
+    Enforce a per-request deadline and stop the work of requests whose client went away.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(requested_timeout(scope))
+        scope.setdefault("state", {})["deadline"] = deadline
+        messages: asyncio.Queue = asyncio.Queue(maxsize=1)
+        body_received = asyncio.Event()
+        response_started = response_complete = False
+
+        async def send_tracking(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        async def watch_client() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    with suppress(asyncio.QueueFull):
+                        messages.put_nowait(message)
+                    return
+                if not message.get("more_body", False):
+                    deadline.restart()
+                    body_received.set()
+                await messages.put(message)
+
+        app_task = asyncio.create_task(self.app(scope, messages.get, send_tracking))
+        watcher = asyncio.create_task(watch_client())
+        body_waiter = asyncio.create_task(body_received.wait())
+        try:
+            reason = await self._wait(
+                app_task, watcher, body_waiter, deadline, lambda: response_started, lambda: response_complete
+            )
+        finally:
+            watcher.cancel()
+            body_waiter.cancel()
+
+        if reason is None:
+            try:
+                app_task.result()
+            except OperationalError:
+                if not deadline.expired or response_started:
+                    raise
+                reason = "deadline"
+            else:
+                return
+        else:
+            deadline.cancel()
+            app_task.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await app_task
+
+        logger.info("Stopped %s %s: %s.", scope["method"], scope["path"], reason)
+        if reason == "deadline" and not response_started:
+            response = JSONResponse(
+                status_code=504,
+                content={"detail": "The request exceeded its deadline."},
+            )
+            await response(scope, receive, send)
+
+    @staticmethod
+    async def _wait(
+            app_task: asyncio.Task,
+            watcher: asyncio.Task,
+            body_waiter: asyncio.Task,
+            deadline: Deadline,
+            response_started: Callable[[], bool],
+            response_complete: Callable[[], bool]
+    ) -> Optional[str]:
+        """
+        Wait for the application, a client disconnect or the deadline, whichever comes first.
+
+        The deadline only counts from the end of the request body (`body_waiter`) to the start of
+        the response.
+
+        :return: None when the application finished, otherwise "disconnect" or "deadline".
+        """
+        pending = {app_task, watcher, body_waiter}
+        while True:
+            timed = body_waiter.done() and not response_started()
+            timeout = deadline.remaining() if timed else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if app_task in done:
+                return None
+            if watcher in done and not response_complete():
+                return "disconnect"
+            if timed and not done and not response_started():
+                return "deadline"
@@ -1 +1,8 @@
 from routes.movies import router as movie_router
+from routes.stats import router as stats_router
+from routes.actors import router as actor_router
+from routes.admin import router as admin_router
+from routes.uploads import router as upload_router
+from routes.exports import router as export_router
+from routes.analytics import router as analytics_router
+from routes.catalogue import router as catalogue_router
@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database.actor_search import search_actors
+from database.models import ActorModel
+from routes.dependencies import get_db
+from schemas import (
+    ActorAutocompleteSchema,
+    ActorMatchSchema,
+    ActorDegreeSchema,
+    ActorPathSchema,
+    ActorPathStepSchema,
+    CostarSchema,
+    CostarsResponseSchema
+)
+from services import actor_autocomplete, actor_graph
+
+
+router = APIRouter()
+
+ACTOR_NOT_FOUND = "Actor with the given ID was not found."
+
+
+async def _get_actor_names(db: AsyncSession, actor_ids: list[int]) -> dict[int, str]:
+    """
+    Resolve actor names for the IDs returned by the graph with a single query.
+
+    :param db: The async database session.
+    :param actor_ids: The IDs to resolve.
+    :return: A mapping of actor ID to name.
+    """
+    if not actor_ids:
+        return {}
+    result = await db.execute(select(ActorModel.id, ActorModel.name).where(ActorModel.id.in_(actor_ids)))
+    return dict(result.tuples().all())
+
+
+@router.get("/actors/autocomplete/", response_model=ActorAutocompleteSchema)
+async def autocomplete_actors(
+        q: str = Query(..., min_length=1, max_length=100, description="The beginning of a word of the name."),
+        limit: int = Query(10, ge=1, le=50),
+        db: AsyncSession = Depends(get_db),
+) -> ActorAutocompleteSchema:
+    if get_settings().ACTOR_AUTOCOMPLETE_INDEX_ENABLED:
+        await actor_autocomplete.ensure_loaded(db)
+        matches, source = actor_autocomplete.search(q, limit), "index"
+    else:
+        matches, source = await search_actors(db, q, limit), "database"
+    return ActorAutocompleteSchema(
+        query=q,
+        source=source,
+        actors=[ActorMatchSchema.model_validate(match) for match in matches],
+    )
+
+
+@router.get("/actors/{actor_id}/costars/", response_model=CostarsResponseSchema)
+async def get_actor_costars(
+        actor_id: int,
+        limit: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(get_db),
+) -> CostarsResponseSchema:
+    await actor_graph.ensure_loaded(db)
+    costars = actor_graph.costars(actor_id, limit)
+    if costars is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ACTOR_NOT_FOUND)
+
+    names = await _get_actor_names(db, [costar_id for costar_id, _ in costars])
+    return CostarsResponseSchema(
+        actor_id=actor_id,
+        costars=[
+            CostarSchema(id=costar_id, name=names[costar_id], shared_movies=shared_movies)
+            for costar_id, shared_movies in costars
+            if costar_id in names
+        ],
+    )
+
+
+@router.get("/actors/{actor_id}/degree/", response_model=ActorDegreeSchema)
+async def get_actor_degree(
+        actor_id: int,
+        db: AsyncSession = Depends(get_db),
+) -> ActorDegreeSchema:
+    await actor_graph.ensure_loaded(db)
+    degree = actor_graph.degree(actor_id)
+    if degree is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ACTOR_NOT_FOUND)
+
+    movie_count, costar_count = degree
+    return ActorDegreeSchema(actor_id=actor_id, movie_count=movie_count, costar_count=costar_count)
+
+
+@router.get("/actors/{actor_id}/path/{other_actor_id}/", response_model=ActorPathSchema)
+async def get_actor_path(
+        actor_id: int,
+        other_actor_id: int,
+        db: AsyncSession = Depends(get_db),
+) -> ActorPathSchema:
+    await actor_graph.ensure_loaded(db)
+    if not actor_graph.has_actor(actor_id) or not actor_graph.has_actor(other_actor_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ACTOR_NOT_FOUND)
+
+    path = actor_graph.shortest_path(actor_id, other_actor_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The actors are not connected through shared movies."
+        )
+
+    names = await _get_actor_names(db, path)
+    return ActorPathSchema(
+        source_id=actor_id,
+        target_id=other_actor_id,
+        distance=len(path) - 1,
+        path=[ActorPathStepSchema(id=step_id, name=names.get(step_id, "")) for step_id in path],
+    )
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Query
+
+from routes.dependencies import require_admin_api_key
+from schemas import (
+    AdmissionStatsSchema,
+    ChangeFeedStatsSchema,
+    ExportCacheStatsSchema,
+    HotMovieSchema,
+    HotMoviesResponseSchema,
+    HotMoviesStatsSchema,
+    MetricsSchema,
+    ReferenceCacheStatsSchema,
+    ResponseCacheStatsSchema,
+    SingleFlightStatsSchema
+)
+from services import (
+    change_feed,
+    export_cache,
+    hot_movies,
+    movie_count_flight,
+    movie_detail_flight,
+    read_limiter,
+    reference_cache,
+    response_cache,
+    write_limiter
+)
+
+
+router = APIRouter(dependencies=[Depends(require_admin_api_key)])
+
+
+@router.get("/metrics/", response_model=MetricsSchema)
+async def get_metrics() -> MetricsSchema:
+    return MetricsSchema(
+        single_flight={
+            flight.name: SingleFlightStatsSchema(**flight.stats())
+            for flight in (movie_detail_flight, movie_count_flight)
+        },
+        admission={
+            limiter.name: AdmissionStatsSchema(**limiter.stats())
+            for limiter in (read_limiter, write_limiter)
+        },
+        response_cache=ResponseCacheStatsSchema(**response_cache.stats()),
+        change_feed=ChangeFeedStatsSchema(**change_feed.stats()),
+        exports=ExportCacheStatsSchema(**export_cache.stats()),
+        hot_movies=HotMoviesStatsSchema(**hot_movies.stats()),
+        reference_cache={
+            table: ReferenceCacheStatsSchema(**stats) for table, stats in reference_cache.stats().items()
+        },
+    )
+
+
+@router.get("/hot-movies/", response_model=HotMoviesResponseSchema)
+async def get_hot_movies(limit: int = Query(10, ge=1, le=100)) -> HotMoviesResponseSchema:
+    """
+    The most read movies of this worker, by approximate number of detail reads.
+
+    `reads` may overcount a movie by up to `overcount`: the reads it inherited from the movie it
+    replaced in the tracker.
+    """
+    return HotMoviesResponseSchema(
+        total_reads=hot_movies.stats()["reads"],
+        movies=[
+            HotMovieSchema(movie_id=hitter.key, reads=hitter.count, overcount=hitter.error)
+            for hitter in hot_movies.top(limit)
+        ],
+    )
@@ -0,0 +1,90 @@
+"""
+Filtered top-N and range summaries over the catalogue.
+
+Both routes are answered by the in-memory columnar replica (`services.catalogue_replica`) when it
+is enabled, and by the equivalent SQL in `database.analytics` otherwise or when the replica cannot
+answer. The `source` field of the response says which one did.
+"""
+import datetime
+from dataclasses import asdict
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database.analytics import RANGE_COLUMNS, MovieFilter, get_movie_summary, get_top_movies
+from routes.dependencies import get_db
+from schemas import MovieSummarySchema, RankedMovieSchema, TopMoviesResponseSchema
+from services import catalogue_replica
+
+router = APIRouter()
+
+RangeColumn = Literal[RANGE_COLUMNS]
+
+
+def movie_filter(
+        genre: Optional[str] = Query(None, description="The name of a genre of the movies."),
+        language: Optional[str] = Query(None, description="The name of a language of the movies."),
+        country: Optional[str] = Query(None, description="The code of the movies' country."),
+        actor_id: Optional[int] = Query(None, description="The ID of an actor of the movies."),
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        min_budget: Optional[float] = None,
+        max_budget: Optional[float] = None,
+        min_revenue: Optional[float] = None,
+        max_revenue: Optional[float] = None,
+) -> MovieFilter:
+    bounds = {
+        "date": (date_from, date_to),
+        "score": (min_score, max_score),
+        "budget": (min_budget, max_budget),
+        "revenue": (min_revenue, max_revenue),
+    }
+    return MovieFilter(
+        genre=genre,
+        language=language,
+        country=country,
+        actor_id=actor_id,
+        ranges=tuple(
+            (column, low, high) for column, (low, high) in bounds.items() if low is not None or high is not None
+        ),
+    )
+
+
+@router.get("/analytics/movies/top/", response_model=TopMoviesResponseSchema)
+async def get_top_movies_ranking(
+        order_by: RangeColumn = "score",
+        descending: bool = True,
+        limit: int = Query(10, ge=1, le=100),
+        conditions: MovieFilter = Depends(movie_filter),
+        db: AsyncSession = Depends(get_db),
+) -> TopMoviesResponseSchema:
+    movies, source = None, "replica"
+    if get_settings().CATALOGUE_REPLICA_ENABLED:
+        await catalogue_replica.ensure_loaded(db)
+        movies = catalogue_replica.top_movies(conditions, order_by, descending, limit)
+    if movies is None:
+        movies = await get_top_movies(db, conditions, order_by, descending, limit)
+        source = "database"
+    return TopMoviesResponseSchema(
+        source=source,
+        movies=[RankedMovieSchema.model_validate(movie) for movie in movies],
+    )
+
+
+@router.get("/analytics/movies/summary/", response_model=MovieSummarySchema)
+async def get_movies_summary(
+        conditions: MovieFilter = Depends(movie_filter),
+        db: AsyncSession = Depends(get_db),
+) -> MovieSummarySchema:
+    summary, source = None, "replica"
+    if get_settings().CATALOGUE_REPLICA_ENABLED:
+        await catalogue_replica.ensure_loaded(db)
+        summary = catalogue_replica.summarize(conditions)
+    if summary is None:
+        summary = await get_movie_summary(db, conditions)
+        source = "database"
+    return MovieSummarySchema(source=source, **asdict(summary))
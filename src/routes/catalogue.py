@@ -0,0 +1,91 @@
+"""
+Browsing endpoints for actors, genres, languages and countries.
+
+Every entity gets the same three routes, e.g. for genres:
+
+* `GET /genres/?after=&limit=` lists genres by ID with their movie counts;
+* `GET /genres/{genre_id}/` returns one genre with its movie count;
+* `GET /genres/{genre_id}/movies/?before=&limit=` lists its movies, newest first.
+
+Both lists are keyset-paginated (see `database.catalogue`): `next_cursor` is the value to pass as
+`after` (or `before`) for the next page, and is null on the last page.
+
+This router is included after the actor router, so that `/actors/autocomplete/` is matched before
+`/actors/{actor_id}/`.
+"""
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.catalogue import CATALOGUE_ENTITIES, CatalogueEntity, get_entity, get_entity_movies, list_entities
+from routes.dependencies import get_db
+from schemas import (
+    CountryEntitySchema,
+    EntityListResponseSchema,
+    EntityMoviesResponseSchema,
+    MovieListItemSchema,
+    NamedEntitySchema
+)
+
+router = APIRouter()
+
+ENTITY_SCHEMAS: dict[str, type[BaseModel]] = {
+    "actors": NamedEntitySchema,
+    "genres": NamedEntitySchema,
+    "languages": NamedEntitySchema,
+    "countries": CountryEntitySchema,
+}
+
+SINGULAR = {"actors": "actor", "genres": "genre", "languages": "language", "countries": "country"}
+
+
+def _serialize(schema: type[BaseModel], row: Any, movie_count: int) -> BaseModel:
+    return schema(**{field: getattr(row, field) for field in schema.model_fields if field != "movie_count"},
+                  movie_count=movie_count)
+
+
+def _add_entity_routes(key: str, entity: CatalogueEntity, schema: type[BaseModel]) -> None:
+    singular = SINGULAR[key]
+    not_found = f"{singular.capitalize()} with the given ID was not found."
+
+    @router.get(f"/{key}/", response_model=EntityListResponseSchema[schema], name=f"list_{key}")
+    async def list_catalogue_entities(
+            after: int = Query(0, ge=0, description="The last ID of the previous page."),
+            limit: int = Query(20, ge=1, le=100),
+            db: AsyncSession = Depends(get_db),
+    ) -> EntityListResponseSchema:
+        rows = await list_entities(db, entity, after, limit)
+        return EntityListResponseSchema[schema](
+            items=[_serialize(schema, row, movie_count) for row, movie_count in rows],
+            next_cursor=rows[-1][0].id if len(rows) == limit else None,
+        )
+
+    @router.get(f"/{key}/{{entity_id}}/", response_model=schema, name=f"get_{singular}")
+    async def get_catalogue_entity(entity_id: int, db: AsyncSession = Depends(get_db)) -> BaseModel:
+        found = await get_entity(db, entity, entity_id)
+        if found is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+        return _serialize(schema, *found)
+
+    @router.get(
+        f"/{key}/{{entity_id}}/movies/", response_model=EntityMoviesResponseSchema, name=f"get_{singular}_movies"
+    )
+    async def get_catalogue_entity_movies(
+            entity_id: int,
+            before: Optional[int] = Query(None, ge=1, description="The last movie ID of the previous page."),
+            limit: int = Query(20, ge=1, le=100),
+            db: AsyncSession = Depends(get_db),
+    ) -> EntityMoviesResponseSchema:
+        movies = await get_entity_movies(db, entity, entity_id, before, limit)
+        if not movies and await db.get(entity.model, entity_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+        return EntityMoviesResponseSchema(
+            movies=[MovieListItemSchema.model_validate(movie) for movie in movies],
+            next_cursor=movies[-1].id if len(movies) == limit else None,
+        )
+
+
+for entity_key, catalogue_entity in CATALOGUE_ENTITIES.items():
+    _add_entity_routes(entity_key, catalogue_entity, ENTITY_SCHEMAS[entity_key])
@@ -0,0 +1,116 @@
+"""
+Database dependencies of the routes, guarded by admission control.
+
+`get_db` and `get_write_db` wrap the session providers of the `database` package with the read and
+write limiters of `services.admission`. The session is opened only after admission, so a request
+waiting for a slot does not hold a pooled connection. A request that is not admitted in time gets
+503 Service Unavailable with a `Retry-After` header instead of waiting on the connection pool.
+The request's deadline (see `middleware.deadline`) caps the wait and is attached to the session.
+
+Routes that must not hold a session for their whole duration, such as the change feed, open short
+ones with `read_session` instead.
+
+Routes for partners rather than the public, such as the CSV upload, require an `X-API-Key` header
+matching one of `INGEST_API_KEYS` (`require_api_key`). The admin endpoints require one of
+`ADMIN_API_KEYS` instead (`require_admin_api_key`), so an ingest key does not expose them.
+"""
+import math
+import secrets
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Callable
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import APIKeyHeader
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import database
+from config import get_settings
+from services.admission import AdaptiveLimiter, AdmissionRejected, read_limiter, write_limiter
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+@asynccontextmanager
+async def _admitted_session(
+        request: Request,
+        limiter: AdaptiveLimiter,
+        session_contextmanager: Callable[[], AbstractAsyncContextManager[AsyncSession]]
+) -> AsyncIterator[AsyncSession]:
+    deadline = getattr(request.state, "deadline", None)
+    timeout = limiter.queue_timeout if deadline is None else min(limiter.queue_timeout, deadline.remaining())
+    try:
+        async with limiter.admit(timeout):
+            async with session_contextmanager() as session:
+                database.attach_deadline(session, deadline)
+                yield session
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The service is overloaded, please retry later.",
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Provide a read session once the read limiter admits the request.
+
+    :param request: The incoming request, whose deadline bounds the wait and the session's statements.
+    :return: An async generator yielding an AsyncSession instance.
+    """
+    async with _admitted_session(request, read_limiter, database.get_db_contextmanager) as session:
+        yield session
+
+
+async def get_write_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Provide a write session once the write limiter admits the request.
+
+    On SQLite the writer queue is entered only after admission, so a rejected write never waits for it.
+
+    :param request: The incoming request, whose deadline bounds the wait and the session's statements.
+    :return: An async generator yielding an AsyncSession instance.
+    """
+    async with _admitted_session(request, write_limiter, database.get_write_db_contextmanager) as session:
+        yield session
+
+
+def read_session(request: Request) -> AbstractAsyncContextManager[AsyncSession]:
+    """
+    Open a short read session under the same admission control as `get_db`.
+
+    :param request: The incoming request, whose deadline bounds the wait and the session's statements.
+    :return: An async context manager yielding an AsyncSession instance.
+    """
+    return _admitted_session(request, read_limiter, database.get_db_contextmanager)
+
+
+def _check_api_key(api_key: str | None, keys: list[str]) -> None:
+    valid = api_key is not None and any(secrets.compare_digest(api_key.encode(), key.encode()) for key in keys)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="A valid X-API-Key header is required.",
+        )
+
+
+def require_api_key(api_key: str | None = Depends(api_key_header)) -> None:
+    """
+    Reject the request unless its `X-API-Key` header holds one of the `INGEST_API_KEYS`.
+
+    :param api_key: The value of the header, if sent.
+    :return: None
+    :raises HTTPException: 401 if the key is missing or unknown.
+    """
+    _check_api_key(api_key, get_settings().INGEST_API_KEYS)
+
+
+def require_admin_api_key(api_key: str | None = Depends(api_key_header)) -> None:
+    """
+    Reject the request unless its `X-API-Key` header holds one of the `ADMIN_API_KEYS`.
+
+    :param api_key: The value of the header, if sent.
+    :return: None
+    :raises HTTPException: 401 if the key is missing or unknown.
+    """
+    _check_api_key(api_key, get_settings().ADMIN_API_KEYS)
@@ -0,0 +1,50 @@
+"""
+Columnar downloads of the catalogue for analysts.
+
+`GET /exports/{table}/?format=parquet|arrow` returns `movies` or one of the exploded association
+tables as a file that pandas reads directly (`pd.read_parquet`, `pd.read_feather`). The files are
+cached on disk by catalogue version (see `services.exports`); the version is also the ETag, so a
+client that already holds the current file gets 304 Not Modified.
+"""
+from typing import Literal
+
+from fastapi import APIRouter, Query, Request, Response, status
+from fastapi.responses import FileResponse
+
+from database.changes import get_catalogue_version
+from database.export import EXPORT_FORMATS, EXPORT_TABLES
+from routes.dependencies import read_session
+from services import export_cache
+
+router = APIRouter()
+
+ExportTableName = Literal[tuple(EXPORT_TABLES)]
+ExportFormat = Literal[tuple(EXPORT_FORMATS)]
+
+
+@router.get(
+    "/exports/{table}/",
+    response_class=FileResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {media_type: {} for media_type in EXPORT_FORMATS.values()}},
+        status.HTTP_304_NOT_MODIFIED: {"description": "The client's copy is current."},
+    },
+)
+async def export_table(
+        request: Request,
+        table: ExportTableName,
+        export_format: ExportFormat = Query("parquet", alias="format")
+) -> Response:
+    async with read_session(request) as db:
+        version = await get_catalogue_version(db)
+    etag = f'"{version}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    path, version = await export_cache.get(table, export_format, version)
+    return FileResponse(
+        path,
+        media_type=EXPORT_FORMATS[export_format],
+        filename=f"{table}.{export_format}",
+        headers={"ETag": f'"{version}"', "Cache-Control": "no-cache"},
+    )
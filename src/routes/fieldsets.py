@@ -0,0 +1,121 @@
+"""
+Sparse fieldsets and relation includes for the movie list and detail routes.
+
+`fields=name,score` limits the scalar columns of a movie (the ID is always returned) and
+`include=genres,actors` adds related entities. Both shape the SQL as well as the response: only the
+requested columns are selected, so a client that does not ask for `overview` never reads that text,
+and the requested relations are loaded for the whole page with one query for the associations and
+one for the countries, however many movies the page holds.
+"""
+from typing import Iterable, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import MovieModel
+from database.associations import MOVIE_ASSOCIATIONS, load_movie_associations
+from database.models import CountryModel
+from schemas import MovieFieldsetSchema, MovieListItemSchema
+from schemas.movies import CountrySchema
+
+MOVIE_FIELDS = ("id", "name", "date", "score", "overview", "status", "budget", "revenue")
+MOVIE_RELATIONS = ("country",) + tuple(MOVIE_ASSOCIATIONS)
+LIST_DEFAULT_FIELDS = tuple(MovieListItemSchema.model_fields)
+
+
+def parse_names(
+        value: Optional[str],
+        allowed: Tuple[str, ...],
+        default: Tuple[str, ...],
+        parameter: str
+) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated query parameter such as `fields=` or `include=`.
+
+    :param value: The raw parameter, or None if it was not sent.
+    :param allowed: The accepted names, in response order.
+    :param default: The names to use when the parameter is missing or empty.
+    :param parameter: The parameter name, for the error message.
+    :return: The requested names in the order of `allowed`.
+    :raises HTTPException: 400 if a name is not in `allowed`.
+    """
+    if not value or not value.strip():
+        return default
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names.difference(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {parameter}: {', '.join(unknown)}."
+        )
+    return tuple(name for name in allowed if name in names)
+
+
+def fieldset_query(fields: Iterable[str], include: Iterable[str]) -> str:
+    """
+    Build the query string that carries a fieldset over to the pagination links.
+
+    :param fields: The requested scalar fields, or nothing if the default fieldset is used.
+    :param include: The requested relations.
+    :return: The `fields` and `include` parameters, each starting with `&`.
+    """
+    query = ""
+    if fields:
+        query += f"&fields={','.join(fields)}"
+    if include:
+        query += f"&include={','.join(include)}"
+    return query
+
+
+def select_movie_fieldset(fields: Iterable[str], include: Iterable[str]) -> Select:
+    """
+    Select only the movie columns the response needs.
+
+    :param fields: Scalar fields from `MOVIE_FIELDS`.
+    :param include: Relations from `MOVIE_RELATIONS`.
+    :return: A SELECT of the ID, the requested columns and, for `country`, the country ID.
+    """
+    columns = [MovieModel.id] + [getattr(MovieModel, field) for field in fields if field != "id"]
+    if "country" in include:
+        columns.append(MovieModel.country_id)
+    return select(*columns)
+
+
+async def load_movie_fieldsets(
+        db: AsyncSession,
+        stmt: Select,
+        fields: Tuple[str, ...],
+        include: Tuple[str, ...]
+) -> list[MovieFieldsetSchema]:
+    """
+    Run a statement built on `select_movie_fieldset` and attach the included relations in batch.
+
+    :param db: The async database session.
+    :param stmt: The movie query, already filtered, ordered and paginated.
+    :param fields: The requested scalar fields.
+    :param include: The requested relations.
+    :return: The movies, with only the requested fields and relations set.
+    """
+    rows = (await db.execute(stmt)).mappings().all()
+    movie_ids = [row["id"] for row in rows]
+    associations = [relation for relation in include if relation in MOVIE_ASSOCIATIONS]
+    linked = await load_movie_associations(db, movie_ids, associations)
+
+    countries = {}
+    if "country" in include and rows:
+        result = await db.execute(
+            select(CountryModel).where(CountryModel.id.in_({row["country_id"] for row in rows}))
+        )
+        countries = {country.id: CountrySchema.model_validate(country) for country in result.scalars()}
+
+    movies = []
+    for row in rows:
+        values = {field: row[field] for field in fields}
+        values["id"] = row["id"]
+        if "country" in include:
+            values["country"] = countries[row["country_id"]]
+        for association in associations:
+            values[association] = linked[association].get(row["id"], [])
+        movies.append(MovieFieldsetSchema(**values))
+    return movies
@@ -1,13 +1,523 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
-from sqlalchemy.exc import IntegrityError
+import asyncio
+import json
+import math
+from functools import partial
+from typing import AsyncIterator, List, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
+from starlette.applications import Starlette
+
+from config import get_settings
+from database import Deadline, MovieModel, get_db_contextmanager
+from database.associations import (
+    MOVIE_ASSOCIATIONS,
+    get_movie_association_ids,
+    resolve_ids,
+    set_movie_associations
+)
+from database.changes import get_movie_changes, record_movie_change
+from database.interning import reference_cache
+from database.models import CountryModel, MovieChangeModel
+from database.stats import (
+    MovieStatsEntry,
+    apply_movie_stats,
+    delete_movie_returning_stats_entry,
+    get_movie_stats_entry,
+    replace_movie_stats
+)
+from routes.dependencies import get_db, get_write_db, read_session
+from routes.fieldsets import (
+    LIST_DEFAULT_FIELDS,
+    MOVIE_FIELDS,
+    MOVIE_RELATIONS,
+    fieldset_query,
+    load_movie_fieldsets,
+    parse_names,
+    select_movie_fieldset
+)
+from routes.negotiation import (
+    JSON_MEDIA_TYPE,
+    NegotiatedRoute,
+    negotiate_media_type,
+    negotiated_response,
+    render
+)
+from schemas import (
+    MovieChangeSchema,
+    MovieChangesResponseSchema,
+    MovieDetailSchema,
+    MovieFieldsetListResponseSchema,
+    MovieFieldsetSchema,
+    MovieListItemSchema,
+    MovieCreateSchema,
+    MovieUpdateSchema,
+    RelatedMovieSchema,
+    RelatedMoviesResponseSchema
+)
+from services import (
+    actor_autocomplete,
+    actor_graph,
+    catalogue_replica,
+    change_feed,
+    hot_movies,
+    movie_count_flight,
+    movie_detail_flight,
+    related_movies_index,
+    response_cache
+)
+from services.single_flight import path_flight_key, request_flight_key
+
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+MOVIE_LIST_TAG = "movies"
+
+
+def movie_tag(movie_id: int) -> str:
+    return f"movie:{movie_id}"
+
+
+async def _get_movie_detail(db: AsyncSession, movie_id: int) -> MovieModel | None:
+    """
+    Load a movie together with its country, genres, actors and languages.
+
+    :param db: The async database session.
+    :param movie_id: The ID of the movie to load.
+    :return: The movie instance, or None if it does not exist.
+    """
+    stmt = (
+        select(MovieModel)
+        .options(
+            joinedload(MovieModel.country),
+            joinedload(MovieModel.genres),
+            joinedload(MovieModel.actors),
+            joinedload(MovieModel.languages),
+        )
+        .where(MovieModel.id == movie_id)
+    )
+    result = await db.execute(stmt)
+    return result.unique().scalars().first()
+
+
+FIELDS_DESCRIPTION = f"Comma-separated movie fields to return, out of: {', '.join(MOVIE_FIELDS)}."
+INCLUDE_DESCRIPTION = f"Comma-separated relations to embed, out of: {', '.join(MOVIE_RELATIONS)}."
+
+
+@router.get("/movies/", response_model=MovieFieldsetListResponseSchema, response_model_exclude_unset=True)
+async def get_movie_list(
+        request: Request,
+        page: int = Query(1, ge=1),
+        per_page: int = Query(10, ge=1, le=20),
+        fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+        include: str | None = Query(None, description=INCLUDE_DESCRIPTION),
+        db: AsyncSession = Depends(get_db),
+) -> Response:
+    selected_fields = parse_names(fields, MOVIE_FIELDS, LIST_DEFAULT_FIELDS, "fields")
+    included = parse_names(include, MOVIE_RELATIONS, (), "include")
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    cache_key = (request_flight_key(request), media_type)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response(request)
+    cache_token = response_cache.token((MOVIE_LIST_TAG,))
+
+    async def count_movies() -> int:
+        return (await db.execute(select(func.count(MovieModel.id)))).scalar_one()
+
+    total_items = await movie_count_flight.run("movies", count_movies)
+
+    stmt = (
+        select_movie_fieldset(selected_fields, included)
+        .order_by(*MovieModel.default_order_by())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+    )
+    movies = await load_movie_fieldsets(db, stmt, selected_fields, included)
+
+    if not movies:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No movies found.")
+
+    total_pages = math.ceil(total_items / per_page)
+    link_query = fieldset_query(fields and selected_fields, included)
+    payload = MovieFieldsetListResponseSchema(
+        movies=movies,
+        prev_page=f"/theater/movies/?page={page - 1}&per_page={per_page}{link_query}" if page > 1 else None,
+        next_page=(
+            f"/theater/movies/?page={page + 1}&per_page={per_page}{link_query}" if page < total_pages else None
+        ),
+        total_pages=total_pages,
+        total_items=total_items,
+    )
+    body = render(payload, media_type, exclude_unset=True)
+    return response_cache.set(cache_key, body, (MOVIE_LIST_TAG,), cache_token, media_type).to_response(request)
+
+
+@router.post("/movies/", response_model=MovieDetailSchema, status_code=status.HTTP_201_CREATED)
+async def create_movie(
+        movie_data: MovieCreateSchema,
+        request: Request,
+        db: AsyncSession = Depends(get_write_db),
+) -> Response:
+    existing = await db.execute(
+        select(MovieModel.id).where(
+            MovieModel.name == movie_data.name,
+            MovieModel.date == movie_data.date,
+        )
+    )
+    if existing.scalar_one_or_none() is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                f"A movie with the name '{movie_data.name}' and release date "
+                f"'{movie_data.date}' already exists."
+            ),
+        )
+
+    for attempt in range(2):
+        try:
+            country_ids = await resolve_ids(db, CountryModel, "code", [movie_data.country])
+            movie = MovieModel(
+                name=movie_data.name,
+                date=movie_data.date,
+                score=movie_data.score,
+                overview=movie_data.overview,
+                status=movie_data.status,
+                budget=movie_data.budget,
+                revenue=movie_data.revenue,
+                country_id=country_ids[movie_data.country],
+            )
+            db.add(movie)
+            await db.flush()
+
+            linked = await set_movie_associations(
+                db,
+                movie.id,
+                {"genres": movie_data.genres, "actors": movie_data.actors, "languages": movie_data.languages},
+            )
+            await apply_movie_stats(
+                db,
+                MovieStatsEntry.build(
+                    genres=movie_data.genres,
+                    country=movie_data.country,
+                    languages=movie_data.languages,
+                    status=movie_data.status,
+                    date=movie_data.date,
+                    score=movie_data.score,
+                    revenue=movie_data.revenue,
+                ),
+                1,
+            )
+            sequence = await record_movie_change(db, movie.id, "created")
+            await db.commit()
+            break
+        except IntegrityError:
+            await db.rollback()
+            if attempt == 0 and reference_cache.evicted_by_rollback(db):
+                continue
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid input data.")
+
+    change_feed.publish(sequence)
+    related_movies_index.upsert_movie(
+        movie.id,
+        actor_ids=linked["actors"],
+        genre_ids=linked["genres"],
+        language_ids=linked["languages"],
+    )
+    actor_graph.set_movie_cast(movie.id, linked["actors"])
+    actor_autocomplete.add_actors(zip(linked["actors"], movie_data.actors))
+    catalogue_replica.upsert_movie(movie, linked, {
+        "genres": zip(linked["genres"], movie_data.genres),
+        "languages": zip(linked["languages"], movie_data.languages),
+    })
+    response_cache.invalidate(MOVIE_LIST_TAG)
+    return negotiated_response(
+        request,
+        MovieDetailSchema.model_validate(await _get_movie_detail(db, movie.id)),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.get("/movies/changes/", response_model=MovieChangesResponseSchema)
+async def get_movie_changes_feed(
+        request: Request,
+        after: int = Query(0, ge=0, description="Return changes with a greater sequence number."),
+        limit: int = Query(100, ge=1, le=1000),
+        wait: float = Query(0, ge=0, description="Long-poll: seconds to wait when there is no newer change yet."),
+) -> Response:
+    """
+    Read the movie change feed from a sequence number.
+
+    With `Accept: text/event-stream` the changes are streamed as server-sent events, resuming from the
+    `Last-Event-ID` header if present; a read that is not admitted or exceeds its deadline ends the
+    stream with an `error` event. Otherwise one batch is returned as JSON; if there is none yet,
+    the request waits up to `wait` seconds (bounded by its deadline) for the next change.
+    """
+    settings = get_settings()
+    if "text/event-stream" in request.headers.get("accept", ""):
+        last_event_id = request.headers.get("last-event-id", "")
+        cursor = int(last_event_id) if last_event_id.isdigit() else after
+        return StreamingResponse(
+            _stream_movie_changes(request, cursor, limit),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async with read_session(request) as db:
+        changes = await get_movie_changes(db, after, limit)
+    deadline = getattr(request.state, "deadline", None)
+    wait = min(wait, settings.CHANGE_FEED_MAX_WAIT_SECONDS)
+    if deadline is not None:
+        wait = min(wait, deadline.remaining() / 2)
+    if not changes and wait > 0 and await change_feed.wait(after, wait):
+        async with read_session(request) as db:
+            changes = await get_movie_changes(db, after, limit)
+
+    return negotiated_response(request, MovieChangesResponseSchema(
+        changes=[MovieChangeSchema.model_validate(change) for change in changes],
+        last_sequence=changes[-1].sequence if changes else after,
+    ))
+
+
+async def _read_movie_changes(request: Request, cursor: int, limit: int) -> List[MovieChangeModel]:
+    async with read_session(request) as db:
+        return await get_movie_changes(db, cursor, limit)
+
+
+def _stream_error(detail: str, retry_after: str | None = None) -> str:
+    retry = f"retry: {int(retry_after) * 1000}\n" if retry_after and retry_after.isdigit() else ""
+    return f"{retry}event: error\ndata: {json.dumps({'detail': detail})}\n\n"
+
+
+async def _stream_movie_changes(request: Request, cursor: int, limit: int) -> AsyncIterator[str]:
+    settings = get_settings()
+    while True:
+        # The stream outlives any request deadline, so every read gets a fresh one.
+        deadline = request.state.deadline = Deadline(settings.REQUEST_TIMEOUT_SECONDS)
+        # The read runs in its own task, so a disconnect cannot interrupt it halfway through closing its session.
+        read = asyncio.ensure_future(_read_movie_changes(request, cursor, limit))
+        try:
+            changes = await asyncio.shield(read)
+        except asyncio.CancelledError:
+            # The client left: abort the statement and wait until the session is closed, so that no
+            # aiosqlite thread is still running when the stream (and possibly the event loop) ends.
+            deadline.cancel()
+            read.cancel()
+            while not read.done():
+                try:
+                    await asyncio.wait([read])
+                except asyncio.CancelledError:
+                    pass
+            raise
+        except HTTPException as exc:
+            yield _stream_error(exc.detail, (exc.headers or {}).get("Retry-After"))
+            return
+        except OperationalError:
+            if not deadline.expired:
+                raise
+            yield _stream_error("The read exceeded its deadline.")
+            return
+        for change in changes:
+            payload = MovieChangeSchema.model_validate(change).model_dump_json()
+            yield f"id: {change.sequence}\nevent: {change.operation}\ndata: {payload}\n\n"
+        if changes:
+            cursor = changes[-1].sequence
+            if len(changes) == limit:
+                continue
+        if not await change_feed.wait(cursor, settings.CHANGE_FEED_HEARTBEAT_SECONDS):
+            yield ": keep-alive\n\n"
+
+
+@router.get("/movies/{movie_id}/", response_model=MovieFieldsetSchema, response_model_exclude_unset=True)
+async def get_movie_by_id(
+        movie_id: int,
+        request: Request,
+        fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+        include: str | None = Query(None, description=INCLUDE_DESCRIPTION),
+        db: AsyncSession = Depends(get_db),
+) -> Response:
+    selected_fields = parse_names(fields, MOVIE_FIELDS, MOVIE_FIELDS, "fields")
+    included = parse_names(include, MOVIE_RELATIONS, MOVIE_RELATIONS, "include")
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    cache_key = (request_flight_key(request), media_type)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        hot_movies.record(movie_id)
+        return cached.to_response(request)
+    tags = (movie_tag(movie_id),)
+    cache_token = response_cache.token(tags)
+
+    async def load_movie_detail() -> bytes:
+        stmt = select_movie_fieldset(selected_fields, included).where(MovieModel.id == movie_id)
+        movies = await load_movie_fieldsets(db, stmt, selected_fields, included)
+        if not movies:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Movie with the given ID was not found."
+            )
+        return render(movies[0], media_type, exclude_unset=True)
+
+    body = await movie_detail_flight.run(cache_key, load_movie_detail)
+    hot_movies.record(movie_id)
+    return response_cache.set(cache_key, body, tags, cache_token, media_type).to_response(request)
+
+
+async def warm_movie_details(app: Starlette, movie_ids: Sequence[int]) -> int:
+    """
+    Cache the default JSON detail response of movies, so that their next reads skip the database.
+
+    The movies that are already cached are skipped; the others are loaded with one query. The
+    entries are stored under the key a plain `GET /movies/{movie_id}/` looks up, for
+    `HOT_MOVIES_WARM_TTL_SECONDS`.
+
+    :param app: The application, to build the detail URLs.
+    :param movie_ids: The movies to warm, e.g. `hot_movies.top(...)`.
+    :return: The number of responses cached.
+    """
+    fields = parse_names(None, MOVIE_FIELDS, MOVIE_FIELDS, "fields")
+    included = parse_names(None, MOVIE_RELATIONS, MOVIE_RELATIONS, "include")
+    cold = {}
+    for movie_id in movie_ids:
+        cache_key = (path_flight_key(app.url_path_for("get_movie_by_id", movie_id=movie_id)), JSON_MEDIA_TYPE)
+        if response_cache.peek(cache_key) is None:
+            tags = (movie_tag(movie_id),)
+            cold[movie_id] = (cache_key, tags, response_cache.token(tags))
+    if not cold:
+        return 0
+
+    async with get_db_contextmanager() as db:
+        stmt = select_movie_fieldset(fields, included).where(MovieModel.id.in_(cold))
+        movies = await load_movie_fieldsets(db, stmt, fields, included)
+    for movie in movies:
+        cache_key, tags, cache_token = cold[movie.id]
+        response_cache.set(
+            cache_key,
+            render(movie, JSON_MEDIA_TYPE, exclude_unset=True),
+            tags,
+            cache_token,
+            ttl=get_settings().HOT_MOVIES_WARM_TTL_SECONDS,
+        )
+    return len(movies)
+
+
+@router.get("/movies/{movie_id}/related/", response_model=RelatedMoviesResponseSchema)
+async def get_related_movies(
+        movie_id: int,
+        request: Request,
+        limit: int = Query(10, ge=1, le=50),
+        db: AsyncSession = Depends(get_db),
+) -> Response:
+    await related_movies_index.ensure_loaded(db)
+    related = related_movies_index.related(movie_id, limit)
+    if related is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Movie with the given ID was not found."
+        )
+
+    similarities = dict(related)
+    movies = {}
+    if similarities:
+        result = await db.execute(select(MovieModel).where(MovieModel.id.in_(similarities)))
+        movies = {movie.id: movie for movie in result.scalars()}
+
+    return negotiated_response(request, RelatedMoviesResponseSchema(
+        movie_id=movie_id,
+        related=[
+            RelatedMovieSchema(
+                **MovieListItemSchema.model_validate(movies[related_id]).model_dump(),
+                similarity=similarity,
+            )
+            for related_id, similarity in related
+            if related_id in movies
+        ],
+    ))
+
+
+@router.delete("/movies/{movie_id}/", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_movie(
+        movie_id: int,
+        db: AsyncSession = Depends(get_write_db),
+) -> None:
+    stats_entry = await delete_movie_returning_stats_entry(db, movie_id)
+    if stats_entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Movie with the given ID was not found."
+        )
+    await apply_movie_stats(db, stats_entry, -1)
+    sequence = await record_movie_change(db, movie_id, "deleted")
+    await db.commit()
+    change_feed.publish(sequence)
+    related_movies_index.remove_movie(movie_id)
+    actor_graph.remove_movie(movie_id)
+    catalogue_replica.remove_movie(movie_id)
+    response_cache.invalidate(movie_tag(movie_id), MOVIE_LIST_TAG)
+
+
+@router.patch("/movies/{movie_id}/")
+async def update_movie(
+        movie_id: int,
+        movie_data: MovieUpdateSchema,
+        request: Request,
+        db: AsyncSession = Depends(get_write_db),
+) -> dict[str, str]:
+    movie = await db.get(MovieModel, movie_id)
+    if movie is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Movie with the given ID was not found."
+        )
+
+    changes = movie_data.model_dump(exclude_unset=True)
+    association_names = {
+        association: names
+        for association in MOVIE_ASSOCIATIONS
+        if (names := changes.pop(association, None)) is not None
+    }
 
-from database import get_db, MovieModel
-from database.models import CountryModel, GenreModel, ActorModel, LanguageModel
+    for attempt in range(2):
+        old_stats_entry = await get_movie_stats_entry(db, movie_id)
+        for field, value in changes.items():
+            setattr(movie, field, value)
 
+        try:
+            await db.flush()
+            if association_names:
+                assigned = await set_movie_associations(db, movie_id, association_names)
+                linked = await get_movie_association_ids(db, movie_id)
+            await replace_movie_stats(db, old_stats_entry, await get_movie_stats_entry(db, movie_id))
+            sequence = await record_movie_change(db, movie_id, "updated")
+            await db.commit()
+            break
+        except IntegrityError:
+            await db.rollback()
+            if attempt == 0 and reference_cache.evicted_by_rollback(db):
+                continue
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid input data.")
 
-router = APIRouter()
+    change_feed.publish(sequence)
+    response_cache.invalidate(movie_tag(movie_id), MOVIE_LIST_TAG)
+    if hot_movies.hottest([movie_id]):
+        hot_movies.schedule_warm(partial(warm_movie_details, request.app, [movie_id]))
+    if association_names:
+        related_movies_index.upsert_movie(
+            movie_id,
+            actor_ids=linked["actors"],
+            genre_ids=linked["genres"],
+            language_ids=linked["languages"],
+        )
+        actor_graph.set_movie_cast(movie_id, linked["actors"])
+        actor_autocomplete.add_actors(zip(assigned.get("actors", []), association_names.get("actors", [])))
+    if association_names:
+        catalogue_replica.upsert_movie(movie, linked, {
+            association: zip(assigned[association], names) for association, names in association_names.items()
+        })
+    else:
+        catalogue_replica.upsert_movie(movie)
 
-# Write your code here
+    return {"detail": "Movie updated successfully."}
@@ -0,0 +1,123 @@
+"""
+MessagePack content negotiation for the movie routes.
+
+Responses: `negotiate_media_type` picks `application/msgpack` when the `Accept` header prefers it
+over JSON, and `render` serializes a response schema accordingly. Both formats are produced from
+`model_dump(mode="json")`, so they carry exactly the same values (dates as ISO strings, enums as
+their values) and `schemas/movies.py` stays the single definition of the payload.
+
+Requests: routes of a router built with `route_class=NegotiatedRoute` also accept bodies sent as
+`Content-Type: application/msgpack`. The body is decoded before FastAPI sees it and handed over as
+if it had been JSON, so the usual schema validation and 422 errors apply unchanged.
+"""
+from typing import Callable, Coroutine, Optional
+
+import msgpack
+from fastapi import HTTPException, status
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _accepted_weights(accept: str) -> dict[str, float]:
+    weights = {}
+    for item in accept.split(","):
+        media_type, _, parameters = item.strip().partition(";")
+        weight = 1.0
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.strip().partition("=")
+            if name == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[media_type.strip().lower()] = weight
+    return weights
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Choose between JSON and MessagePack for a response. JSON wins ties and is the default.
+
+    :param accept: The request's `Accept` header, or None.
+    :return: `JSON_MEDIA_TYPE` or `MSGPACK_MEDIA_TYPE`.
+    """
+    if not accept or "msgpack" not in accept:
+        return JSON_MEDIA_TYPE
+    weights = _accepted_weights(accept)
+    msgpack_weight = max(weights.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_weight = max(weights.get(JSON_MEDIA_TYPE, 0.0), weights.get("application/*", 0.0), weights.get("*/*", 0.0))
+    return MSGPACK_MEDIA_TYPE if msgpack_weight > json_weight else JSON_MEDIA_TYPE
+
+
+def render(payload: BaseModel, media_type: str, exclude_unset: bool = False) -> bytes:
+    """
+    Serialize a response schema in the negotiated format.
+
+    :param payload: The response schema instance.
+    :param media_type: The result of `negotiate_media_type`.
+    :param exclude_unset: Leave out fields that were not set, e.g. those outside a sparse fieldset.
+    :return: The encoded body.
+    """
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(payload.model_dump(mode="json", exclude_unset=exclude_unset))
+    return payload.model_dump_json(exclude_unset=exclude_unset).encode()
+
+
+def negotiated_response(request: Request, payload: BaseModel, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Build a response in the format the client asked for.
+
+    :param request: The incoming request.
+    :param payload: The response schema instance.
+    :param status_code: The HTTP status of the response.
+    :return: A JSON or MessagePack response.
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    return Response(
+        content=render(payload, media_type),
+        status_code=status_code,
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
+
+
+async def _as_json_request(request: Request) -> Request:
+    body = await request.body()
+    try:
+        data = msgpack.unpackb(body) if body else None
+    except (ValueError, msgpack.UnpackException):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid MessagePack body.")
+
+    scope = dict(request.scope)
+    scope["headers"] = [
+        (name, JSON_MEDIA_TYPE.encode() if name == b"content-type" else value)
+        for name, value in request.scope["headers"]
+    ]
+    decoded = Request(scope, request.receive)
+    # Starlette caches the raw and parsed body on these attributes; FastAPI reads them back.
+    decoded._body = body
+    decoded._json = data
+    return decoded
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    An APIRoute that also accepts MessagePack request bodies.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+            if content_type in MSGPACK_MEDIA_TYPES:
+                request = await _as_json_request(request)
+            return await handler(request)
+
+        return negotiated_handler
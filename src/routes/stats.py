@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import MovieStatsModel
+from database.stats import STATS_DIMENSIONS
+from routes.dependencies import get_db
+from schemas import CatalogueStatsSchema, StatsBucketSchema
+
+
+router = APIRouter()
+
+
+@router.get("/stats/", response_model=CatalogueStatsSchema)
+async def get_catalogue_stats(db: AsyncSession = Depends(get_db)) -> CatalogueStatsSchema:
+    stmt = select(MovieStatsModel).order_by(
+        MovieStatsModel.dimension,
+        MovieStatsModel.movie_count.desc(),
+        MovieStatsModel.key,
+    )
+    buckets: dict[str, list[StatsBucketSchema]] = {dimension: [] for dimension in STATS_DIMENSIONS}
+    for row in (await db.execute(stmt)).scalars():
+        buckets.setdefault(row.dimension, []).append(
+            StatsBucketSchema(
+                key=row.key,
+                movie_count=row.movie_count,
+                average_score=row.score_sum / row.movie_count,
+                total_revenue=row.revenue_sum,
+            )
+        )
+    return CatalogueStatsSchema(**buckets)
@@ -0,0 +1,209 @@
+"""
+Catalogue uploads from partners.
+
+`POST /movies/uploads/` takes a CSV in the format of `database/seed_data/imdb_movies.csv` as the
+`file` field of a multipart form and answers 202 Accepted with an ingestion job, which
+`GET /movies/uploads/{job_id}/` reports on (see `services.ingest`). Movies are matched by name and
+date, so uploading a file again updates the movies instead of duplicating them.
+
+The API key is checked before the body is read. The body is then parsed as it arrives, with
+python-multipart's streaming parser, and the `file` part is written straight to the file the job
+reads, so the upload is neither held in memory nor copied twice. Reading stops with 413 as soon as
+the body passes `INGEST_MAX_UPLOAD_BYTES`, whether or not the client declared a Content-Length.
+
+Each committed chunk is announced on the change feed; `services.index_sync` then applies it to the
+in-process indexes.
+"""
+import os
+import tempfile
+from functools import partial
+from typing import Callable, List, Optional, Tuple, TYPE_CHECKING
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+from routes.dependencies import require_api_key
+from routes.movies import MOVIE_LIST_TAG, movie_tag, warm_movie_details
+from schemas import IngestJobSchema
+from services import change_feed, hot_movies, index_sync, ingest_jobs, response_cache
+
+if TYPE_CHECKING:
+    from database.populate import ChunkResult
+
+router = APIRouter(dependencies=[Depends(require_api_key)])
+
+UPLOAD_FIELD = "file"
+
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {UPLOAD_FIELD: {"type": "string", "format": "binary"}},
+                "required": [UPLOAD_FIELD],
+            }
+        }
+    },
+}
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"The upload exceeds {max_bytes} bytes.",
+    )
+
+
+def _not_an_upload() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Send the CSV as the '{UPLOAD_FIELD}' field of a multipart form.",
+    )
+
+
+class _UploadReceiver:
+    """
+    Parser callbacks that pick the data of the first `file` part out of a multipart body.
+    """
+
+    def __init__(self) -> None:
+        self.filename: Optional[str] = None
+        self.found = False
+        self.complete = False
+        self.pending: List[bytes] = []
+        self._in_file = False
+        self._header_field = self._header_value = self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_end": self._on_end,
+        }
+
+    def take_pending(self) -> bytes:
+        data, self.pending = b"".join(self.pending), []
+        return data
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._in_file = not self.found and options.get(b"name") == UPLOAD_FIELD.encode()
+        if self._in_file:
+            self.found = True
+            self.filename = options.get(b"filename", b"").decode("utf-8", errors="replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        self._in_file = False
+
+    def _on_end(self) -> None:
+        self.complete = True
+
+
+async def _receive_upload(request: Request, max_bytes: int) -> Tuple[str, str]:
+    """
+    Stream the `file` part of a multipart request body to a temporary file that outlives the request.
+
+    :param request: The upload request.
+    :param max_bytes: The largest accepted body.
+    :return: The uploaded file's name and the path of the copy.
+    :raises HTTPException: 413 once the body is larger than `max_bytes`, 400 if it is not a
+        complete multipart form with a `file` part.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type.lower() != b"multipart/form-data" or not boundary:
+        raise _not_an_upload()
+
+    receiver = _UploadReceiver()
+    parser = MultipartParser(boundary, receiver.callbacks())
+    descriptor, path = tempfile.mkstemp(prefix="movies-upload-", suffix=".csv")
+    size = 0
+    try:
+        with os.fdopen(descriptor, "wb") as target:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                try:
+                    parser.write(chunk)
+                except MultipartParseError:
+                    raise _not_an_upload()
+                if receiver.pending:
+                    await run_in_threadpool(target.write, receiver.take_pending())
+            parser.finalize()
+        if not (receiver.found and receiver.complete):
+            raise _not_an_upload()
+    except BaseException:
+        os.remove(path)
+        raise
+    return receiver.filename or "upload.csv", path
+
+
+def _chunk_applier(app: Starlette) -> Callable[["ChunkResult"], None]:
+    def apply_chunk(chunk: "ChunkResult") -> None:
+        """
+        Bring the in-process state up to date with a committed chunk of an upload.
+        """
+        change_feed.publish(chunk.sequence)
+        response_cache.invalidate(MOVIE_LIST_TAG, *(movie_tag(movie_id) for movie_id in chunk.updated_ids))
+        index_sync.schedule()
+        hot_ids = hot_movies.hottest(chunk.updated_ids)
+        if hot_ids:
+            hot_movies.schedule_warm(partial(warm_movie_details, app, hot_ids))
+
+    return apply_chunk
+
+
+@router.post(
+    "/movies/uploads/",
+    response_model=IngestJobSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY},
+)
+async def upload_movies(request: Request, response: Response) -> IngestJobSchema:
+    max_bytes = get_settings().INGEST_MAX_UPLOAD_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise _too_large(max_bytes)
+
+    filename, path = await _receive_upload(request, max_bytes)
+    job = ingest_jobs.start(filename, path, _chunk_applier(request.app))
+    response.headers["Location"] = str(request.url_for("get_upload", job_id=job.id))
+    return IngestJobSchema.model_validate(job)
+
+
+@router.get("/movies/uploads/{job_id}/", response_model=IngestJobSchema)
+async def get_upload(job_id: str) -> IngestJobSchema:
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload job not found.")
+    return IngestJobSchema.model_validate(job)
@@ -1,5 +1,50 @@
 from schemas.movies import (
+    MovieChangeSchema,
+    MovieChangesResponseSchema,
     MovieDetailSchema,
+    MovieFieldsetListResponseSchema,
+    MovieFieldsetSchema,
     MovieListResponseSchema,
-    MovieListItemSchema
+    MovieListItemSchema,
+    MovieCreateSchema,
+    MovieUpdateSchema,
+    RelatedMovieSchema,
+    RelatedMoviesResponseSchema
+)
+from schemas.stats import (
+    CatalogueStatsSchema,
+    StatsBucketSchema
+)
+from schemas.actors import (
+    ActorAutocompleteSchema,
+    ActorMatchSchema,
+    ActorDegreeSchema,
+    ActorPathSchema,
+    ActorPathStepSchema,
+    CostarSchema,
+    CostarsResponseSchema
+)
+from schemas.admin import (
+    AdmissionStatsSchema,
+    ChangeFeedStatsSchema,
+    ExportCacheStatsSchema,
+    HotMovieSchema,
+    HotMoviesResponseSchema,
+    HotMoviesStatsSchema,
+    MetricsSchema,
+    ReferenceCacheStatsSchema,
+    ResponseCacheStatsSchema,
+    SingleFlightStatsSchema
+)
+from schemas.uploads import IngestJobSchema
+from schemas.analytics import (
+    MovieSummarySchema,
+    RankedMovieSchema,
+    TopMoviesResponseSchema
+)
+from schemas.catalogue import (
+    CountryEntitySchema,
+    EntityListResponseSchema,
+    EntityMoviesResponseSchema,
+    NamedEntitySchema
 )
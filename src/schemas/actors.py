@@ -0,0 +1,46 @@
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict
+
+
+class CostarSchema(BaseModel):
+    id: int
+    name: str
+    shared_movies: int
+
+
+class CostarsResponseSchema(BaseModel):
+    actor_id: int
+    costars: list[CostarSchema]
+
+
+class ActorDegreeSchema(BaseModel):
+    actor_id: int
+    movie_count: int
+    costar_count: int
+
+
+class ActorPathStepSchema(BaseModel):
+    id: int
+    name: str
+
+
+class ActorPathSchema(BaseModel):
+    source_id: int
+    target_id: int
+    distance: int
+    path: list[ActorPathStepSchema]
+
+
+class ActorMatchSchema(BaseModel):
+    id: int
+    name: str
+    movie_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ActorAutocompleteSchema(BaseModel):
+    query: str
+    source: Literal["index", "database"]
+    actors: list[ActorMatchSchema]
@@ -0,0 +1,69 @@
+from pydantic import BaseModel
+
+
+class SingleFlightStatsSchema(BaseModel):
+    calls: int
+    executions: int
+    coalesced: int
+    coalescing_ratio: float
+    in_flight: int
+
+
+class AdmissionStatsSchema(BaseModel):
+    limit: float
+    in_flight: int
+    queued: int
+    admitted: int
+    rejected: int
+    decreases: int
+    latency_ms: float
+
+
+class ResponseCacheStatsSchema(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+
+
+class ExportCacheStatsSchema(BaseModel):
+    hits: int
+    builds: int
+    building: int
+
+
+class ChangeFeedStatsSchema(BaseModel):
+    latest_sequence: int
+    subscribers: int
+
+
+class HotMoviesStatsSchema(BaseModel):
+    tracked: int
+    reads: int
+    warmed: int
+
+
+class HotMovieSchema(BaseModel):
+    movie_id: int
+    reads: int
+    overcount: int
+
+
+class HotMoviesResponseSchema(BaseModel):
+    total_reads: int
+    movies: list[HotMovieSchema]
+
+
+class ReferenceCacheStatsSchema(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+
+
+class MetricsSchema(BaseModel):
+    single_flight: dict[str, SingleFlightStatsSchema]
+    admission: dict[str, AdmissionStatsSchema]
+    response_cache: ResponseCacheStatsSchema
+    change_feed: ChangeFeedStatsSchema
+    exports: ExportCacheStatsSchema
+    hot_movies: HotMoviesStatsSchema
+    reference_cache: dict[str, ReferenceCacheStatsSchema]
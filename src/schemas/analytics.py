@@ -0,0 +1,29 @@
+import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class RankedMovieSchema(BaseModel):
+    id: int
+    name: str
+    date: datetime.date
+    score: float
+    budget: float
+    revenue: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TopMoviesResponseSchema(BaseModel):
+    source: Literal["replica", "database"]
+    movies: list[RankedMovieSchema]
+
+
+class MovieSummarySchema(BaseModel):
+    source: Literal["replica", "database"]
+    movie_count: int
+    average_score: Optional[float]
+    total_revenue: float
+    first_date: Optional[datetime.date]
+    last_date: Optional[datetime.date]
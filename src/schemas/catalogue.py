@@ -0,0 +1,30 @@
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from schemas.movies import MovieListItemSchema
+
+EntitySchemaT = TypeVar("EntitySchemaT", bound=BaseModel)
+
+
+class NamedEntitySchema(BaseModel):
+    id: int
+    name: str
+    movie_count: int
+
+
+class CountryEntitySchema(BaseModel):
+    id: int
+    code: str
+    name: Optional[str]
+    movie_count: int
+
+
+class EntityListResponseSchema(BaseModel, Generic[EntitySchemaT]):
+    items: list[EntitySchemaT]
+    next_cursor: Optional[int]
+
+
+class EntityMoviesResponseSchema(BaseModel):
+    movies: list[MovieListItemSchema]
+    next_cursor: Optional[int]
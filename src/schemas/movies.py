@@ -1 +1,168 @@
-# Write your code here
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from database.models import MovieStatusEnum
+
+
+class CountrySchema(BaseModel):
+    id: int
+    code: str
+    name: Optional[str]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class GenreSchema(BaseModel):
+    id: int
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ActorSchema(BaseModel):
+    id: int
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LanguageSchema(BaseModel):
+    id: int
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MovieListItemSchema(BaseModel):
+    id: int
+    name: str
+    date: datetime.date
+    score: float
+    overview: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MovieListResponseSchema(BaseModel):
+    movies: list[MovieListItemSchema]
+    prev_page: Optional[str]
+    next_page: Optional[str]
+    total_pages: int
+    total_items: int
+
+
+class MovieDetailSchema(BaseModel):
+    id: int
+    name: str
+    date: datetime.date
+    score: float
+    overview: str
+    status: MovieStatusEnum
+    budget: float
+    revenue: float
+    country: CountrySchema
+    genres: list[GenreSchema]
+    actors: list[ActorSchema]
+    languages: list[LanguageSchema]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MovieFieldsetSchema(BaseModel):
+    id: int
+    name: Optional[str] = None
+    date: Optional[datetime.date] = None
+    score: Optional[float] = None
+    overview: Optional[str] = None
+    status: Optional[MovieStatusEnum] = None
+    budget: Optional[float] = None
+    revenue: Optional[float] = None
+    country: Optional[CountrySchema] = None
+    genres: Optional[list[GenreSchema]] = None
+    actors: Optional[list[ActorSchema]] = None
+    languages: Optional[list[LanguageSchema]] = None
+
+
+class MovieFieldsetListResponseSchema(BaseModel):
+    movies: list[MovieFieldsetSchema]
+    prev_page: Optional[str]
+    next_page: Optional[str]
+    total_pages: int
+    total_items: int
+
+
+class MovieChangeSchema(BaseModel):
+    sequence: int
+    movie_id: int
+    operation: str
+    changed_at: datetime.datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MovieChangesResponseSchema(BaseModel):
+    changes: list[MovieChangeSchema]
+    last_sequence: int
+
+
+class RelatedMovieSchema(MovieListItemSchema):
+    similarity: float
+
+
+class RelatedMoviesResponseSchema(BaseModel):
+    movie_id: int
+    related: list[RelatedMovieSchema]
+
+
+class MovieCreateSchema(BaseModel):
+    name: str = Field(..., max_length=255)
+    date: datetime.date
+    score: float = Field(..., ge=0, le=100)
+    overview: str
+    status: MovieStatusEnum
+    budget: float = Field(..., ge=0)
+    revenue: float = Field(..., ge=0)
+    country: str = Field(..., max_length=3)
+    genres: list[str]
+    actors: list[str]
+    languages: list[str]
+
+    @field_validator("date")
+    @classmethod
+    def validate_date(cls, value: datetime.date) -> datetime.date:
+        max_date = datetime.date.today() + datetime.timedelta(days=365)
+        if value > max_date:
+            raise ValueError("The date must not be more than one year in the future.")
+        return value
+
+    @field_validator("country")
+    @classmethod
+    def normalize_country(cls, value: str) -> str:
+        return value.upper()
+
+    @field_validator("genres", "actors", "languages")
+    @classmethod
+    def normalize_names(cls, values: list[str]) -> list[str]:
+        return list(dict.fromkeys(value.strip() for value in values if value.strip()))
+
+
+class MovieUpdateSchema(BaseModel):
+    name: Optional[str] = Field(None, max_length=255)
+    date: Optional[datetime.date] = None
+    score: Optional[float] = Field(None, ge=0, le=100)
+    overview: Optional[str] = None
+    status: Optional[MovieStatusEnum] = None
+    budget: Optional[float] = Field(None, ge=0)
+    revenue: Optional[float] = Field(None, ge=0)
+    genres: Optional[list[str]] = None
+    actors: Optional[list[str]] = None
+    languages: Optional[list[str]] = None
+
+    @field_validator("genres", "actors", "languages")
+    @classmethod
+    def normalize_names(cls, values: Optional[list[str]]) -> Optional[list[str]]:
+        if values is None:
+            return None
+        return MovieCreateSchema.normalize_names(values)
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class StatsBucketSchema(BaseModel):
+    key: str
+    movie_count: int
+    average_score: float
+    total_revenue: float
+
+
+class CatalogueStatsSchema(BaseModel):
+    genre: list[StatsBucketSchema]
+    country: list[StatsBucketSchema]
+    language: list[StatsBucketSchema]
+    status: list[StatsBucketSchema]
+    year: list[StatsBucketSchema]
@@ -0,0 +1,21 @@
+import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class IngestJobSchema(BaseModel):
+    id: str
+    filename: str
+    status: Literal["pending", "running", "succeeded", "failed", "cancelled"]
+    bytes_total: int
+    bytes_read: int
+    rows: int
+    created: int
+    updated: int
+    rejected: int
+    error: Optional[str] = None
+    created_at: datetime.datetime
+    finished_at: Optional[datetime.datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,35 @@
+from database.interning import reference_cache
+from services.actor_autocomplete import actor_autocomplete
+from services.actor_graph import actor_graph
+from services.admission import read_limiter, write_limiter
+from services.catalogue_replica import catalogue_replica
+from services.change_feed import change_feed
+from services.exports import export_cache
+from services.hot_movies import hot_movies
+from services.index_sync import index_sync
+from services.ingest import ingest_jobs
+from services.related_movies import related_movies_index
+from services.response_cache import response_cache
+from services.single_flight import movie_count_flight, movie_detail_flight
+
+
+def reset_services() -> None:
+    """
+    Drop every in-process index and cache so that they are rebuilt from the database on next use,
+    and reset the counters and limits.
+    """
+    actor_graph.reset()
+    actor_autocomplete.reset()
+    related_movies_index.reset()
+    catalogue_replica.reset()
+    index_sync.reset()
+    movie_count_flight.reset()
+    movie_detail_flight.reset()
+    read_limiter.reset()
+    write_limiter.reset()
+    response_cache.reset()
+    change_feed.reset()
+    ingest_jobs.reset()
+    export_cache.reset()
+    hot_movies.reset()
+    reference_cache.reset()
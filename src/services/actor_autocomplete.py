@@ -0,0 +1,144 @@
+"""
+In-memory prefix index over actor names for type-ahead search.
+
+A name matches a query when one of its words starts with the query, case-insensitively: "jack"
+and "l. jack" both find "Samuel L. Jackson". To answer this with binary search, the index keeps a
+sorted array of every word-start suffix of every case-folded name ("samuel l. jackson",
+"l. jackson", "jackson"), which is a sparse suffix array. The suffixes that start with the query
+form one contiguous slice of it.
+
+Matches are ranked by how many movies the actor appears in, which is read from the actor graph
+(`services.actor_graph`) at query time, so the ranking follows writes without rebuilding the
+index. Actors without movies are left out, which also hides actors the orphan cleanup is about to
+delete. Actors created after the load are kept in a small delta that is scanned linearly, and
+merged into the arrays once it grows past `COMPACTION_THRESHOLD`.
+
+`database.actor_search` answers the same query in SQL. On PostgreSQL, a `pg_trgm` GIN index on
+`actors.name` serves it.
+"""
+import asyncio
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.actor_search import ActorMatch, normalize_query
+from database.changes import get_latest_sequence
+from database.models import ActorModel
+from services.actor_graph import actor_graph
+
+COMPACTION_THRESHOLD = 1024
+
+
+def word_suffixes(name: str) -> List[str]:
+    """
+    :param name: An actor name.
+    :return: The case-folded name from the start of each of its words.
+    """
+    folded = " ".join(name.casefold().split())
+    return [folded[start:] for start in range(len(folded)) if start == 0 or folded[start - 1] == " "]
+
+
+class ActorAutocomplete:
+    """
+    Word-prefix search over actor names, ranked by movie count.
+    """
+
+    def __init__(self) -> None:
+        self._load_lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop the index; the next query reloads it from the database.
+
+        :return: None
+        """
+        self._loaded = False
+        self.synced_sequence = 0
+        self._names: Dict[int, str] = {}
+        self._added: Dict[int, str] = {}
+        self._build()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Index the names of every actor.
+
+        :param session: The async database session to read from.
+        :return: None
+        """
+        async with self._load_lock:
+            sequence = await get_latest_sequence(session)
+            result = await session.execute(select(ActorModel.id, ActorModel.name))
+            self._names = dict(result.tuples().all())
+            self._added = {}
+            self._build()
+            self.synced_sequence = sequence
+            self._loaded = True
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if not self._loaded:
+            await self.load(session)
+        await actor_graph.ensure_loaded(session)
+
+    def add_actors(self, actors: Iterable[Tuple[int, str]]) -> None:
+        """
+        Make actors created by a write searchable.
+
+        :param actors: (actor ID, name) pairs; actors that are already indexed are skipped.
+        :return: None
+        """
+        if not self._loaded:
+            return
+        for actor_id, name in actors:
+            if actor_id not in self._names and actor_id not in self._added:
+                self._added[actor_id] = name
+        if len(self._added) > COMPACTION_THRESHOLD:
+            self._names.update(self._added)
+            self._added = {}
+            self._build()
+
+    def search(self, query: str, limit: int) -> List[ActorMatch]:
+        """
+        :param query: The text typed so far.
+        :param limit: The maximum number of actors to return.
+        :return: The matching actors with the most movies first; ties by ascending ID.
+        """
+        query = normalize_query(query)
+        if not query:
+            return []
+        low = bisect.bisect_left(self._keys, query)
+        high = bisect.bisect_left(self._keys, query + "\U0010ffff", low)
+        added = [
+            actor_id for actor_id, name in self._added.items()
+            if any(suffix.startswith(query) for suffix in word_suffixes(name))
+        ]
+        actor_ids = np.unique(np.concatenate([self._key_actor_ids[low:high], np.array(added, dtype=np.int64)]))
+        counts = actor_graph.movie_counts(actor_ids)
+        playing = counts > 0
+        actor_ids, counts = actor_ids[playing], counts[playing]
+        if len(actor_ids) > limit:
+            threshold = np.partition(-counts, limit - 1)[limit - 1]
+            best = -counts <= threshold
+            actor_ids, counts = actor_ids[best], counts[best]
+        order = np.lexsort((actor_ids, -counts))[:limit]
+        return [
+            ActorMatch(id=actor_id, name=self._names.get(actor_id) or self._added[actor_id], movie_count=count)
+            for actor_id, count in zip(actor_ids[order].tolist(), counts[order].tolist())
+        ]
+
+    def _build(self) -> None:
+        entries = sorted(
+            (suffix, actor_id) for actor_id, name in self._names.items() for suffix in word_suffixes(name)
+        )
+        self._keys: List[str] = [suffix for suffix, _ in entries]
+        self._key_actor_ids = np.array([actor_id for _, actor_id in entries], dtype=np.int64)
+
+
+actor_autocomplete = ActorAutocomplete()
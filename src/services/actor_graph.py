@@ -0,0 +1,375 @@
+"""
+In-memory actor collaboration graph.
+
+`actors_movies` is a bipartite graph between movies and actors. Two actors are co-stars when they
+share a movie; the edge weight is the number of movies they share. The graph is kept as two CSR
+structures over dense actor indexes:
+
+* the cast of every movie (movie -> actors), which is the source of truth for updates, and
+* the precomputed co-star adjacency (actor -> co-stars, with weights), built from the casts with
+  vectorized NumPy operations, which answers co-star, degree and BFS queries.
+
+Cast changes are applied as a delta: the new cast overrides the stored one, edge weight changes
+are accumulated per actor, and the touched actors are marked dirty so that queries read their
+neighbourhood from the base arrays plus the delta. Once enough casts have changed, the arrays are
+rebuilt from memory.
+"""
+import asyncio
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.changes import get_latest_sequence
+from database.models import ActorModel, ActorsMoviesModel
+from services.arrays import concatenated_ranges
+
+COMPACTION_THRESHOLD = 512
+
+
+@dataclass(frozen=True)
+class _Graph:
+    actor_ids: np.ndarray
+    movie_ids: np.ndarray
+    cast_indptr: np.ndarray
+    cast_actors: np.ndarray
+    adjacency_indptr: np.ndarray
+    adjacency_actors: np.ndarray
+    adjacency_weights: np.ndarray
+    movie_counts: np.ndarray
+
+
+class ActorGraph:
+    """
+    Co-star queries over an array-backed actor graph.
+    """
+
+    def __init__(self) -> None:
+        self._load_lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop the graph; the next query reloads it from the database.
+
+        :return: None
+        """
+        self._loaded = False
+        self.synced_sequence = 0
+        self._graph = _build_graph(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+        self._actor_index: Dict[int, int] = {}
+        self._movie_row: Dict[int, int] = {}
+        self._new_actor_ids: List[int] = []
+        self._cast_overrides: Dict[int, FrozenSet[int]] = {}
+        self._edge_delta: Dict[int, Counter] = {}
+        self._movie_count_delta: Counter = Counter()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def actor_count(self) -> int:
+        return len(self._actor_index)
+
+    @property
+    def edge_count(self) -> int:
+        """
+        Number of undirected co-star edges in the base arrays.
+        """
+        return len(self._graph.adjacency_actors) // 2
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Build the graph from `actors` and `actors_movies`.
+
+        :param session: The async database session to read from.
+        :return: None
+        """
+        async with self._load_lock:
+            sequence = await get_latest_sequence(session)
+            actor_ids = np.fromiter((await session.execute(select(ActorModel.id))).scalars(), dtype=np.int64)
+            rows = (await session.execute(select(ActorsMoviesModel.c.movie_id, ActorsMoviesModel.c.actor_id))).all()
+            pairs = np.array(rows, dtype=np.int64).reshape(-1, 2)
+            self.build(pairs[:, 0], pairs[:, 1], actor_ids)
+            self.synced_sequence = sequence
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if not self._loaded:
+            await self.load(session)
+
+    def build(self, movie_ids: np.ndarray, actor_ids: np.ndarray, all_actor_ids: Optional[np.ndarray] = None) -> None:
+        """
+        Build the graph from parallel arrays of (movie_id, actor_id) memberships.
+
+        :param movie_ids: Movie ID of every membership.
+        :param actor_ids: Actor ID of every membership.
+        :param all_actor_ids: Every known actor, including those without movies.
+        :return: None
+        """
+        known_actors = actor_ids if all_actor_ids is None else np.concatenate([all_actor_ids, actor_ids])
+        self._graph = _build_graph(movie_ids, actor_ids, known_actors)
+        self._actor_index = {actor_id: index for index, actor_id in enumerate(self._graph.actor_ids.tolist())}
+        self._movie_row = {movie_id: row for row, movie_id in enumerate(self._graph.movie_ids.tolist())}
+        self._new_actor_ids: List[int] = []
+        self._cast_overrides = {}
+        self._edge_delta = {}
+        self._movie_count_delta = Counter()
+        self._loaded = True
+
+    def set_movie_cast(self, movie_id: int, actor_ids: Iterable[int]) -> None:
+        """
+        Record the cast of a created or patched movie.
+
+        :param movie_id: The ID of the movie.
+        :param actor_ids: IDs of the movie's actors after the write.
+        :return: None
+        """
+        if not self._loaded:
+            return
+        new_cast = frozenset(self._index_of(actor_id, create=True) for actor_id in actor_ids)
+        self._replace_cast(movie_id, new_cast)
+
+    def remove_movie(self, movie_id: int) -> None:
+        """
+        Forget a deleted movie and the co-star edges it contributed.
+
+        :param movie_id: The ID of the movie.
+        :return: None
+        """
+        if not self._loaded:
+            return
+        self._replace_cast(movie_id, frozenset())
+
+    def has_actor(self, actor_id: int) -> bool:
+        return actor_id in self._actor_index
+
+    def costars(self, actor_id: int, limit: Optional[int] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        Return the actor's co-stars with the number of shared movies, most frequent first.
+
+        :param actor_id: The ID of the actor.
+        :param limit: The maximum number of co-stars to return.
+        :return: A list of (actor_id, shared_movies) pairs, or None if the actor is unknown.
+        """
+        index = self._actor_index.get(actor_id)
+        if index is None:
+            return None
+        neighbours = self._neighbours(index)
+        ordered = sorted(neighbours.items(), key=lambda item: (-item[1], item[0]))
+        actor_ids = self._all_actor_ids()
+        return [(int(actor_ids[neighbour]), weight) for neighbour, weight in ordered[:limit]]
+
+    def degree(self, actor_id: int) -> Optional[Tuple[int, int]]:
+        """
+        Return how many movies the actor played in and how many distinct co-stars they have.
+
+        :param actor_id: The ID of the actor.
+        :return: A (movie_count, costar_count) pair, or None if the actor is unknown.
+        """
+        index = self._actor_index.get(actor_id)
+        if index is None:
+            return None
+        base_movies = int(self._graph.movie_counts[index]) if index < len(self._graph.movie_counts) else 0
+        return base_movies + self._movie_count_delta[index], len(self._neighbours(index))
+
+    def movie_counts(self, actor_ids: np.ndarray) -> np.ndarray:
+        """
+        Return how many movies each actor played in, like `degree`, for many actors at once.
+
+        :param actor_ids: IDs of actors; unknown ones count 0.
+        :return: The movie counts, in the order of `actor_ids`.
+        """
+        graph = self._graph
+        actor_ids = np.asarray(actor_ids, dtype=np.int64)
+        counts = np.zeros(len(actor_ids), dtype=np.int64)
+        if len(graph.actor_ids):
+            positions = np.minimum(np.searchsorted(graph.actor_ids, actor_ids), len(graph.actor_ids) - 1)
+            known = graph.actor_ids[positions] == actor_ids
+            counts[known] = graph.movie_counts[positions[known]]
+        changed = [(index, change) for index, change in self._movie_count_delta.items() if change]
+        if changed:
+            changed_ids = np.array([self._actor_id_of(index) for index, _ in changed], dtype=np.int64)
+            order = np.argsort(changed_ids)
+            changed_ids, changes = changed_ids[order], np.array([change for _, change in changed])[order]
+            positions = np.minimum(np.searchsorted(changed_ids, actor_ids), len(changed_ids) - 1)
+            touched = changed_ids[positions] == actor_ids
+            counts[touched] += changes[positions[touched]]
+        return counts
+
+    def shortest_path(self, source_id: int, target_id: int) -> Optional[List[int]]:
+        """
+        Find a shortest co-star chain between two actors with a bidirectional breadth-first search.
+
+        Frontiers of actors without pending changes are expanded in one vectorized gather over the
+        adjacency arrays; only actors touched by recent writes are expanded one by one.
+
+        :param source_id: The ID of the first actor.
+        :param target_id: The ID of the second actor.
+        :return: Actor IDs from source to target, or None if either is unknown or they are not connected.
+        """
+        source = self._actor_index.get(source_id)
+        target = self._actor_index.get(target_id)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return [source_id]
+
+        size = len(self._actor_index)
+        parents = [np.full(size, -1, dtype=np.int64), np.full(size, -1, dtype=np.int64)]
+        parents[0][source], parents[1][target] = source, target
+        frontiers = [np.array([source], dtype=np.int64), np.array([target], dtype=np.int64)]
+
+        while frontiers[0].size and frontiers[1].size:
+            side = 0 if frontiers[0].size <= frontiers[1].size else 1
+            sources, neighbours = self._expand(frontiers[side])
+            fresh = parents[side][neighbours] == -1
+            sources, neighbours = sources[fresh], neighbours[fresh]
+            neighbours, first = np.unique(neighbours, return_index=True)
+            parents[side][neighbours] = sources[first]
+
+            meeting = neighbours[parents[1 - side][neighbours] != -1]
+            if meeting.size:
+                return self._join_paths(int(meeting[0]), parents)
+            frontiers[side] = neighbours
+        return None
+
+    def _expand(self, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        graph = self._graph
+        base_size = len(graph.actor_ids)
+        dirty = np.fromiter(self._edge_delta, dtype=np.int64, count=len(self._edge_delta))
+        is_clean = (frontier < base_size) & ~np.isin(frontier, dirty)
+
+        clean = frontier[is_clean]
+        starts = graph.adjacency_indptr[clean]
+        lengths = graph.adjacency_indptr[clean + 1] - starts
+        sources = [np.repeat(clean, lengths)]
+        neighbours = [graph.adjacency_actors[concatenated_ranges(starts, lengths)]]
+
+        for node in frontier[~is_clean].tolist():
+            adjacent = np.fromiter(self._neighbours(node), dtype=np.int64)
+            sources.append(np.full(adjacent.size, node, dtype=np.int64))
+            neighbours.append(adjacent)
+        return np.concatenate(sources), np.concatenate(neighbours)
+
+    def _join_paths(self, meeting: int, parents: List[np.ndarray]) -> List[int]:
+        forward = [meeting]
+        while parents[0][forward[-1]] != forward[-1]:
+            forward.append(int(parents[0][forward[-1]]))
+        backward = [meeting]
+        while parents[1][backward[-1]] != backward[-1]:
+            backward.append(int(parents[1][backward[-1]]))
+        actor_ids = self._all_actor_ids()
+        return [int(actor_ids[node]) for node in forward[::-1] + backward[1:]]
+
+    def _neighbours(self, index: int) -> Dict[int, int]:
+        graph = self._graph
+        neighbours: Dict[int, int] = {}
+        if index < len(graph.actor_ids):
+            start, end = graph.adjacency_indptr[index], graph.adjacency_indptr[index + 1]
+            neighbours = dict(zip(graph.adjacency_actors[start:end].tolist(),
+                                  graph.adjacency_weights[start:end].tolist()))
+        for neighbour, change in self._edge_delta.get(index, {}).items():
+            weight = neighbours.get(neighbour, 0) + change
+            if weight > 0:
+                neighbours[neighbour] = weight
+            else:
+                neighbours.pop(neighbour, None)
+        return neighbours
+
+    def _cast_of(self, movie_id: int) -> FrozenSet[int]:
+        if movie_id in self._cast_overrides:
+            return self._cast_overrides[movie_id]
+        row = self._movie_row.get(movie_id)
+        if row is None:
+            return frozenset()
+        graph = self._graph
+        return frozenset(graph.cast_actors[graph.cast_indptr[row]:graph.cast_indptr[row + 1]].tolist())
+
+    def _replace_cast(self, movie_id: int, new_cast: FrozenSet[int]) -> None:
+        old_cast = self._cast_of(movie_id)
+        if old_cast == new_cast:
+            return
+        for cast, sign in ((old_cast, -1), (new_cast, 1)):
+            for actor in cast:
+                self._movie_count_delta[actor] += sign
+                delta = self._edge_delta.setdefault(actor, Counter())
+                for other in cast:
+                    if other != actor:
+                        delta[other] += sign
+        self._cast_overrides[movie_id] = new_cast
+        if len(self._cast_overrides) > COMPACTION_THRESHOLD:
+            self._compact()
+
+    def _compact(self) -> None:
+        actor_ids = self._all_actor_ids()
+        graph = self._graph
+        keep = np.array([movie_id not in self._cast_overrides for movie_id in graph.movie_ids.tolist()], dtype=bool)
+        lengths = np.diff(graph.cast_indptr)
+        movie_ids = [np.repeat(graph.movie_ids[keep], lengths[keep])]
+        members = [graph.cast_actors[concatenated_ranges(graph.cast_indptr[:-1][keep], lengths[keep])]]
+        for movie_id, cast in self._cast_overrides.items():
+            movie_ids.append(np.full(len(cast), movie_id, dtype=np.int64))
+            members.append(np.fromiter(cast, dtype=np.int64, count=len(cast)))
+        self.build(np.concatenate(movie_ids), actor_ids[np.concatenate(members)], actor_ids)
+
+    def _index_of(self, actor_id: int, create: bool = False) -> int:
+        index = self._actor_index.get(actor_id)
+        if index is None and create:
+            index = self._actor_index[actor_id] = len(self._actor_index)
+            self._new_actor_ids.append(actor_id)
+        return index
+
+    def _actor_id_of(self, index: int) -> int:
+        base = self._graph.actor_ids
+        return int(base[index]) if index < len(base) else self._new_actor_ids[index - len(base)]
+
+    def _all_actor_ids(self) -> np.ndarray:
+        base = self._graph.actor_ids
+        if len(self._actor_index) == len(base):
+            return base
+        extra = sorted(self._actor_index.items(), key=lambda item: item[1])[len(base):]
+        return np.concatenate([base, np.array([actor_id for actor_id, _ in extra], dtype=np.int64)])
+
+
+def _build_graph(movie_ids: np.ndarray, actor_ids: np.ndarray, known_actor_ids: np.ndarray) -> _Graph:
+    """
+    Build the cast CSR and the co-star adjacency CSR from (movie_id, actor_id) memberships.
+    """
+    all_actor_ids = np.unique(known_actor_ids).astype(np.int64)
+    memberships = np.unique(np.stack([movie_ids, actor_ids]).astype(np.int64), axis=1)
+    movie_keys, actor_keys = memberships[0], np.searchsorted(all_actor_ids, memberships[1])
+
+    unique_movies, cast_sizes = np.unique(movie_keys, return_counts=True)
+    cast_indptr = np.zeros(len(unique_movies) + 1, dtype=np.int64)
+    np.cumsum(cast_sizes, out=cast_indptr[1:])
+
+    member_cast_size = np.repeat(cast_sizes, cast_sizes)
+    member_cast_start = np.repeat(cast_indptr[:-1], cast_sizes)
+    left = np.repeat(actor_keys, member_cast_size)
+    right = actor_keys[concatenated_ranges(member_cast_start, member_cast_size)]
+    distinct = left != right
+    left, right = left[distinct], right[distinct]
+
+    size = len(all_actor_ids)
+    edge_codes, weights = np.unique(left * max(size, 1) + right, return_counts=True)
+    sources, targets = np.divmod(edge_codes, max(size, 1))
+    adjacency_indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=adjacency_indptr[1:])
+
+    return _Graph(
+        actor_ids=all_actor_ids,
+        movie_ids=unique_movies,
+        cast_indptr=cast_indptr,
+        cast_actors=actor_keys,
+        adjacency_indptr=adjacency_indptr,
+        adjacency_actors=targets.astype(np.int64),
+        adjacency_weights=weights.astype(np.int64),
+        movie_counts=np.bincount(actor_keys, minlength=size),
+    )
+
+
+actor_graph = ActorGraph()
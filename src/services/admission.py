@@ -0,0 +1,166 @@
+"""
+Adaptive admission control for database-bound requests.
+
+Each limiter caps how many requests may use the database at once. The cap adapts with AIMD
+(additive increase, multiplicative decrease): every request that finishes within the target latency
+raises the limit by `1 / limit` (about +1 per round of requests), and every slow request or database
+timeout cuts it by `ADMISSION_BACKOFF_RATIO`, at most once per round. When the database slows down, the
+limit shrinks to what it can serve, and the excess waits in a short queue instead of piling up on
+the connection pool.
+
+A request that cannot get a slot before its deadline is rejected. If the queue in front of it
+already predicts a wait longer than the deadline, it is rejected at once, without waiting.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+from sqlalchemy.exc import OperationalError
+
+from config import get_settings
+
+# Errors that mean the database is struggling, as opposed to e.g. a 404 raised by the route.
+OVERLOAD_ERRORS = (asyncio.TimeoutError, TimeoutError, OperationalError)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot be admitted before its deadline.
+    """
+
+    def __init__(self, limiter: str, retry_after: float) -> None:
+        super().__init__(f"The {limiter} budget is exhausted.")
+        self.limiter = limiter
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    An AIMD concurrency limit with a deadline-bounded FIFO queue.
+    """
+
+    def __init__(self, name: str, budget: str) -> None:
+        self.name = name
+        self._budget = budget
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Re-read the settings and restart from the initial limit with empty counters.
+
+        :return: None
+        """
+        settings = get_settings()
+        self.min_limit = settings.ADMISSION_MIN_LIMIT
+        self.max_limit = getattr(settings, f"ADMISSION_{self._budget}_MAX_LIMIT")
+        self.limit = float(getattr(settings, f"ADMISSION_{self._budget}_INITIAL_LIMIT"))
+        self.target_latency = settings.ADMISSION_TARGET_LATENCY_MS / 1000
+        self.backoff_ratio = settings.ADMISSION_BACKOFF_RATIO
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency = self.target_latency
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self.decreases = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+            "latency_ms": self._latency * 1000,
+        }
+
+    @asynccontextmanager
+    async def admit(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold one slot of the limiter for the duration of the block.
+
+        :param timeout: The longest the caller may wait for a slot; defaults to `ADMISSION_QUEUE_TIMEOUT_SECONDS`.
+        :return: An async context manager.
+        :raises AdmissionRejected: If no slot frees up before the timeout.
+        """
+        await self._acquire(self.queue_timeout if timeout is None else timeout)
+        started = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except OVERLOAD_ERRORS:
+            overloaded = True
+            raise
+        finally:
+            self._release(time.monotonic() - started, overloaded)
+
+    async def _acquire(self, timeout: float) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if timeout <= 0 or self._estimated_wait() > timeout:
+            self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self._reject()
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self.admitted += 1
+
+    def _release(self, latency: float, overloaded: bool) -> None:
+        self.in_flight -= 1
+        self._latency += 0.2 * (latency - self._latency)
+        now = time.monotonic()
+        if overloaded or latency > self.target_latency:
+            if now - self._last_decrease >= self._latency:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+                self._last_decrease = now
+                self.decreases += 1
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as the caller gave up: pass it on.
+            self.in_flight -= 1
+            self._wake_waiters()
+        else:
+            waiter.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _estimated_wait(self) -> float:
+        return (self.queued + 1) / max(self.limit, 1.0) * self._latency
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        raise AdmissionRejected(self.name, retry_after=max(1.0, self._estimated_wait()))
+
+
+read_limiter = AdaptiveLimiter("read", "READ")
+write_limiter = AdaptiveLimiter("write", "WRITE")
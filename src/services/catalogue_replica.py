@@ -0,0 +1,467 @@
+"""
+In-memory columnar replica of the catalogue for analytic queries.
+
+The movies are held column by column in NumPy arrays sorted by movie ID: score, release date,
+budget, revenue and country, plus the names to label results. Genre, actor and language membership
+is kept as CSR both ways: row-major (movie -> entities), which is what compaction copies, and
+entity-major (entity -> movies), which turns "movies in genre X" into one slice. A filtered top-N
+query is then a handful of vectorized comparisons into one boolean mask, an `np.partition` to cut
+the candidates down to the N best (plus ties) and a sort of those; a range summary is a masked
+count, sum, minimum and maximum. Neither touches the database.
+
+`database.analytics` answers the same queries in SQL. The routes use it when the replica is
+disabled (`CATALOGUE_REPLICA_ENABLED`) or cannot answer, e.g. for a country code the replica has
+not seen, since countries created after the load are not tracked. Genre and language names are
+taken from every write that links them (`upsert_movie`'s `named`), so a language the orphan
+cleanup deleted and a later write recreated under a new ID is looked up by its new ID.
+
+Writes do not rebuild the arrays. A written movie is tombstoned in the arrays and kept in a small
+Python delta instead, which queries scan row by row; once the delta grows past
+`COMPACTION_THRESHOLD` the arrays are rebuilt from memory.
+"""
+import asyncio
+import datetime
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.analytics import MovieFilter, MovieSummary, RankedMovie
+from database.associations import MOVIE_ASSOCIATIONS
+from database.changes import get_latest_sequence
+from database.models import CountryModel, GenreModel, LanguageModel, MovieModel
+from services.arrays import concatenated_ranges
+
+COMPACTION_THRESHOLD = 1024
+# Associations whose names `MovieFilter` filters by, and the kind of their `_entity_ids` map.
+NAMED_FAMILIES = {"genres": "genre", "languages": "language"}
+
+_NO_ROWS = np.zeros(0, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class _Membership:
+    row_indptr: np.ndarray
+    row_entities: np.ndarray
+    entity_ids: np.ndarray
+    entity_indptr: np.ndarray
+    entity_rows: np.ndarray
+
+    def rows_of(self, entity_id: int) -> np.ndarray:
+        position = int(np.searchsorted(self.entity_ids, entity_id))
+        if position == len(self.entity_ids) or self.entity_ids[position] != entity_id:
+            return _NO_ROWS
+        return self.entity_rows[self.entity_indptr[position]:self.entity_indptr[position + 1]]
+
+    def entities_of(self, row: int) -> np.ndarray:
+        return self.row_entities[self.row_indptr[row]:self.row_indptr[row + 1]]
+
+
+@dataclass(frozen=True)
+class _Columns:
+    movie_ids: np.ndarray
+    names: np.ndarray
+    dates: np.ndarray
+    scores: np.ndarray
+    budgets: np.ndarray
+    revenues: np.ndarray
+    country_ids: np.ndarray
+    memberships: Dict[str, _Membership]
+
+    def values(self, column: str) -> np.ndarray:
+        return {"date": self.dates, "score": self.scores, "budget": self.budgets, "revenue": self.revenues}[column]
+
+
+@dataclass(frozen=True)
+class _MovieRow:
+    id: int
+    name: str
+    date: datetime.date
+    score: float
+    budget: float
+    revenue: float
+    country_id: int
+    memberships: Dict[str, FrozenSet[int]]
+
+    def value(self, column: str) -> Any:
+        return getattr(self, column)
+
+
+def _build_membership(size: int, rows: np.ndarray, entity_ids: np.ndarray) -> _Membership:
+    row_order = np.argsort(rows, kind="stable")
+    unique_entities, inverse = np.unique(entity_ids, return_inverse=True)
+    entity_order = np.argsort(inverse, kind="stable")
+    return _Membership(
+        row_indptr=np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=size)))).astype(np.int64),
+        row_entities=entity_ids[row_order],
+        entity_ids=unique_entities,
+        entity_indptr=np.concatenate(
+            ([0], np.cumsum(np.bincount(inverse, minlength=len(unique_entities))))
+        ).astype(np.int64),
+        entity_rows=rows[entity_order],
+    )
+
+
+def _build_columns(
+        movie_ids: np.ndarray,
+        names: np.ndarray,
+        dates: np.ndarray,
+        scores: np.ndarray,
+        budgets: np.ndarray,
+        revenues: np.ndarray,
+        country_ids: np.ndarray,
+        links: Dict[str, Tuple[np.ndarray, np.ndarray]]
+) -> _Columns:
+    """
+    Sort the movies by ID and index their (movie ID, entity ID) links in both directions.
+    """
+    order = np.argsort(movie_ids, kind="stable")
+    movie_ids = movie_ids[order]
+    memberships = {}
+    for family, (link_movies, link_entities) in links.items():
+        rows = np.searchsorted(movie_ids, link_movies)
+        known = rows < len(movie_ids)
+        known[known] = movie_ids[rows[known]] == link_movies[known]
+        memberships[family] = _build_membership(len(movie_ids), rows[known], link_entities[known])
+    return _Columns(
+        movie_ids=movie_ids,
+        names=names[order],
+        dates=dates[order],
+        scores=scores[order],
+        budgets=budgets[order],
+        revenues=revenues[order],
+        country_ids=country_ids[order],
+        memberships=memberships,
+    )
+
+
+def _empty_links() -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    return {family: (_NO_ROWS, _NO_ROWS) for family in MOVIE_ASSOCIATIONS}
+
+
+def _comparable(column: str, value: Any) -> Any:
+    return np.datetime64(value, "D") if column == "date" else value
+
+
+class CatalogueReplica:
+    """
+    Filtered top-N and range queries over an array-backed copy of the movies.
+    """
+
+    def __init__(self) -> None:
+        self._load_lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop the replica; the next query reloads it from the database.
+
+        :return: None
+        """
+        self._loaded = False
+        self.synced_sequence = 0
+        empty_floats = np.zeros(0, dtype=np.float64)
+        self._install(_build_columns(
+            _NO_ROWS, np.zeros(0, dtype=object), np.zeros(0, dtype="datetime64[D]"),
+            empty_floats, empty_floats, empty_floats, _NO_ROWS, _empty_links()
+        ))
+        self._entity_ids: Dict[str, Dict[str, int]] = {"genre": {}, "language": {}, "country": {}}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "movies": int(self._alive.sum()) + len(self._delta),
+            "pending_changes": len(self._delta),
+        }
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Copy the movies, their memberships and the names of genres, languages and countries.
+
+        :param session: The async database session to read from.
+        :return: None
+        """
+        async with self._load_lock:
+            sequence = await get_latest_sequence(session)
+            rows = (await session.execute(select(
+                MovieModel.id, MovieModel.name, MovieModel.date, MovieModel.score,
+                MovieModel.budget, MovieModel.revenue, MovieModel.country_id
+            ))).all()
+            links = {}
+            for family, relation in MOVIE_ASSOCIATIONS.items():
+                pairs = (await session.execute(select(relation.table.c.movie_id, relation.entity_column))).all()
+                pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+                links[family] = (pairs[:, 0], pairs[:, 1])
+
+            self._install(_build_columns(
+                movie_ids=np.array([row[0] for row in rows], dtype=np.int64),
+                names=np.array([row[1] for row in rows], dtype=object),
+                dates=np.array([row[2] for row in rows], dtype="datetime64[D]"),
+                scores=np.array([row[3] for row in rows], dtype=np.float64),
+                budgets=np.array([float(row[4]) for row in rows], dtype=np.float64),
+                revenues=np.array([row[5] for row in rows], dtype=np.float64),
+                country_ids=np.array([row[6] for row in rows], dtype=np.int64),
+                links=links,
+            ))
+            self._entity_ids = {
+                "genre": dict((await session.execute(select(GenreModel.name, GenreModel.id))).tuples().all()),
+                "language": dict(
+                    (await session.execute(select(LanguageModel.name, LanguageModel.id))).tuples().all()
+                ),
+                "country": dict((await session.execute(select(CountryModel.code, CountryModel.id))).tuples().all()),
+            }
+            self.synced_sequence = sequence
+            self._loaded = True
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if not self._loaded:
+            await self.load(session)
+
+    def upsert_movie(
+            self,
+            movie: MovieModel,
+            linked: Optional[Dict[str, List[int]]] = None,
+            named: Optional[Dict[str, Iterable[Tuple[int, str]]]] = None
+    ) -> None:
+        """
+        Record the current values of a created or updated movie.
+
+        :param movie: The movie after the write.
+        :param linked: The IDs the movie is linked to per association, or None if they did not change.
+        :param named: (ID, name) pairs of the entities the write linked, per association; genre and
+            language names are mapped to these IDs from now on.
+        :return: None
+        """
+        if not self._loaded:
+            return
+        for family, pairs in (named or {}).items():
+            kind = NAMED_FAMILIES.get(family)
+            if kind is not None:
+                self._entity_ids[kind].update((name, entity_id) for entity_id, name in pairs)
+        if linked is None:
+            memberships = self._memberships_of(movie.id)
+        else:
+            memberships = {family: frozenset(linked[family]) for family in MOVIE_ASSOCIATIONS}
+        self._tombstone(movie.id)
+        self._delta[movie.id] = _MovieRow(
+            id=movie.id,
+            name=movie.name,
+            date=movie.date,
+            score=float(movie.score),
+            budget=float(movie.budget),
+            revenue=float(movie.revenue),
+            country_id=movie.country_id,
+            memberships=memberships,
+        )
+        self._maybe_compact()
+
+    def remove_movie(self, movie_id: int) -> None:
+        """
+        Forget a deleted movie.
+
+        :param movie_id: The ID of the movie.
+        :return: None
+        """
+        if not self._loaded:
+            return
+        self._tombstone(movie_id)
+        self._delta.pop(movie_id, None)
+        self._maybe_compact()
+
+    def top_movies(
+            self,
+            movie_filter: MovieFilter,
+            order_by: str,
+            descending: bool,
+            limit: int
+    ) -> Optional[List[RankedMovie]]:
+        """
+        Return the first matching movies in the order of a column, like `database.analytics.get_top_movies`.
+
+        :param movie_filter: The conditions the movies must meet.
+        :param order_by: One of `database.analytics.RANGE_COLUMNS`.
+        :param descending: Whether the highest values come first.
+        :param limit: The maximum number of movies to return.
+        :return: The movies, with ties broken by ascending ID, or None if the replica cannot answer.
+        """
+        selection = self._select(movie_filter)
+        if selection is None:
+            return None
+        rows, delta = selection
+        columns = self._columns
+        sign = -1 if descending else 1
+
+        keys = columns.values(order_by)[rows]
+        if order_by == "date":
+            keys = keys.astype(np.int64)
+        keys = keys * sign
+        if len(rows) > limit:
+            threshold = np.partition(keys, limit - 1)[limit - 1]
+            best = keys <= threshold
+            rows, keys = rows[best], keys[best]
+
+        delta_keys = [row.value(order_by) for row in delta]
+        if order_by == "date":
+            delta_keys = [np.datetime64(value, "D").astype(np.int64) for value in delta_keys]
+        ids = np.concatenate([columns.movie_ids[rows], np.array([row.id for row in delta], dtype=np.int64)])
+        keys = np.concatenate([keys, np.array(delta_keys, dtype=keys.dtype) * sign])
+        order = np.lexsort((ids, keys))[:limit]
+
+        delta_by_id = {row.id: row for row in delta}
+        ranked = []
+        for movie_id in ids[order].tolist():
+            row = delta_by_id.get(movie_id) or self._base_row(self._row_of_movie[movie_id])
+            ranked.append(RankedMovie(
+                id=row.id, name=row.name, date=row.date, score=row.score, budget=row.budget, revenue=row.revenue
+            ))
+        return ranked
+
+    def summarize(self, movie_filter: MovieFilter) -> Optional[MovieSummary]:
+        """
+        Aggregate the matching movies, like `database.analytics.get_movie_summary`.
+
+        :param movie_filter: The conditions the movies must meet.
+        :return: The summary, or None if the replica cannot answer.
+        """
+        selection = self._select(movie_filter)
+        if selection is None:
+            return None
+        rows, delta = selection
+        columns = self._columns
+        scores = np.concatenate([columns.scores[rows], [row.score for row in delta]])
+        revenues = np.concatenate([columns.revenues[rows], [row.revenue for row in delta]])
+        dates = np.concatenate([columns.dates[rows], np.array([row.date for row in delta], dtype="datetime64[D]")])
+        if not len(scores):
+            return MovieSummary(movie_count=0, average_score=None, total_revenue=0.0, first_date=None, last_date=None)
+        return MovieSummary(
+            movie_count=len(scores),
+            average_score=float(scores.mean()),
+            total_revenue=float(revenues.sum()),
+            first_date=dates.min().item(),
+            last_date=dates.max().item(),
+        )
+
+    def _select(self, movie_filter: MovieFilter) -> Optional[Tuple[np.ndarray, List[_MovieRow]]]:
+        """
+        Find the matching movies: rows of the arrays, and movies of the delta.
+
+        :return: None if a genre, language or country name is unknown to the replica.
+        """
+        entities: Dict[str, int] = {}
+        for family, kind, name in (
+                ("genres", "genre", movie_filter.genre),
+                ("languages", "language", movie_filter.language),
+                ("country", "country", movie_filter.country),
+        ):
+            if name is not None:
+                if name not in self._entity_ids[kind]:
+                    return None
+                entities[family] = self._entity_ids[kind][name]
+        if movie_filter.actor_id is not None:
+            entities["actors"] = movie_filter.actor_id
+        country_id = entities.pop("country", None)
+
+        columns = self._columns
+        mask = self._alive.copy()
+        for column, low, high in movie_filter.ranges:
+            values = columns.values(column)
+            if low is not None:
+                mask &= values >= _comparable(column, low)
+            if high is not None:
+                mask &= values <= _comparable(column, high)
+        if country_id is not None:
+            mask &= columns.country_ids == country_id
+        for family, entity_id in entities.items():
+            members = np.zeros(len(mask), dtype=bool)
+            members[columns.memberships[family].rows_of(entity_id)] = True
+            mask &= members
+
+        def matches(row: _MovieRow) -> bool:
+            for column, low, high in movie_filter.ranges:
+                value = row.value(column)
+                if (low is not None and value < low) or (high is not None and value > high):
+                    return False
+            if country_id is not None and row.country_id != country_id:
+                return False
+            return all(entity_id in row.memberships[family] for family, entity_id in entities.items())
+
+        return np.flatnonzero(mask), [row for row in self._delta.values() if matches(row)]
+
+    def _base_row(self, row: int) -> _MovieRow:
+        columns = self._columns
+        return _MovieRow(
+            id=int(columns.movie_ids[row]),
+            name=columns.names[row],
+            date=columns.dates[row].item(),
+            score=float(columns.scores[row]),
+            budget=float(columns.budgets[row]),
+            revenue=float(columns.revenues[row]),
+            country_id=int(columns.country_ids[row]),
+            memberships={},
+        )
+
+    def _memberships_of(self, movie_id: int) -> Dict[str, FrozenSet[int]]:
+        if movie_id in self._delta:
+            return self._delta[movie_id].memberships
+        row = self._row_of_movie.get(movie_id)
+        return {
+            family: frozenset() if row is None else frozenset(membership.entities_of(row).tolist())
+            for family, membership in self._columns.memberships.items()
+        }
+
+    def _install(self, columns: _Columns) -> None:
+        self._columns = columns
+        self._row_of_movie = {movie_id: row for row, movie_id in enumerate(columns.movie_ids.tolist())}
+        self._alive = np.ones(len(columns.movie_ids), dtype=bool)
+        self._delta: Dict[int, _MovieRow] = {}
+
+    def _tombstone(self, movie_id: int) -> None:
+        row = self._row_of_movie.get(movie_id)
+        if row is not None:
+            self._alive[row] = False
+
+    def _maybe_compact(self) -> None:
+        if len(self._delta) + int((~self._alive).sum()) > COMPACTION_THRESHOLD:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Rebuild the arrays from the live rows and the delta, without the database.
+        """
+        columns = self._columns
+        rows = np.flatnonzero(self._alive)
+        delta = list(self._delta.values())
+
+        links = {}
+        for family, membership in columns.memberships.items():
+            starts = membership.row_indptr[rows]
+            lengths = membership.row_indptr[rows + 1] - starts
+            delta_links = [(row.id, entity_id) for row in delta for entity_id in row.memberships[family]]
+            delta_links = np.array(delta_links, dtype=np.int64).reshape(-1, 2)
+            links[family] = (
+                np.concatenate([np.repeat(columns.movie_ids[rows], lengths), delta_links[:, 0]]),
+                np.concatenate([membership.row_entities[concatenated_ranges(starts, lengths)], delta_links[:, 1]]),
+            )
+
+        delta_ids = np.array([row.id for row in delta], dtype=np.int64)
+        delta_names = np.array([row.name for row in delta], dtype=object)
+        delta_country_ids = np.array([row.country_id for row in delta], dtype=np.int64)
+        self._install(_build_columns(
+            movie_ids=np.concatenate([columns.movie_ids[rows], delta_ids]),
+            names=np.concatenate([columns.names[rows], delta_names]),
+            dates=np.concatenate([columns.dates[rows], np.array([row.date for row in delta], dtype="datetime64[D]")]),
+            scores=np.concatenate([columns.scores[rows], [row.score for row in delta]]),
+            budgets=np.concatenate([columns.budgets[rows], [row.budget for row in delta]]),
+            revenues=np.concatenate([columns.revenues[rows], [row.revenue for row in delta]]),
+            country_ids=np.concatenate([columns.country_ids[rows], delta_country_ids]),
+            links=links,
+        ))
+
+
+catalogue_replica = CatalogueReplica()
@@ -0,0 +1,165 @@
+"""
+In-process fan-out of the movie change feed.
+
+Subscribers of `/theater/movies/changes/` wait here instead of polling the database themselves:
+`wait` returns as soon as a change newer than the subscriber's cursor may exist, and the subscriber
+then reads the outbox (`database.changes`). However many subscribers a worker has, it keeps one
+source of wake-ups:
+
+* on PostgreSQL, a single connection that `LISTEN`s on `CHANGE_FEED_CHANNEL`; the outbox insert
+  notifies it with the new sequence number on commit, including writes made by other workers;
+* on SQLite, which has no notifications, a single poller that reads the newest sequence number every
+  `CHANGE_FEED_POLL_INTERVAL_SECONDS` while anybody is waiting. An in-memory database cannot be
+  reached by another process, so there is nothing to poll for.
+
+Writes made by this worker also call `publish` right after committing, so local subscribers do not
+wait for the round trip.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed:
+    """
+    Wakes up the subscribers of the change feed when the outbox grows.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Stop the listener and forget the latest sequence number.
+
+        :return: None
+        """
+        if self._task is not None and not self._task.done() and not self._task.get_loop().is_closed():
+            self._task.cancel()
+        self._task = None
+        self._changed = asyncio.Event()
+        self.latest_sequence = 0
+        self.subscribers = 0
+
+    def stats(self) -> dict:
+        return {"latest_sequence": self.latest_sequence, "subscribers": self.subscribers}
+
+    def publish(self, sequence: int) -> None:
+        """
+        Record that the outbox holds changes up to `sequence` and wake every subscriber.
+
+        :param sequence: The sequence number of a committed change.
+        :return: None
+        """
+        if sequence <= self.latest_sequence:
+            return
+        self.latest_sequence = sequence
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self, after: int, timeout: float) -> bool:
+        """
+        Wait until a change with a sequence number greater than `after` has been committed.
+
+        :param after: The subscriber's cursor.
+        :param timeout: The longest time to wait, in seconds.
+        :return: True if there may be new changes, False on timeout.
+        """
+        self._ensure_listening()
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + timeout
+        self.subscribers += 1
+        try:
+            while self.latest_sequence <= after:
+                remaining = expires_at - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return self.latest_sequence > after
+            return True
+        finally:
+            self.subscribers -= 1
+
+    async def stop(self) -> None:
+        """
+        Stop the listener and wait for it to release its connection.
+
+        :return: None
+        """
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _ensure_listening(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def _refresh(self) -> None:
+        from database import get_db_contextmanager
+        from database.changes import get_latest_sequence
+
+        async with get_db_contextmanager() as session:
+            self.publish(await get_latest_sequence(session))
+
+    async def _listen(self) -> None:
+        from database import init_engines
+        from database.session_sqlite import is_in_memory_database
+
+        settings = get_settings()
+        while True:
+            try:
+                engine = init_engines()
+                if engine.dialect.name == "postgresql":
+                    await self._listen_postgresql(engine, settings.CHANGE_FEED_CHANNEL)
+                    logger.warning("The change feed listener lost its connection; reconnecting.")
+                elif is_in_memory_database():
+                    return
+                else:
+                    await self._poll(settings.CHANGE_FEED_POLL_INTERVAL_SECONDS)
+            except (SQLAlchemyError, OSError):
+                logger.warning("The change feed listener failed; restarting it.", exc_info=True)
+                await asyncio.sleep(settings.CHANGE_FEED_POLL_INTERVAL_SECONDS)
+
+    async def _listen_postgresql(self, engine, channel: str) -> None:  # noqa: ANN001
+        """
+        Hold one pooled connection in `LISTEN` until it is lost.
+        """
+        async with engine.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            listener = raw_connection.driver_connection
+            terminated = asyncio.Event()
+
+            def on_notification(_connection, _pid, _channel, payload: str) -> None:  # noqa: ANN001
+                self.publish(int(payload))
+
+            listener.add_termination_listener(lambda _connection: terminated.set())
+            await listener.add_listener(channel, on_notification)
+            try:
+                # Changes committed before LISTEN took effect were not notified.
+                await self._refresh()
+                await terminated.wait()
+            finally:
+                if not listener.is_closed():
+                    await listener.remove_listener(channel, on_notification)
+
+    async def _poll(self, interval: float) -> None:
+        while True:
+            if self.subscribers:
+                await self._refresh()
+            await asyncio.sleep(interval)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,101 @@
+"""
+Content-encoding negotiation and the codecs behind it.
+
+gzip is always available. Brotli (`brotli`) and Zstandard (`compression.zstd` on Python 3.14+, the
+`backports.zstd` package before) are used when installed. Among the encodings a client accepts, the
+one with the highest q-value wins; ties go to the first in `PREFERRED_ENCODINGS`.
+"""
+import gzip
+from typing import Callable, Dict, Optional
+
+from config import get_settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:  # pragma: no cover - depends on the environment
+        zstd = None
+
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "application/msgpack", "text/")
+PREFERRED_ENCODINGS = ("zstd", "br", "gzip")
+
+
+def _codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    settings = get_settings()
+    codecs = {"gzip": lambda body: gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        codecs["br"] = lambda body: brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    if zstd is not None:
+        codecs["zstd"] = lambda body: zstd.compress(body, level=settings.COMPRESSION_ZSTD_LEVEL)
+    return codecs
+
+
+def available_encodings() -> tuple[str, ...]:
+    """
+    :return: The content encodings this process can produce, most preferred first.
+    """
+    codecs = _codecs()
+    return tuple(encoding for encoding in PREFERRED_ENCODINGS if encoding in codecs)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content encoding for a response from the request's `Accept-Encoding` header.
+
+    :param accept_encoding: The raw header value, or None if it was not sent.
+    :return: An encoding from `PREFERRED_ENCODINGS`, or None for an uncompressed response.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        weight = 1.0
+        parameter_name, _, value = parameters.strip().partition("=")
+        if parameter_name.strip() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress `body` with one of the available encodings.
+
+    :param body: The uncompressed payload.
+    :param encoding: A name returned by `negotiate_encoding`.
+    :return: The compressed payload.
+    """
+    return _codecs()[encoding](body)
+
+
+def should_compress(media_type: Optional[str], size: int) -> bool:
+    """
+    Tell whether a response is worth compressing.
+
+    :param media_type: The response's content type.
+    :param size: The uncompressed body size in bytes.
+    :return: True for compressible media types of at least `COMPRESSION_MINIMUM_SIZE` bytes.
+    """
+    return (
+        media_type is not None
+        and media_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+        and size >= get_settings().COMPRESSION_MINIMUM_SIZE
+    )
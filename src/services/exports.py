@@ -0,0 +1,131 @@
+"""
+On-disk cache of the columnar catalogue exports (see `database.export`).
+
+An export is identified by its table, format and catalogue version (`get_catalogue_version`), and
+stored as `<table>-<version>.<format>` in `EXPORT_CACHE_DIR`. As long as the catalogue does not
+change, every download is served from that file; the first download after a change builds the new
+file. A build reads the version and the rows in one snapshot (`begin_snapshot`), so a file always
+holds the data of the version it is named after, which may be newer than the one the request asked
+for. After a build, the versions of the same table and format with a lower sequence number
+(`catalogue_version_sequence`) are removed once a newer one has been in place for
+`EXPORT_STALE_GRACE_SECONDS`, so that a request handed a path just before a newer build can still
+open it; younger ones are left for a later build to remove. Newer versions, which another worker
+may be serving, are kept. Workers sharing the directory share the files, since a file is renamed into place only once
+it is complete.
+
+Concurrent requests for a missing export wait for a single build. The build runs in its own task
+with its own session, so a request that gives up (a disconnect or its deadline) does not abort it:
+the next request finds the file ready.
+"""
+import asyncio
+import glob
+import os
+import time
+import uuid
+from contextlib import suppress
+from typing import Dict, Optional, Tuple
+
+from config import get_settings
+from database.changes import catalogue_version_sequence, get_catalogue_version
+from database.utils import begin_snapshot
+
+
+class ExportCache:
+    """
+    Build columnar exports on demand and keep the latest version of each on disk.
+    """
+
+    def __init__(self) -> None:
+        self._builds: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.builds = 0
+
+    def reset(self) -> None:
+        """
+        Cancel the running builds, delete the cached files and zero the counters.
+
+        :return: None
+        """
+        for task in self._builds.values():
+            if not task.done() and not task.get_loop().is_closed():
+                task.cancel()
+        self._builds = {}
+        for path in glob.glob(os.path.join(get_settings().EXPORT_CACHE_DIR, "*-*.*")):
+            with suppress(FileNotFoundError):
+                os.remove(path)
+        self.hits = 0
+        self.builds = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "builds": self.builds, "building": len(self._builds)}
+
+    @staticmethod
+    def path(table: str, export_format: str, version: str) -> str:
+        return os.path.join(get_settings().EXPORT_CACHE_DIR, f"{table}-{version}.{export_format}")
+
+    async def get(self, table: str, export_format: str, version: str) -> Tuple[str, str]:
+        """
+        Return the export of a table at a catalogue version, building it if needed.
+
+        :param table: A key of `database.export.EXPORT_TABLES`.
+        :param export_format: A key of `database.export.EXPORT_FORMATS`.
+        :param version: The current catalogue version.
+        :return: The path of the export file and the version it holds, which is newer than `version`
+            if the catalogue changed before the build read it.
+        """
+        path = self.path(table, export_format, version)
+        if os.path.exists(path):
+            self.hits += 1
+            return path, version
+
+        key = (table, export_format, version)
+        task: Optional[asyncio.Task] = self._builds.get(key)
+        if task is None:
+            self.builds += 1
+            task = asyncio.create_task(self._build(table, export_format))
+            self._builds[key] = task
+            task.add_done_callback(lambda _task: self._builds.pop(key, None))
+        built_version = await asyncio.shield(task)
+        return self.path(table, export_format, built_version), built_version
+
+    async def _build(self, table: str, export_format: str) -> str:
+        from database import get_db_contextmanager
+        from database.export import write_export
+
+        directory = get_settings().EXPORT_CACHE_DIR
+        os.makedirs(directory, exist_ok=True)
+        partial_path = os.path.join(directory, f"{table}.{uuid.uuid4().hex}.partial")
+        try:
+            async with get_db_contextmanager() as session:
+                await begin_snapshot(session)
+                version = await get_catalogue_version(session)
+                path = self.path(table, export_format, version)
+                if os.path.exists(path):
+                    return version
+                with open(partial_path, "wb") as sink:
+                    await write_export(session, table, export_format, sink)
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        sequence = catalogue_version_sequence(version)
+        settled_before = time.time() - get_settings().EXPORT_STALE_GRACE_SECONDS
+        versions = []
+        for other_path in glob.glob(self.path(table, export_format, "*")):
+            other_version = os.path.basename(other_path)[len(table) + 1:-len(export_format) - 1]
+            other_sequence = catalogue_version_sequence(other_version)
+            if other_sequence <= sequence:
+                with suppress(FileNotFoundError):
+                    versions.append((other_sequence, os.stat(other_path).st_mtime, other_path))
+        settled = max(
+            (other_sequence for other_sequence, modified, _ in versions if modified <= settled_before), default=None
+        )
+        for other_sequence, _, stale_path in versions:
+            if settled is not None and other_sequence < settled:
+                with suppress(FileNotFoundError):
+                    os.remove(stale_path)
+        return version
+
+
+export_cache = ExportCache()
@@ -0,0 +1,215 @@
+"""
+Which movies are hot: a bounded heavy-hitters tracker over movie detail reads.
+
+`SpaceSaving` is the Space-Saving algorithm (Metwally et al.): it keeps at most `capacity`
+counters. A movie that already has a counter gets it incremented. A new movie takes over the
+smallest counter and inherits its count as its possible overcount (`error`). Every movie read more
+than `total / capacity` times is guaranteed to hold a counter, and `count - error` bounds its true
+number of reads from below. The smallest counter is found through a heap of (count, movie ID)
+pairs that is updated lazily: stale pairs are skipped when popped and dropped when the heap is
+rebuilt, so memory stays O(capacity).
+
+`HotMovies` wraps the tracker for the detail route. It also runs the background tasks that put
+the hottest movies back into the response cache after a write has invalidated them (see
+`routes.movies.warm_movie_details`). The counters are snapshotted to the database
+(`database.hot_movies`), so that a restarted worker can warm its cache before the first request.
+"""
+import asyncio
+import heapq
+import logging
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import get_settings
+from database.hot_movies import load_movie_hits, save_movie_hits
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HeavyHitter:
+    key: Hashable
+    count: int
+    error: int
+
+
+class SpaceSaving:
+    """
+    Approximate top-K counting in O(capacity) memory.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1.")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        self._heap: List[Tuple[int, Hashable]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._counts
+
+    def record(self, key: Hashable, weight: int = 1) -> None:
+        """
+        Count `weight` occurrences of `key`.
+
+        :param key: The item seen.
+        :param weight: How many times it was seen.
+        :return: None
+        """
+        self.total += weight
+        if key in self._counts:
+            self._counts[key] += weight
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = weight
+            self._errors[key] = 0
+        else:
+            smallest_key, smallest = self._pop_smallest()
+            del self._counts[smallest_key], self._errors[smallest_key]
+            self._counts[key] = smallest + weight
+            self._errors[key] = smallest
+        heapq.heappush(self._heap, (self._counts[key], key))
+        if len(self._heap) > 2 * self.capacity:
+            self._heap = [(count, counted_key) for counted_key, count in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, k: int) -> List[HeavyHitter]:
+        """
+        :param k: The number of items to return.
+        :return: The `k` items with the highest counts, highest first; ties in key order.
+        """
+        largest = heapq.nsmallest(k, self._counts.items(), key=lambda item: (-item[1], item[0]))
+        return [HeavyHitter(key=key, count=count, error=self._errors[key]) for key, count in largest]
+
+    def _pop_smallest(self) -> Tuple[Hashable, int]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return key, count
+
+
+class HotMovies:
+    """
+    The heavy hitters among movie detail reads, and the tasks that keep them cached.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Set[asyncio.Task] = set()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Cancel the running warm-ups and forget every counter.
+
+        :return: None
+        """
+        for task in self._tasks:
+            if not task.done() and not task.get_loop().is_closed():
+                task.cancel()
+        self._tracker = SpaceSaving(get_settings().HOT_MOVIES_CAPACITY)
+        self.warmed = 0
+
+    def stats(self) -> dict:
+        return {"tracked": len(self._tracker), "reads": self._tracker.total, "warmed": self.warmed}
+
+    def record(self, movie_id: int, reads: int = 1) -> None:
+        self._tracker.record(movie_id, reads)
+
+    def top(self, k: int) -> List[HeavyHitter]:
+        return self._tracker.top(k)
+
+    def hottest(self, movie_ids: Iterable[int]) -> List[int]:
+        """
+        :param movie_ids: Candidate movies, e.g. those a write just invalidated.
+        :return: The candidates that are among the `HOT_MOVIES_WARM_COUNT` hottest movies.
+        """
+        hot = {hitter.key for hitter in self.top(get_settings().HOT_MOVIES_WARM_COUNT)}
+        return [movie_id for movie_id in movie_ids if movie_id in hot]
+
+    def schedule_warm(self, warm: Callable[[], Awaitable[int]]) -> None:
+        """
+        Run a cache warm-up in the background; errors are logged, not raised.
+
+        :param warm: A coroutine function returning the number of cached responses.
+        :return: None
+        """
+        task = asyncio.create_task(self._warm(warm))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def save(self) -> int:
+        """
+        Write the counters to the database, keeping the `HOT_MOVIES_CAPACITY` hottest movies there.
+
+        :return: The number of movies written.
+        """
+        from database import get_write_db_contextmanager
+
+        capacity = get_settings().HOT_MOVIES_CAPACITY
+        hits = [(hitter.key, hitter.count) for hitter in self.top(capacity)]
+        async with get_write_db_contextmanager() as session:
+            written = await save_movie_hits(session, hits, capacity)
+            await session.commit()
+        return written
+
+    async def restore(self) -> List[int]:
+        """
+        Seed the counters from the last snapshot.
+
+        :return: The IDs of the `HOT_MOVIES_WARM_COUNT` hottest movies, hottest first.
+        """
+        from database import get_db_contextmanager
+
+        settings = get_settings()
+        async with get_db_contextmanager() as session:
+            hits = await load_movie_hits(session, settings.HOT_MOVIES_CAPACITY)
+        for movie_id, reads in hits:
+            if movie_id not in self._tracker:
+                self.record(movie_id, reads)
+        return [hitter.key for hitter in self.top(settings.HOT_MOVIES_WARM_COUNT)]
+
+    async def save_periodically(self) -> None:
+        """
+        Run `save` every `HOT_MOVIES_SNAPSHOT_INTERVAL_SECONDS` until cancelled.
+
+        Database errors, including the `OSError` asyncpg raises when it cannot connect, are logged and
+        retried on the next tick.
+
+        :return: None
+        """
+        settings = get_settings()
+        while True:
+            await asyncio.sleep(settings.HOT_MOVIES_SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                await self.save()
+            except (SQLAlchemyError, OSError):
+                logger.warning("Saving the hot movies failed; retrying on the next run.", exc_info=True)
+
+    async def stop(self) -> None:
+        """
+        Cancel the running warm-up tasks.
+
+        :return: None
+        """
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _warm(self, warm: Callable[[], Awaitable[int]]) -> None:
+        try:
+            self.warmed += await warm()
+        except Exception:
+            logger.warning("Warming the movie detail cache failed.", exc_info=True)
+
+
+hot_movies = HotMovies()
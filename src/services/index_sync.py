@@ -0,0 +1,222 @@
+"""
+Keeps the in-process indexes in step with writes made elsewhere.
+
+The related-movies index, the actor graph, the actor autocomplete index and the catalogue replica
+are built by their `load` from the database, which also records the newest outbox sequence number
+the load saw (`synced_sequence`). Writes made by this worker's routes update them right after the
+commit. Every other write, made by another worker or by an upload job, reaches them through the
+outbox (`database.changes`): `IndexSync.sync` reads the changes past the lowest cursor of the
+loaded indexes, loads the current rows and links of the changed movies in one batch, and applies
+each movie to every index whose cursor is behind it, as an upsert or, for a movie that is gone, a
+removal. Applying a movie an index already reflects changes nothing, so the worker's own writes
+can be replayed safely.
+
+`run`, which the lifespan starts, calls `sync` whenever the change feed (`services.change_feed`)
+reports a newer sequence, at most every `INDEX_SYNC_INTERVAL_SECONDS`. An index that has not been
+synced for `CHANGE_FEED_RETENTION_SECONDS` may have missed changes that were pruned since, so it is
+reset and reloads on its next use instead.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database.associations import MOVIE_ASSOCIATIONS, load_movie_associations
+from database.changes import get_movie_changes
+from database.models import MovieChangeModel, MovieModel
+from services.actor_autocomplete import actor_autocomplete
+from services.actor_graph import actor_graph
+from services.catalogue_replica import catalogue_replica
+from services.change_feed import change_feed
+from services.related_movies import related_movies_index
+
+logger = logging.getLogger(__name__)
+
+MovieLinks = Dict[str, List[Dict[str, Any]]]
+Applier = Callable[[int, Optional[MovieModel], MovieLinks], None]
+
+
+def _apply_related(movie_id: int, movie: Optional[MovieModel], links: MovieLinks) -> None:
+    if movie is None:
+        related_movies_index.remove_movie(movie_id)
+        return
+    related_movies_index.upsert_movie(
+        movie_id,
+        actor_ids=[actor["id"] for actor in links["actors"]],
+        genre_ids=[genre["id"] for genre in links["genres"]],
+        language_ids=[language["id"] for language in links["languages"]],
+    )
+
+
+def _apply_actor_graph(movie_id: int, movie: Optional[MovieModel], links: MovieLinks) -> None:
+    if movie is None:
+        actor_graph.remove_movie(movie_id)
+    else:
+        actor_graph.set_movie_cast(movie_id, [actor["id"] for actor in links["actors"]])
+
+
+def _apply_autocomplete(movie_id: int, movie: Optional[MovieModel], links: MovieLinks) -> None:
+    actor_autocomplete.add_actors((actor["id"], actor["name"]) for actor in links["actors"])
+
+
+def _apply_replica(movie_id: int, movie: Optional[MovieModel], links: MovieLinks) -> None:
+    if movie is None:
+        catalogue_replica.remove_movie(movie_id)
+    else:
+        catalogue_replica.upsert_movie(
+            movie,
+            {association: [entity["id"] for entity in links[association]] for association in links},
+            {association: [(entity["id"], entity["name"]) for entity in links[association]] for association in links},
+        )
+
+
+SYNCED_INDEXES: Tuple[Tuple[Any, Applier], ...] = (
+    (related_movies_index, _apply_related),
+    (actor_graph, _apply_actor_graph),
+    (actor_autocomplete, _apply_autocomplete),
+    (catalogue_replica, _apply_replica),
+)
+
+
+class IndexSync:
+    """
+    Replays the outbox into the loaded in-process indexes.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Set[asyncio.Task] = set()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Cancel the scheduled syncs and zero the counters.
+
+        :return: None
+        """
+        for task in self._tasks:
+            if not task.done() and not task.get_loop().is_closed():
+                task.cancel()
+        self._tasks = set()
+        self._lock = asyncio.Lock()
+        self._queued = False
+        self._synced_at = time.monotonic()
+        self.applied = 0
+
+    def stats(self) -> dict:
+        return {"applied_changes": self.applied, "cursor": self._cursor()}
+
+    def schedule(self) -> None:
+        """
+        Run `sync` in the background, unless a scheduled one has not started yet.
+
+        :return: None
+        """
+        if self._queued:
+            return
+        self._queued = True
+        task = asyncio.create_task(self._sync_logged())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def sync(self) -> int:
+        """
+        Apply every committed change the loaded indexes have not seen yet.
+
+        :return: The number of changes read from the outbox.
+        """
+        from database import get_db_contextmanager
+
+        settings = get_settings()
+        async with self._lock:
+            self._queued = False
+            loaded = [(index, apply) for index, apply in SYNCED_INDEXES if index.is_loaded]
+            if not loaded:
+                self._synced_at = time.monotonic()
+                return 0
+            if time.monotonic() - self._synced_at > settings.CHANGE_FEED_RETENTION_SECONDS:
+                for index, _ in loaded:
+                    index.reset()
+                self._synced_at = time.monotonic()
+                return 0
+
+            cursor = min(index.synced_sequence for index, _ in loaded)
+            read = 0
+            async with get_db_contextmanager() as session:
+                while changes := await get_movie_changes(session, cursor, settings.INDEX_SYNC_BATCH_SIZE):
+                    await self._apply(session, loaded, changes)
+                    cursor = changes[-1].sequence
+                    read += len(changes)
+            self._synced_at = time.monotonic()
+            self.applied += read
+            return read
+
+    async def run(self) -> None:
+        """
+        Call `sync` whenever the change feed moves past the indexes, until cancelled.
+
+        Database errors, and the `OSError`s asyncpg raises while the server is unreachable, are
+        logged and retried on the next change, so the loop outlives a database restart.
+
+        :return: None
+        """
+        settings = get_settings()
+        while True:
+            await change_feed.wait(self._cursor(), settings.CHANGE_FEED_HEARTBEAT_SECONDS)
+            await self._sync_logged()
+            await asyncio.sleep(settings.INDEX_SYNC_INTERVAL_SECONDS)
+
+    async def stop(self) -> None:
+        """
+        Cancel the scheduled syncs and wait for them to end.
+
+        :return: None
+        """
+        tasks, self._tasks = list(self._tasks), set()
+        self._queued = False
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _cursor(self) -> int:
+        cursors = [index.synced_sequence for index, _ in SYNCED_INDEXES if index.is_loaded]
+        return min(cursors) if cursors else change_feed.latest_sequence
+
+    async def _sync_logged(self) -> None:
+        try:
+            await self.sync()
+        except (SQLAlchemyError, OSError):
+            logger.warning("Syncing the in-process indexes failed; retrying on the next change.", exc_info=True)
+
+    @staticmethod
+    async def _apply(
+            session: AsyncSession,
+            loaded: List[Tuple[Any, Applier]],
+            changes: List[MovieChangeModel]
+    ) -> None:
+        cursors = [index.synced_sequence for index, _ in loaded]
+        latest: Dict[int, int] = {}
+        for change in changes:
+            latest[change.movie_id] = change.sequence
+        result = await session.execute(select(MovieModel).where(MovieModel.id.in_(list(latest))))
+        movies = {movie.id: movie for movie in result.scalars()}
+        links = await load_movie_associations(session, list(movies), MOVIE_ASSOCIATIONS)
+        # An index that was reset or reloaded while the batch was read may already be newer than
+        # the batch; it is left to the next sync.
+        for (index, apply), cursor in zip(loaded, cursors):
+            if not index.is_loaded or index.synced_sequence != cursor:
+                continue
+            for movie_id, sequence in latest.items():
+                if sequence > index.synced_sequence:
+                    movie = movies.get(movie_id)
+                    apply(movie_id, movie, {
+                        association: links[association].get(movie_id, []) for association in MOVIE_ASSOCIATIONS
+                    })
+            index.synced_sequence = max(index.synced_sequence, changes[-1].sequence)
+
+
+index_sync = IndexSync()
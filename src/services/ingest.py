@@ -0,0 +1,140 @@
+"""
+Background ingestion of uploaded movie CSVs.
+
+An upload is stored in a temporary file and handed to `ingest_jobs.start`, which returns at once
+with a job that clients poll for progress. The job feeds the file to
+`database.populate.upsert_csv_in_chunks`, so only one chunk of rows is in memory and in a
+transaction at a time, and reports every committed chunk to the `on_chunk` callback, which keeps the
+in-process caches and indexes in step with the database. Jobs run one after another: they all write,
+and SQLite has a single writer anyway.
+
+The registry lives in the worker that accepted the upload and keeps the last `INGEST_JOB_HISTORY`
+jobs; a restart forgets them, along with any job that was still running.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, TYPE_CHECKING
+
+from config import get_settings
+
+if TYPE_CHECKING:
+    from database.populate import ChunkResult
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@dataclass
+class IngestJob:
+    """
+    The progress of one uploaded CSV.
+    """
+    id: str
+    filename: str
+    bytes_total: int
+    status: str = "pending"
+    bytes_read: int = 0
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    rejected: int = 0
+    error: Optional[str] = None
+    created_at: datetime.datetime = field(default_factory=_now)
+    finished_at: Optional[datetime.datetime] = None
+
+
+class IngestJobs:
+    """
+    Run ingestion jobs one at a time and remember the recent ones.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Cancel the running jobs and forget every job.
+
+        :return: None
+        """
+        for task in self._tasks.values():
+            if not task.done() and not task.get_loop().is_closed():
+                task.cancel()
+        self._tasks = {}
+        self._jobs: OrderedDict[str, IngestJob] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def start(
+            self,
+            filename: str,
+            path: str,
+            on_chunk: Callable[["ChunkResult"], None]
+    ) -> IngestJob:
+        """
+        Queue the ingestion of a CSV file. The file is deleted once the job ends.
+
+        :param filename: The name the client gave the file.
+        :param path: The path of the stored upload.
+        :param on_chunk: Called after every committed chunk.
+        :return: The new job, in the "pending" state.
+        """
+        # Jobs that fall out of the history keep running; `_tasks` holds them until they end.
+        job = IngestJob(id=uuid.uuid4().hex, filename=filename, bytes_total=os.path.getsize(path))
+        self._jobs[job.id] = job
+        while len(self._jobs) > get_settings().INGEST_JOB_HISTORY:
+            self._jobs.popitem(last=False)
+        task = asyncio.create_task(self._run(job, path, on_chunk))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _task: self._tasks.pop(job.id, None))
+        return job
+
+    async def stop(self) -> None:
+        """
+        Cancel the running jobs and wait for them to end.
+
+        :return: None
+        """
+        tasks, self._tasks = list(self._tasks.values()), {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: IngestJob, path: str, on_chunk: Callable[["ChunkResult"], None]) -> None:
+        from database.populate import upsert_csv_in_chunks
+
+        try:
+            async with self._lock:
+                job.status = "running"
+                async for chunk in upsert_csv_in_chunks(path, get_settings().INGEST_CHUNK_SIZE):
+                    job.bytes_read = chunk.bytes_read
+                    job.rows += chunk.rows
+                    job.created += len(chunk.created_ids)
+                    job.updated += len(chunk.updated_ids)
+                    job.rejected += chunk.rejected
+                    on_chunk(chunk)
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as exc:
+            logger.exception("Ingestion job %s failed.", job.id)
+            job.status = "failed"
+            job.error = str(exc) or type(exc).__name__
+        finally:
+            job.finished_at = _now()
+            os.remove(path)
+
+
+ingest_jobs = IngestJobs()
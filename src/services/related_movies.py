@@ -0,0 +1,271 @@
+"""
+In-memory related-movies index.
+
+Every movie is a sparse row over three feature families: its actors, genres and languages.
+Feature weights combine a per-family weight with an inverse document frequency, so sharing a rare
+actor counts for more than sharing the "Drama" genre. Similarity is weighted Jaccard:
+
+    sim(a, b) = w(a ∩ b) / (w(a) + w(b) - w(a ∩ b))
+
+The matrix is stored twice as flat NumPy arrays, row-major (movie -> features) and column-major
+(feature -> movies), so a query gathers the postings of the movie's features and accumulates the
+intersection weights of all candidates with one `np.bincount`.
+
+Writes do not rebuild the arrays. A written movie is tombstoned in the arrays and kept in a small
+Python delta instead; once the delta grows past `COMPACTION_THRESHOLD` the arrays are rebuilt from
+memory without touching the database.
+"""
+import asyncio
+import math
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.changes import get_latest_sequence
+from database.models import ActorsMoviesModel, MovieModel, MoviesGenresModel, MoviesLanguagesModel
+from services.arrays import concatenated_ranges
+
+FEATURE_FAMILY_WEIGHTS = {"actor": 1.0, "genre": 0.5, "language": 0.25}
+COMPACTION_THRESHOLD = 1024
+
+FeatureKey = Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class _Matrix:
+    movie_ids: np.ndarray
+    row_indptr: np.ndarray
+    row_features: np.ndarray
+    column_indptr: np.ndarray
+    column_rows: np.ndarray
+    feature_weights: np.ndarray
+    row_weights: np.ndarray
+
+
+class RelatedMoviesIndex:
+    """
+    Top-K similar movies over shared actors, genres and languages.
+    """
+
+    def __init__(self) -> None:
+        self._load_lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop all indexed data; the next query reloads it from the database.
+
+        :return: None
+        """
+        self._loaded = False
+        self.synced_sequence = 0
+        self._movie_features: Dict[int, FrozenSet[int]] = {}
+        self._feature_ids: Dict[FeatureKey, int] = {}
+        self._feature_families: List[str] = []
+        self._matrix: Optional[_Matrix] = None
+        self._row_of_movie: Dict[int, int] = {}
+        self._alive: np.ndarray = np.zeros(0, dtype=bool)
+        self._delta: Dict[int, FrozenSet[int]] = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Build the index from the association tables.
+
+        :param session: The async database session to read from.
+        :return: None
+        """
+        async with self._load_lock:
+            sequence = await get_latest_sequence(session)
+            movie_ids = (await session.execute(select(MovieModel.id))).scalars().all()
+            memberships: Dict[int, set] = {movie_id: set() for movie_id in movie_ids}
+            self._feature_ids, self._feature_families = {}, []
+
+            for family, table, column in (
+                    ("actor", ActorsMoviesModel, ActorsMoviesModel.c.actor_id),
+                    ("genre", MoviesGenresModel, MoviesGenresModel.c.genre_id),
+                    ("language", MoviesLanguagesModel, MoviesLanguagesModel.c.language_id),
+            ):
+                for movie_id, entity_id in (await session.execute(select(table.c.movie_id, column))).all():
+                    memberships.setdefault(movie_id, set()).add(self._feature_id(family, entity_id))
+
+            self._movie_features = {movie_id: frozenset(features) for movie_id, features in memberships.items()}
+            self._compact()
+            self.synced_sequence = sequence
+            self._loaded = True
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if not self._loaded:
+            await self.load(session)
+
+    def upsert_movie(
+            self,
+            movie_id: int,
+            actor_ids: Iterable[int],
+            genre_ids: Iterable[int],
+            language_ids: Iterable[int]
+    ) -> None:
+        """
+        Record the current memberships of a created or updated movie.
+
+        :param movie_id: The ID of the movie.
+        :param actor_ids: IDs of the movie's actors.
+        :param genre_ids: IDs of the movie's genres.
+        :param language_ids: IDs of the movie's languages.
+        :return: None
+        """
+        if not self._loaded:
+            return
+        features = frozenset(
+            [self._feature_id("actor", entity_id) for entity_id in actor_ids]
+            + [self._feature_id("genre", entity_id) for entity_id in genre_ids]
+            + [self._feature_id("language", entity_id) for entity_id in language_ids]
+        )
+        if self._movie_features.get(movie_id) == features:
+            return
+        self._movie_features[movie_id] = features
+        self._tombstone(movie_id)
+        self._delta[movie_id] = features
+        self._maybe_compact()
+
+    def remove_movie(self, movie_id: int) -> None:
+        """
+        Forget a deleted movie.
+
+        :param movie_id: The ID of the movie.
+        :return: None
+        """
+        if not self._loaded:
+            return
+        self._movie_features.pop(movie_id, None)
+        self._tombstone(movie_id)
+        self._delta.pop(movie_id, None)
+        self._maybe_compact()
+
+    def related(self, movie_id: int, limit: int) -> Optional[List[Tuple[int, float]]]:
+        """
+        Return the most similar movies.
+
+        :param movie_id: The ID of the movie to find neighbours for.
+        :param limit: The maximum number of results.
+        :return: A list of (movie_id, similarity) pairs, best first, or None if the movie is unknown.
+        """
+        features = self._movie_features.get(movie_id)
+        if features is None:
+            return None
+        if not features:
+            return []
+
+        matrix = self._matrix
+        query_features = np.fromiter(
+            (feature for feature in features if feature < len(matrix.feature_weights)), dtype=np.int64
+        )
+        query_weight = self._weight_of(features)
+        candidates: List[Tuple[int, float]] = []
+
+        if query_features.size:
+            starts = matrix.column_indptr[query_features]
+            lengths = matrix.column_indptr[query_features + 1] - starts
+            postings = matrix.column_rows[concatenated_ranges(starts, lengths)]
+            intersections = np.bincount(
+                postings,
+                weights=np.repeat(matrix.feature_weights[query_features], lengths),
+                minlength=len(matrix.movie_ids),
+            )
+            similarities = intersections / np.maximum(matrix.row_weights + query_weight - intersections, 1e-12)
+            similarities[~self._alive] = 0.0
+            own_row = self._row_of_movie.get(movie_id)
+            if own_row is not None:
+                similarities[own_row] = 0.0
+
+            top = min(limit, int(np.count_nonzero(similarities)))
+            if top:
+                best_rows = np.argpartition(-similarities, top - 1)[:top]
+                candidates.extend(
+                    (int(matrix.movie_ids[row]), float(similarities[row])) for row in best_rows
+                )
+
+        for other_id, other_features in self._delta.items():
+            if other_id == movie_id:
+                continue
+            intersection = self._weight_of(features & other_features)
+            if intersection:
+                union = query_weight + self._weight_of(other_features) - intersection
+                candidates.append((other_id, intersection / union))
+
+        candidates.sort(key=lambda candidate: (-candidate[1], -candidate[0]))
+        return candidates[:limit]
+
+    def _feature_id(self, family: str, entity_id: int) -> int:
+        key = (family, entity_id)
+        feature_id = self._feature_ids.get(key)
+        if feature_id is None:
+            feature_id = self._feature_ids[key] = len(self._feature_families)
+            self._feature_families.append(family)
+        return feature_id
+
+    def _weight_of(self, features: Iterable[int]) -> float:
+        weights = self._matrix.feature_weights
+        total = 0.0
+        for feature in features:
+            if feature < len(weights):
+                total += weights[feature]
+            else:
+                total += FEATURE_FAMILY_WEIGHTS[self._feature_families[feature]] * math.log1p(
+                    max(len(self._movie_features), 1)
+                )
+        return total
+
+    def _tombstone(self, movie_id: int) -> None:
+        row = self._row_of_movie.get(movie_id)
+        if row is not None:
+            self._alive[row] = False
+
+    def _maybe_compact(self) -> None:
+        if len(self._delta) > COMPACTION_THRESHOLD:
+            self._compact()
+
+    def _compact(self) -> None:
+        movie_ids = np.array(sorted(self._movie_features), dtype=np.int64)
+        row_lengths = np.array([len(self._movie_features[movie_id]) for movie_id in movie_ids.tolist()],
+                               dtype=np.int64)
+        row_indptr = np.zeros(len(movie_ids) + 1, dtype=np.int64)
+        np.cumsum(row_lengths, out=row_indptr[1:])
+        row_features = np.fromiter(
+            (feature for movie_id in movie_ids.tolist() for feature in sorted(self._movie_features[movie_id])),
+            dtype=np.int64,
+            count=int(row_indptr[-1]),
+        )
+        feature_rows = np.repeat(np.arange(len(movie_ids), dtype=np.int64), row_lengths)
+
+        feature_count = len(self._feature_families)
+        document_frequency = np.bincount(row_features, minlength=feature_count)
+        order = np.argsort(row_features, kind="stable")
+        column_indptr = np.zeros(feature_count + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=column_indptr[1:])
+
+        family_weights = np.array([FEATURE_FAMILY_WEIGHTS[family] for family in self._feature_families])
+        feature_weights = family_weights * np.log1p(max(len(movie_ids), 1) / np.maximum(document_frequency, 1))
+        row_weights = np.bincount(feature_rows, weights=feature_weights[row_features], minlength=len(movie_ids))
+
+        self._matrix = _Matrix(
+            movie_ids=movie_ids,
+            row_indptr=row_indptr,
+            row_features=row_features,
+            column_indptr=column_indptr,
+            column_rows=feature_rows[order],
+            feature_weights=feature_weights,
+            row_weights=row_weights,
+        )
+        self._row_of_movie = {movie_id: row for row, movie_id in enumerate(movie_ids.tolist())}
+        self._alive = np.ones(len(movie_ids), dtype=bool)
+        self._delta = {}
+
+
+related_movies_index = RelatedMoviesIndex()
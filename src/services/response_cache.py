@@ -0,0 +1,168 @@
+"""
+In-process cache of serialized responses with precompressed variants.
+
+An entry keeps the uncompressed body and, once a client has asked for it, the body in every content
+encoding, so a cache hit costs no serialization and no compression. Entries carry tags such as
+`movie:42` or `movies`; the write routes invalidate the tags they touch. A load that started before
+an invalidation cannot store its (possibly stale) result afterwards: `token()` is taken before the
+load and `set()` drops the entry if any of its tags was invalidated in between.
+
+The cache only sees writes made by its own worker; `RESPONSE_CACHE_TTL_SECONDS` bounds how long
+another worker's write can go unnoticed. Entries stored by a warm-up of the hot movies live for
+`HOT_MOVIES_WARM_TTL_SECONDS` instead, so that the warm-up at startup still helps when traffic
+arrives; for those movies, that is the window in which another worker's write can go unnoticed.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from config import get_settings
+from services.compression import compress, negotiate_encoding, should_compress
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: str
+    tags: Tuple[str, ...]
+    expires_at: float
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def encode(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Return the body in `encoding`, compressing it on first use only.
+
+        :param encoding: The negotiated content encoding, or None.
+        :return: The body and the encoding actually applied (None when left uncompressed).
+        """
+        if encoding is None or not should_compress(self.media_type, len(self.body)):
+            return self.body, None
+        if encoding not in self.encoded:
+            self.encoded[encoding] = compress(self.body, encoding)
+        return self.encoded[encoding], encoding
+
+    def to_response(self, request: Request) -> Response:
+        """
+        Build the response for `request`, honouring its `Accept-Encoding`.
+
+        :param request: The incoming request.
+        :return: A response with the cached body in the negotiated encoding.
+        """
+        body, encoding = self.encode(negotiate_encoding(request.headers.get("accept-encoding")))
+        headers = {"Vary": "Accept, Accept-Encoding"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class ResponseCache:
+    """
+    An LRU of serialized responses with TTL expiry and tag-based invalidation.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop every entry and zero the counters.
+
+        :return: None
+        """
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._tag_versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """
+        :param key: The cache key, e.g. from `request_flight_key`.
+        :return: The live entry, or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def peek(self, key: Hashable) -> Optional[CachedResponse]:
+        """
+        Like `get`, but without counting a hit or miss or refreshing the entry's LRU position.
+
+        :param key: The cache key.
+        :return: The live entry, or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        return entry
+
+    def token(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """
+        Capture the versions of `tags` before loading the data for an entry.
+
+        :param tags: The tags the entry will carry.
+        :return: An opaque token for `set`.
+        """
+        return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def set(
+            self,
+            key: Hashable,
+            body: bytes,
+            tags: Tuple[str, ...],
+            token: Tuple[int, ...],
+            media_type: str = "application/json",
+            ttl: Optional[float] = None
+    ) -> CachedResponse:
+        """
+        Store a serialized response, unless one of its tags was invalidated since `token` was taken.
+
+        :param key: The cache key.
+        :param body: The uncompressed response body.
+        :param tags: Tags for invalidation.
+        :param token: The result of `token(tags)` taken before the data was loaded.
+        :param media_type: The response's content type.
+        :param ttl: Seconds until the entry expires; defaults to `RESPONSE_CACHE_TTL_SECONDS`.
+        :return: The entry, which is returned (but not stored) even when it is already stale.
+        """
+        settings = get_settings()
+        ttl = settings.RESPONSE_CACHE_TTL_SECONDS if ttl is None else ttl
+        entry = CachedResponse(
+            body=body,
+            media_type=media_type,
+            tags=tags,
+            expires_at=time.monotonic() + ttl,
+        )
+        if self.token(tags) == token and ttl > 0:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.RESPONSE_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        """
+        Drop every entry carrying one of `tags` and block in-flight loads from storing them.
+
+        :param tags: The tags to invalidate.
+        :return: None
+        """
+        for tag in tags:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+        stale = [key for key, entry in self._entries.items() if not set(entry.tags).isdisjoint(tags)]
+        for key in stale:
+            del self._entries[key]
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,132 @@
+"""
+Request coalescing ("single flight") for identical concurrent reads.
+
+When several requests ask for the same thing at the same time, only the first one (the leader) runs
+the work; the others (followers) wait for its result instead of repeating the query. Nothing is
+cached: once the leader finishes, the next request starts a new flight.
+
+* An error raised by the leader is raised in every follower too.
+* If the leader is cancelled (e.g. its client went away), the followers do not inherit the
+  cancellation: the first of them to wake up becomes the new leader and runs the work itself.
+* A cancelled follower only stops waiting; the flight goes on for everybody else.
+
+A follower that arrives while the leader is still running may see data read just before a
+concurrent write committed, which is the same window a slightly earlier request would have had.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Tuple, TypeVar
+
+from starlette.requests import Request
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Share the result of one in-flight call among concurrent callers with the same key.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Zero the counters. In-flight calls are left alone.
+
+        :return: None
+        """
+        self.executions = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        """
+        Report how many calls were served by an already running flight.
+
+        :return: A mapping with the call counters and the coalescing ratio (coalesced / calls).
+        """
+        calls = self.executions + self.coalesced
+        return {
+            "calls": calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalescing_ratio": self.coalesced / calls if calls else 0.0,
+            "in_flight": self.in_flight,
+        }
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `func`, or wait for the identical call that is already running under `key`.
+
+        :param key: Identifies calls that are interchangeable.
+        :param func: The coroutine function doing the work; only the leader calls it.
+        :return: The result of the leader's call.
+        """
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, func)
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if flight.cancelled() and not _current_task_cancelling():
+                    continue
+                raise
+
+    async def _lead(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        self.executions += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+
+def _current_task_cancelling() -> bool:
+    task = asyncio.current_task()
+    cancelling = getattr(task, "cancelling", None)
+    return bool(cancelling and cancelling())
+
+
+def request_flight_key(request: Request) -> str:
+    """
+    Build a coalescing key from the route path and the query parameters in a canonical order.
+
+    :param request: The incoming request.
+    :return: A key shared by requests that ask for the same resource.
+    """
+    return path_flight_key(request.url.path, request.query_params.multi_items())
+
+
+def path_flight_key(path: str, query_items: Iterable[Tuple[str, str]] = ()) -> str:
+    """
+    Build the key `request_flight_key` would build for a request to `path` with `query_items`.
+
+    :param path: The URL path.
+    :param query_items: The (name, value) query parameters.
+    :return: The coalescing key.
+    """
+    query = "&".join(f"{name}={value}" for name, value in sorted(query_items))
+    return f"{path.rstrip('/')}?{query}"
+
+
+movie_detail_flight = SingleFlight("movie_detail")
+movie_count_flight = SingleFlight("movie_count")
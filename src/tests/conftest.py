@@ -1,24 +1,73 @@
+import asyncio
+import shutil
+
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 
 from config import get_settings
 from database import (
     reset_database,
+    snapshot_database,
+    restore_database,
     get_db_contextmanager
 )
 from database.populate import CSVDatabaseSeeder
 from main import app
+from services import index_sync, reset_services
+
+
+@pytest.fixture(scope="session")
+def movies_csv_path(tmp_path_factory):
+    """
+    Provide a private copy of the test CSV for the current worker.
+
+    `CSVDatabaseSeeder` writes rejected rows to a file next to its input, so workers started by
+    pytest-xdist must not share the directory `seed_data`.
+    """
+    source = get_settings().PATH_TO_MOVIES_CSV
+    target = tmp_path_factory.mktemp("seed_data") / "test_data.csv"
+    shutil.copyfile(source, target)
+    return str(target)
+
+
+@pytest.fixture(scope="session")
+def database_snapshots():
+    """
+    Hold the template databases shared by the whole test session.
+
+    The templates are built lazily by `reset_db` and `seed_database` the first time they are needed,
+    and are closed once the session finishes.
+    """
+    snapshots = {}
+    yield snapshots
+
+    async def close_snapshots():
+        for snapshot in snapshots.values():
+            await snapshot.close()
+
+    asyncio.run(close_snapshots())
 
 
 @pytest_asyncio.fixture(scope="function", autouse=True)
-async def reset_db():
+async def reset_db(database_snapshots):
     """
     Reset the SQLite database before each test.
 
     This fixture ensures that the database is cleared and recreated for every test function.
-    It helps maintain test isolation by preventing data leakage between tests.
+    It helps maintain test isolation by preventing data leakage between tests. The schema is created
+    once per session; afterwards the empty template is restored with SQLite's backup API.
+    In-process indexes are dropped as well, since they would otherwise describe the previous database,
+    and the index syncs a test scheduled are stopped before its event loop closes.
     """
-    await reset_database()
+    reset_services()
+    if "empty" in database_snapshots:
+        await restore_database(database_snapshots["empty"])
+    else:
+        await reset_database()
+        database_snapshots["empty"] = await snapshot_database()
+    yield
+    await index_sync.stop()
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -41,20 +90,24 @@ async def db_session():
 
 
 @pytest_asyncio.fixture(scope="function")
-async def seed_database(db_session):
+async def seed_database(db_session, database_snapshots, movies_csv_path):
     """
     Seed the database with test data if it is empty.
 
-    This fixture initializes a `CSVDatabaseSeeder` and ensures the test database is populated before
-    running tests that require existing data.
+    The `CSVDatabaseSeeder` pipeline runs only once per session, into what becomes the seeded template.
+    Every later test restores that template instead of re-running the seeder.
 
     :param db_session: The async database session fixture.
     :type db_session: AsyncSession
     """
-    settings = get_settings()
-    seeder = CSVDatabaseSeeder(csv_file_path=settings.PATH_TO_MOVIES_CSV, db_session=db_session)
+    reset_services()
+    if "seeded" in database_snapshots:
+        await restore_database(database_snapshots["seeded"])
+    else:
+        seeder = CSVDatabaseSeeder(csv_file_path=movies_csv_path, db_session=db_session)
 
-    if not await seeder.is_db_populated():
-        await seeder.seed()
+        if not await seeder.is_db_populated():
+            await seeder.seed()
+        database_snapshots["seeded"] = await snapshot_database()
 
     yield db_session
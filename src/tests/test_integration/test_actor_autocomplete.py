@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import select
+
+from config import override_settings
+from database.models import ActorModel
+from services.actor_autocomplete import word_suffixes
+
+AUTOCOMPLETE_URL = "/api/v1/theater/actors/autocomplete/"
+
+MOVIE_DATA = {
+    "name": "Autocomplete Movie",
+    "date": "2024-01-01",
+    "score": 50.0,
+    "overview": "Introducing a new face.",
+    "status": "Released",
+    "budget": 1.0,
+    "revenue": 1.0,
+    "country": "US",
+    "genres": ["Drama"],
+    "actors": ["Zebediah Quillfeather"],
+    "languages": ["English"],
+}
+
+
+async def _search_both(client, params: dict) -> tuple[dict, dict]:
+    index = await client.get(AUTOCOMPLETE_URL, params=params)
+    assert index.status_code == 200, f"Expected status code 200, but got {index.status_code}"
+    with override_settings(ACTOR_AUTOCOMPLETE_INDEX_ENABLED=False):
+        database = await client.get(AUTOCOMPLETE_URL, params=params)
+    assert database.status_code == 200, f"Expected status code 200, but got {database.status_code}"
+    return index.json(), database.json()
+
+
+def test_word_suffixes():
+    """
+    Test that a name is indexed from the start of each word, case-folded.
+    """
+    assert word_suffixes("Samuel  L. JACKSON") == ["samuel l. jackson", "l. jackson", "jackson"]
+
+
+@pytest.mark.asyncio
+async def test_index_matches_database(client, db_session, seed_database):
+    """
+    Test that the in-memory index finds and ranks the same actors as the SQL query.
+    """
+    # SQLite's LIKE and lower() fold ASCII letters only, so the SQL side is compared on ASCII names.
+    names = [
+        name for name in (await db_session.execute(select(ActorModel.name).limit(40))).scalars()
+        if name.isascii()
+    ][:20]
+    queries = {name[:1] for name in names} | {name.split()[-1][:3] for name in names} | {names[0].upper()}
+    for query in sorted(queries):
+        index, database = await _search_both(client, {"q": query, "limit": 5})
+        assert index["source"] == "index" and database["source"] == "database"
+        assert index["actors"] == database["actors"], f"Results differ for {query!r}"
+        counts = [actor["movie_count"] for actor in index["actors"]]
+        assert counts == sorted(counts, reverse=True)
+        assert all(count > 0 for count in counts)
+
+    index, database = await _search_both(client, {"q": names[0].lower()})
+    assert names[0] in [actor["name"] for actor in index["actors"]]
+
+
+@pytest.mark.asyncio
+async def test_new_actors_and_wildcards(client, seed_database):
+    """
+    Test that an actor created by a write is found with its movie count, and that LIKE wildcards
+    in the query are matched literally.
+    """
+    index, _ = await _search_both(client, {"q": "quill"})
+    assert index["actors"] == []
+
+    response = await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+
+    index, database = await _search_both(client, {"q": "quill"})
+    assert index["actors"] == database["actors"]
+    assert [(actor["name"], actor["movie_count"]) for actor in index["actors"]] == [("Zebediah Quillfeather", 1)]
+
+    index, database = await _search_both(client, {"q": "%"})
+    assert index["actors"] == database["actors"] == []
+
+    response = await client.get(AUTOCOMPLETE_URL, params={"q": ""})
+    assert response.status_code == 422, f"Expected status code 422, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_patched_actors_keep_their_names(client, seed_database):
+    """
+    Test that actors added by a PATCH are indexed under their own IDs, whatever order they are given in.
+    """
+    index, _ = await _search_both(client, {"q": "onewright"})
+    assert index["actors"] == []
+    response = await client.post("/api/v1/theater/movies/", json={**MOVIE_DATA, "actors": ["Aaa Onewright"]})
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    movie_id = response.json()["id"]
+
+    response = await client.patch(
+        f"/api/v1/theater/movies/{movie_id}/", json={"actors": ["Zed Zulumoto", "Aaa Onewright"]}
+    )
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+
+    for query, name in (("zulumoto", "Zed Zulumoto"), ("onewright", "Aaa Onewright")):
+        index, database = await _search_both(client, {"q": query})
+        assert index["actors"] == database["actors"]
+        assert [actor["name"] for actor in index["actors"]] == [name]
@@ -0,0 +1,109 @@
+import itertools
+from collections import Counter, defaultdict
+
+import pytest
+from sqlalchemy import select
+
+from database.models import ActorsMoviesModel
+
+
+async def _costar_counts(db_session) -> dict[int, Counter]:
+    rows = (await db_session.execute(select(ActorsMoviesModel.c.movie_id, ActorsMoviesModel.c.actor_id))).all()
+    casts = defaultdict(set)
+    for movie_id, actor_id in rows:
+        casts[movie_id].add(actor_id)
+    costars = defaultdict(Counter)
+    for cast in casts.values():
+        for actor_id, other_id in itertools.permutations(cast, 2):
+            costars[actor_id][other_id] += 1
+    return costars
+
+
+@pytest.mark.asyncio
+async def test_actor_costars_and_degree(client, db_session, seed_database):
+    """
+    Test that co-stars and degrees match the shared movies stored in `actors_movies`.
+    """
+    costars = await _costar_counts(db_session)
+    actor_id = max(costars, key=lambda key: len(costars[key]))
+
+    response = await client.get(f"/api/v1/theater/actors/{actor_id}/costars/?limit=100")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    response_data = response.json()
+    assert response_data["actor_id"] == actor_id
+
+    returned = {item["id"]: item["shared_movies"] for item in response_data["costars"]}
+    expected = dict(costars[actor_id].most_common(100))
+    assert returned == expected, "Co-stars do not match the stored casts."
+    shared = [item["shared_movies"] for item in response_data["costars"]]
+    assert shared == sorted(shared, reverse=True), "Co-stars are not sorted by shared movies."
+
+    response = await client.get(f"/api/v1/theater/actors/{actor_id}/degree/")
+    assert response.status_code == 200
+    assert response.json()["costar_count"] == len(costars[actor_id])
+    assert response.json()["movie_count"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_actor_path(client, db_session, seed_database):
+    """
+    Test that the path between two actors is a chain of co-stars and that unknown actors return 404.
+    """
+    costars = await _costar_counts(db_session)
+    source = next(iter(costars))
+    neighbour = next(iter(costars[source]))
+    target = next((actor for actor in costars[neighbour] if actor != source and actor not in costars[source]),
+                  neighbour)
+
+    response = await client.get(f"/api/v1/theater/actors/{source}/path/{target}/")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    response_data = response.json()
+    path = [step["id"] for step in response_data["path"]]
+    assert path[0] == source and path[-1] == target
+    assert response_data["distance"] == len(path) - 1 == (1 if target == neighbour else 2)
+    for actor_id, other_id in zip(path, path[1:]):
+        assert other_id in costars[actor_id], "Consecutive actors on the path never played together."
+
+    response = await client.get(f"/api/v1/theater/actors/99999/path/{target}/")
+    assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
+    assert response.json() == {"detail": "Actor with the given ID was not found."}
+
+
+@pytest.mark.asyncio
+async def test_actor_graph_follows_writes(client, db_session, seed_database):
+    """
+    Test that creating and deleting a movie updates the co-star graph without a reload.
+    """
+    response = await client.get("/api/v1/theater/actors/1/degree/")
+    assert response.status_code == 200
+
+    movie_data = {
+        "name": "Graph Reunion",
+        "date": "2024-01-01",
+        "score": 50.0,
+        "overview": "Old friends meet a newcomer.",
+        "status": "Released",
+        "budget": 1.0,
+        "revenue": 1.0,
+        "country": "US",
+        "genres": ["Drama"],
+        "actors": ["Graph Newcomer", "Graph Veteran"],
+        "languages": ["English"],
+    }
+    response = await client.post("/api/v1/theater/movies/", json=movie_data)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    movie = response.json()
+    newcomer, veteran = sorted(movie["actors"], key=lambda actor: actor["name"])
+
+    response = await client.get(f"/api/v1/theater/actors/{newcomer['id']}/costars/")
+    assert response.status_code == 200
+    assert response.json()["costars"] == [{"id": veteran["id"], "name": veteran["name"], "shared_movies": 1}]
+
+    response = await client.delete(f"/api/v1/theater/movies/{movie['id']}/")
+    assert response.status_code == 204
+
+    response = await client.get(f"/api/v1/theater/actors/{newcomer['id']}/degree/")
+    assert response.json() == {"actor_id": newcomer["id"], "movie_count": 0, "costar_count": 0}
+    response = await client.get(f"/api/v1/theater/actors/{newcomer['id']}/path/{veteran['id']}/")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "The actors are not connected through shared movies."}
@@ -0,0 +1,77 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+import database
+from config import override_settings
+from routes.dependencies import get_db
+from services import read_limiter
+
+ADMIN_HEADERS = {"X-API-Key": "test-admin-key"}
+
+
+class SlowSession:
+    """
+    A local stand-in for a database that takes `latency` seconds per query.
+    """
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.info = {}
+
+    async def execute(self, *args, **kwargs) -> None:
+        await asyncio.sleep(self.latency)
+
+
+@pytest.fixture
+def slow_database(monkeypatch):
+    """
+    Route read sessions to a slow stand-in and shrink the read budget.
+    """
+    @asynccontextmanager
+    async def slow_session():
+        yield SlowSession(latency=0.2)
+
+    monkeypatch.setattr(database, "get_db_contextmanager", slow_session)
+    with override_settings(
+            ADMISSION_READ_INITIAL_LIMIT=2,
+            ADMISSION_TARGET_LATENCY_MS=50.0,
+            ADMISSION_QUEUE_TIMEOUT_SECONDS=0.1,
+    ):
+        read_limiter.reset()
+        yield
+    read_limiter.reset()
+
+
+@pytest.mark.asyncio
+async def test_slow_database_sheds_load_with_503(client, slow_database):
+    """
+    Test that with a slow database the excess requests get 503 with Retry-After and the limit backs off.
+    """
+    slow_app = FastAPI()
+
+    @slow_app.get("/slow/")
+    async def slow_route(db=Depends(get_db)) -> dict[str, str]:
+        await db.execute("SELECT 1")
+        return {"detail": "ok"}
+
+    async with AsyncClient(transport=ASGITransport(app=slow_app), base_url="http://test") as slow_client:
+        responses = await asyncio.gather(*(slow_client.get("/slow/") for _ in range(10)))
+
+    status_codes = [response.status_code for response in responses]
+    assert status_codes.count(200) == 2, f"Only the initial budget should be served, got {status_codes}"
+    assert status_codes.count(503) == 8
+    for response in responses:
+        if response.status_code == 503:
+            assert int(response.headers["Retry-After"]) >= 1
+            assert response.json() == {"detail": "The service is overloaded, please retry later."}
+
+    assert read_limiter.limit < 2, "The limit must back off after slow queries."
+
+    response = await client.get("/api/v1/admin/metrics/", headers=ADMIN_HEADERS)
+    admission = response.json()["admission"]["read"]
+    assert admission["rejected"] == 8
+    assert admission["in_flight"] == 0 and admission["queued"] == 0
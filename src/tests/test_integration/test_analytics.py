@@ -0,0 +1,130 @@
+import sys
+
+import pytest
+from sqlalchemy import select
+
+from config import override_settings
+from database.cleanup import cleanup_orphans
+from database.models import ActorsMoviesModel, CountryModel, GenreModel
+from services import catalogue_replica
+
+ANALYTICS_URL = "/api/v1/theater/analytics/movies/"
+
+MOVIE_DATA = {
+    "name": "Analytic Blockbuster",
+    "date": "2024-01-01",
+    "score": 100.0,
+    "overview": "Tops every ranking.",
+    "status": "Released",
+    "budget": 1.0,
+    "revenue": 10.0 ** 12,
+    "country": "US",
+    "genres": ["Drama"],
+    "actors": ["Analytic Actor"],
+    "languages": ["English"],
+}
+
+
+async def _query_both(client, path: str, params: dict) -> tuple[dict, dict]:
+    replica = await client.get(f"{ANALYTICS_URL}{path}", params=params)
+    assert replica.status_code == 200, f"Expected status code 200, but got {replica.status_code}"
+    with override_settings(CATALOGUE_REPLICA_ENABLED=False):
+        database = await client.get(f"{ANALYTICS_URL}{path}", params=params)
+    assert database.status_code == 200, f"Expected status code 200, but got {database.status_code}"
+    return replica.json(), database.json()
+
+
+async def _filters(db_session) -> list[dict]:
+    genre = (await db_session.execute(select(GenreModel.name).limit(1))).scalar_one()
+    country = (await db_session.execute(select(CountryModel.code).limit(1))).scalar_one()
+    actor_id = (await db_session.execute(select(ActorsMoviesModel.c.actor_id).limit(1))).scalar_one()
+    return [
+        {},
+        {"genre": genre, "order_by": "revenue"},
+        {"country": country, "min_score": 60, "order_by": "date", "descending": False},
+        {"actor_id": actor_id, "order_by": "budget"},
+        {"date_from": "2000-01-01", "date_to": "2015-12-31", "min_budget": 1_000_000, "limit": 3},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_replica_matches_database(client, db_session, seed_database):
+    """
+    Test that the replica ranks and summarizes the movies exactly like the SQL queries.
+    """
+    for params in await _filters(db_session):
+        replica, database = await _query_both(client, "top/", params)
+        assert replica["source"] == "replica" and database["source"] == "database"
+        assert replica["movies"] == database["movies"], f"Rankings differ for {params}"
+
+        summary_params = {key: value for key, value in params.items() if key not in ("order_by", "descending", "limit")}
+        replica, database = await _query_both(client, "summary/", summary_params)
+        assert replica.pop("source") == "replica" and database.pop("source") == "database"
+        assert replica["movie_count"] == database["movie_count"], f"Counts differ for {summary_params}"
+        assert replica == pytest.approx(database), f"Summaries differ for {summary_params}"
+
+
+@pytest.mark.asyncio
+async def test_unknown_genre_falls_back_to_database(client, seed_database):
+    """
+    Test that a filter the replica cannot resolve is answered by the database.
+    """
+    response = await client.get(f"{ANALYTICS_URL}summary/", params={"genre": "No Such Genre"})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    assert response.json()["source"] == "database"
+    assert response.json()["movie_count"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("threshold", [1024, 0])
+async def test_replica_follows_writes(client, seed_database, monkeypatch, threshold):
+    """
+    Test that created, updated and deleted movies are reflected, with and without compaction.
+    """
+    monkeypatch.setattr(sys.modules["services.catalogue_replica"], "COMPACTION_THRESHOLD", threshold)
+    params = {"order_by": "revenue", "limit": 1}
+    await client.get(f"{ANALYTICS_URL}top/")
+    assert catalogue_replica.is_loaded
+
+    response = await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    movie_id = response.json()["id"]
+    replica, database = await _query_both(client, "top/", {**params, "genre": "Drama"})
+    assert [movie["id"] for movie in replica["movies"]] == [movie_id]
+    assert replica["movies"] == database["movies"]
+
+    response = await client.patch(f"/api/v1/theater/movies/{movie_id}/", json={"revenue": 0.0})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    replica, database = await _query_both(client, "top/", {**params, "max_revenue": 0.0})
+    assert replica["movies"] == database["movies"]
+    assert movie_id in [movie["id"] for movie in replica["movies"]]
+    assert catalogue_replica.stats()["pending_changes"] == (0 if threshold == 0 else 1)
+    replica, database = await _query_both(client, "summary/", {"genre": "Drama"})
+    assert replica["movie_count"] == database["movie_count"]
+
+    response = await client.delete(f"/api/v1/theater/movies/{movie_id}/")
+    assert response.status_code == 204, f"Expected status code 204, but got {response.status_code}"
+    replica, database = await _query_both(client, "summary/", {})
+    assert replica["movie_count"] == database["movie_count"]
+    replica, database = await _query_both(client, "top/", params)
+    assert replica["movies"] == database["movies"]
+
+
+@pytest.mark.asyncio
+async def test_replica_follows_recreated_language(client, seed_database):
+    """
+    Test that a language the orphan cleanup deleted and a later write recreated under a new ID is
+    answered by the replica with the new ID, and matches the database.
+    """
+    await client.get(f"{ANALYTICS_URL}top/")
+    movie_data = {**MOVIE_DATA, "languages": ["Analyticese"]}
+    response = await client.post("/api/v1/theater/movies/", json=movie_data)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    assert (await client.delete(f"/api/v1/theater/movies/{response.json()['id']}/")).status_code == 204
+    assert (await cleanup_orphans(100))["languages"] == 1
+
+    response = await client.post("/api/v1/theater/movies/", json=movie_data)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    replica, database = await _query_both(client, "summary/", {"language": "Analyticese"})
+    assert replica.pop("source") == "replica" and database.pop("source") == "database"
+    assert replica["movie_count"] == database["movie_count"] == 1
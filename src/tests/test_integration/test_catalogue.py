@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import func, select
+
+from database.models import ActorsMoviesModel, CountryModel, GenreModel, MovieModel, MoviesGenresModel
+
+THEATER_URL = "/api/v1/theater"
+
+
+async def _collect_movies(client, url: str, limit: int) -> list[int]:
+    movie_ids, params = [], {"limit": limit}
+    while True:
+        response = await client.get(url, params=params)
+        assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+        body = response.json()
+        assert len(body["movies"]) <= limit
+        movie_ids.extend(movie["id"] for movie in body["movies"])
+        if body["next_cursor"] is None:
+            return movie_ids
+        params["before"] = body["next_cursor"]
+
+
+@pytest.mark.asyncio
+async def test_genre_list_counts_match_database(client, db_session, seed_database):
+    """
+    Test that paging through the genres returns each genre once with its number of movies.
+    """
+    expected = dict((await db_session.execute(
+        select(GenreModel.id, func.count(MoviesGenresModel.c.movie_id))
+        .outerjoin(MoviesGenresModel, MoviesGenresModel.c.genre_id == GenreModel.id)
+        .group_by(GenreModel.id)
+    )).tuples().all())
+
+    counts, params = {}, {"limit": 3}
+    while True:
+        response = await client.get(f"{THEATER_URL}/genres/", params=params)
+        assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+        body = response.json()
+        for genre in body["items"]:
+            assert genre["id"] not in counts, "A genre was returned on two pages"
+            counts[genre["id"]] = genre["movie_count"]
+        if body["next_cursor"] is None:
+            break
+        params["after"] = body["next_cursor"]
+    assert counts == expected
+
+    genre_id = next(iter(expected))
+    response = await client.get(f"{THEATER_URL}/genres/{genre_id}/")
+    assert response.status_code == 200
+    assert response.json()["movie_count"] == expected[genre_id]
+
+
+@pytest.mark.asyncio
+async def test_entity_movies_keyset_pages(client, db_session, seed_database):
+    """
+    Test that the movie pages of an actor and a country cover all of their movies, newest first.
+    """
+    actor_id = (await db_session.execute(
+        select(ActorsMoviesModel.c.actor_id)
+        .group_by(ActorsMoviesModel.c.actor_id)
+        .order_by(func.count().desc())
+        .limit(1)
+    )).scalar_one()
+    expected = (await db_session.execute(
+        select(ActorsMoviesModel.c.movie_id).where(ActorsMoviesModel.c.actor_id == actor_id)
+    )).scalars().all()
+    movie_ids = await _collect_movies(client, f"{THEATER_URL}/actors/{actor_id}/movies/", limit=2)
+    assert movie_ids == sorted(expected, reverse=True)
+
+    country = (await db_session.execute(select(CountryModel).limit(1))).scalar_one()
+    expected = (await db_session.execute(
+        select(MovieModel.id).where(MovieModel.country_id == country.id)
+    )).scalars().all()
+    movie_ids = await _collect_movies(client, f"{THEATER_URL}/countries/{country.id}/movies/", limit=5)
+    assert movie_ids == sorted(expected, reverse=True)
+
+    response = await client.get(f"{THEATER_URL}/countries/{country.id}/")
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": country.id, "code": country.code, "name": country.name, "movie_count": len(expected)
+    }
+
+
+@pytest.mark.asyncio
+async def test_unknown_entities_return_404(client, seed_database):
+    """
+    Test that a missing entity is a 404 on both its detail and movies routes, without shadowing autocomplete.
+    """
+    for key, singular in (("actors", "Actor"), ("genres", "Genre"), ("languages", "Language"), ("countries", "Country")):
+        for path in (f"{THEATER_URL}/{key}/999999/", f"{THEATER_URL}/{key}/999999/movies/"):
+            response = await client.get(path)
+            assert response.status_code == 404, f"Expected status code 404 for {path}, but got {response.status_code}"
+            assert response.json()["detail"] == f"{singular} with the given ID was not found."
+
+    response = await client.get(f"{THEATER_URL}/actors/autocomplete/", params={"q": "a"})
+    assert response.status_code == 200
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from config import override_settings
+from database import dispose_engines, get_write_db_contextmanager, reset_database
+from database.changes import record_movie_change
+from database.cleanup import cleanup_movie_changes
+from database.models import MovieChangeModel
+from main import app
+from routes import movies as movie_routes
+from services import change_feed
+
+CHANGES_URL = "/api/v1/theater/movies/changes/"
+
+MOVIE_DATA = {
+    "name": "Change Feed Movie",
+    "date": "2024-01-01",
+    "score": 50.0,
+    "overview": "Watched by downstream services.",
+    "status": "Released",
+    "budget": 1.0,
+    "revenue": 1.0,
+    "country": "US",
+    "genres": ["Drama"],
+    "actors": ["Feed Actor"],
+    "languages": ["English"],
+}
+
+
+def _stream_scope(last_event_id: int) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": CHANGES_URL,
+        "raw_path": CHANGES_URL.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"accept", b"text/event-stream"), (b"last-event-id", str(last_event_id).encode())],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+
+
+@pytest.mark.asyncio
+async def test_mutations_are_recorded_in_order(client):
+    """
+    Test that create, update and delete append to the feed, which can be read from any sequence number.
+    """
+    response = await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    movie_id = response.json()["id"]
+    assert (await client.patch(f"/api/v1/theater/movies/{movie_id}/", json={"score": 60})).status_code == 200
+    assert (await client.delete(f"/api/v1/theater/movies/{movie_id}/")).status_code == 204
+
+    response = await client.get(CHANGES_URL)
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    feed = response.json()
+    assert [(change["movie_id"], change["operation"]) for change in feed["changes"]] == [
+        (movie_id, "created"), (movie_id, "updated"), (movie_id, "deleted")
+    ]
+    sequences = [change["sequence"] for change in feed["changes"]]
+    assert sequences == sorted(sequences) and feed["last_sequence"] == sequences[-1]
+
+    response = await client.get(CHANGES_URL, params={"after": sequences[0], "limit": 1})
+    assert [change["operation"] for change in response.json()["changes"]] == ["updated"]
+
+    response = await client.get(CHANGES_URL, params={"after": feed["last_sequence"]})
+    assert response.json() == {"changes": [], "last_sequence": feed["last_sequence"]}
+
+
+@pytest.mark.asyncio
+async def test_long_poll_wakes_on_a_local_write(client):
+    """
+    Test that a waiting long-poll returns as soon as this worker commits a change.
+    """
+    waiter = asyncio.create_task(client.get(CHANGES_URL, params={"wait": 10}))
+    await asyncio.sleep(0.1)
+    assert not waiter.done(), "The long-poll returned before any change."
+
+    started = time.monotonic()
+    response = await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)
+    assert response.status_code == 201
+    feed = (await asyncio.wait_for(waiter, timeout=5)).json()
+    assert time.monotonic() - started < 2, "The long-poll was not woken by the write."
+    assert [change["operation"] for change in feed["changes"]] == ["created"]
+
+
+@pytest.mark.asyncio
+async def test_poller_picks_up_changes_of_other_workers(tmp_path):
+    """
+    Test that on a file database the poller notices a change committed without an in-process notification.
+    """
+    with override_settings(PATH_TO_DB=str(tmp_path / "change_feed.db")):
+        await dispose_engines()
+        try:
+            await reset_database()
+            waiter = asyncio.create_task(change_feed.wait(0, timeout=5))
+            await asyncio.sleep(0.1)
+            assert not waiter.done(), "The wait returned before any change."
+
+            async with get_write_db_contextmanager() as session:
+                sequence = await record_movie_change(session, 12345, "updated")
+                await session.commit()
+
+            assert await asyncio.wait_for(waiter, timeout=5), "The poller did not notice the change."
+            assert change_feed.latest_sequence == sequence
+        finally:
+            await change_feed.stop()
+            await dispose_engines()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+async def test_event_stream_sends_changes_and_stops_on_disconnect(client):
+    """
+    Test that the SSE endpoint resumes from Last-Event-ID, streams new changes and ends when the client leaves.
+    """
+    for index in range(2):
+        response = await client.post("/api/v1/theater/movies/", json={**MOVIE_DATA, "name": f"SSE Movie {index}"})
+        assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    first, second = (await client.get(CHANGES_URL)).json()["changes"]
+
+    received = bytearray()
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message) -> None:
+        if message["type"] == "http.response.start":
+            received.extend(dict(message["headers"])[b"content-type"] + b"\n")
+        elif message["type"] == "http.response.body":
+            received.extend(message.get("body", b""))
+            if received.count(b"\n\n") >= 2:
+                disconnected.set()
+
+    stream = asyncio.create_task(app(_stream_scope(first["sequence"]), receive, send))
+    await asyncio.sleep(0.1)
+    response = await client.patch(f"/api/v1/theater/movies/{second['movie_id']}/", json={"score": 1})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    await asyncio.wait_for(stream, timeout=5)
+
+    content_type, _, body = bytes(received).partition(b"\n")
+    assert content_type.startswith(b"text/event-stream")
+    events = [event for event in body.decode().split("\n\n") if event and not event.startswith(":")]
+    parsed = [dict(line.split(": ", 1) for line in event.splitlines()) for event in events]
+    assert [event["event"] for event in parsed] == ["created", "updated"]
+    assert int(parsed[0]["id"]) == second["sequence"]
+    assert json.loads(parsed[1]["data"])["operation"] == "updated"
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+async def test_event_stream_closes_its_session_when_the_client_leaves_mid_read(monkeypatch):
+    """
+    Test that a client leaving while the stream reads the feed waits for the read's session to close.
+    """
+    get_movie_changes = movie_routes.get_movie_changes
+    closed = asyncio.Event()
+    disconnected = asyncio.Event()
+
+    async def slow_read(db, after, limit):  # noqa: ANN001
+        close = db.close
+
+        async def tracked_close() -> None:
+            # A slow close, as behind a busy aiosqlite thread, outlasts a stream that does not wait for it.
+            await asyncio.sleep(0.05)
+            await close()
+            closed.set()
+
+        db.close = tracked_close
+        changes = await get_movie_changes(db, after, limit)
+        disconnected.set()
+        await asyncio.sleep(0.1)
+        return changes
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message) -> None:
+        pass
+
+    monkeypatch.setattr(movie_routes, "get_movie_changes", slow_read)
+    await asyncio.wait_for(app(_stream_scope(0), receive, send), timeout=5)
+    assert closed.is_set(), "The stream ended before the read's session was closed."
+
+
+@pytest.mark.asyncio
+async def test_event_stream_ends_with_an_error_event_when_a_read_is_rejected(client, monkeypatch):
+    """
+    Test that a read rejected after the stream started ends it with an `error` event carrying the retry delay.
+    """
+    async def overloaded(db, after, limit):  # noqa: ANN001
+        raise HTTPException(status_code=503, detail="The service is overloaded.", headers={"Retry-After": "2"})
+
+    monkeypatch.setattr(movie_routes, "get_movie_changes", overloaded)
+    response = await client.get(CHANGES_URL, headers={"Accept": "text/event-stream"})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    event = dict(line.split(": ", 1) for line in response.text.strip().splitlines())
+    assert event == {"retry": "2000", "event": "error", "data": json.dumps({"detail": "The service is overloaded."})}
+
+
+@pytest.mark.asyncio
+async def test_cleanup_prunes_expired_changes(client, db_session):
+    """
+    Test that the cleanup job removes changes older than the retention period only, and keeps the
+    newest change so that the latest sequence number does not go back.
+    """
+    response = await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    assert (await client.delete(f"/api/v1/theater/movies/{response.json()['id']}/")).status_code == 204
+
+    assert await cleanup_movie_changes(retention_seconds=3600) == 0
+    assert await cleanup_movie_changes(retention_seconds=0) == 1
+    remaining = (await db_session.execute(select(MovieChangeModel.operation))).scalars().all()
+    assert remaining == ["deleted"]
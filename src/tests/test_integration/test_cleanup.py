@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+import database.cleanup as cleanup_module
+from config import override_settings
+from database.cleanup import cleanup_orphans, run_orphan_cleanup_periodically
+from database.models import ActorModel, GenreModel, LanguageModel
+
+
+@pytest.mark.asyncio
+async def test_cleanup_orphans_removes_unlinked_actors_and_languages(client, db_session, seed_database):
+    """
+    Test that the cleanup job removes actors and languages left without movies, in batches, and keeps genres.
+    """
+    movie_data = {
+        "name": "Orphan Maker",
+        "date": "2024-01-01",
+        "score": 50.0,
+        "overview": "Its cast appears nowhere else.",
+        "status": "Released",
+        "budget": 1.0,
+        "revenue": 1.0,
+        "country": "US",
+        "genres": ["Orphan Genre"],
+        "actors": ["Orphan Actor 1", "Orphan Actor 2", "Orphan Actor 3"],
+        "languages": ["Orphan Language"],
+    }
+    response = await client.post("/api/v1/theater/movies/", json=movie_data)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    actors_before = (await db_session.execute(select(func.count(ActorModel.id)))).scalar_one()
+
+    response = await client.delete(f"/api/v1/theater/movies/{response.json()['id']}/")
+    assert response.status_code == 204
+    assert (await db_session.execute(select(func.count(ActorModel.id)))).scalar_one() == actors_before, (
+        "Deleting a movie must not remove actors inline."
+    )
+
+    deleted = await cleanup_orphans(batch_size=2)
+    assert deleted == {"actors": 3, "languages": 1}, f"Unexpected cleanup result: {deleted}"
+
+    await db_session.rollback()
+    remaining_actors = (await db_session.execute(select(func.count(ActorModel.id)))).scalar_one()
+    assert remaining_actors == actors_before - 3
+    assert (await db_session.execute(
+        select(LanguageModel.id).where(LanguageModel.name == "Orphan Language")
+    )).first() is None
+    assert (await db_session.execute(
+        select(GenreModel.id).where(GenreModel.name == "Orphan Genre")
+    )).first() is not None, "Genres are not part of the cleanup."
+
+    assert await cleanup_orphans(batch_size=2) == {"actors": 0, "languages": 0}
+
+
+@pytest.mark.asyncio
+async def test_cleanup_loop_survives_an_unreachable_database(monkeypatch):
+    """
+    Test that the periodic cleanup logs connection errors, which asyncpg raises as `OSError`, and keeps running.
+    """
+    failures = []
+
+    async def refuse(batch_size):  # noqa: ANN001
+        failures.append(1)
+        raise ConnectionRefusedError("Connect call failed")
+
+    monkeypatch.setattr(cleanup_module, "cleanup_orphans", refuse)
+    with override_settings(ORPHAN_CLEANUP_INTERVAL_SECONDS=0.01):
+        task = asyncio.create_task(run_orphan_cleanup_periodically())
+        try:
+            for _ in range(200):
+                if len(failures) >= 2:
+                    break
+                await asyncio.sleep(0.01)
+            assert len(failures) >= 2 and not task.done(), "The cleanup loop must outlive connection errors."
+        finally:
+            task.cancel()
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy import select
+
+from database import MovieModel
+from services import response_cache
+from services.compression import available_encodings, zstd
+
+
+async def _raw_get(client, url: str, accept_encoding: str):
+    async with client.stream("GET", url, headers={"Accept-Encoding": accept_encoding}) as response:
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+    return response, body
+
+
+@pytest.mark.asyncio
+async def test_list_is_gzip_compressed_and_equivalent(client, seed_database):
+    """
+    Test that a large list response is gzip-encoded and decodes to the uncompressed payload.
+    """
+    url = "/api/v1/theater/movies/?per_page=20"
+    plain, plain_body = await _raw_get(client, url, "identity")
+    assert plain.status_code == 200
+    assert "content-encoding" not in plain.headers
+
+    compressed, compressed_body = await _raw_get(client, url, "gzip")
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert len(compressed_body) < len(plain_body) / 2, "The list payload should compress well."
+    assert json.loads(gzip.decompress(compressed_body)) == json.loads(plain_body)
+
+
+@pytest.mark.asyncio
+async def test_small_responses_are_not_compressed(client):
+    """
+    Test that bodies below the minimum size are sent as they are.
+    """
+    response, body = await _raw_get(client, "/api/v1/theater/movies/99999/", "gzip")
+    assert response.status_code == 404
+    assert "content-encoding" not in response.headers
+    assert json.loads(body) == {"detail": "Movie with the given ID was not found."}
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif("zstd" not in available_encodings(), reason="Zstandard is not installed.")
+async def test_cached_detail_is_stored_precompressed(client, db_session, seed_database):
+    """
+    Test that a cached detail keeps its compressed variant, and that an update invalidates it.
+    """
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+    url = f"/api/v1/theater/movies/{movie_id}/"
+
+    first, first_body = await _raw_get(client, url, "zstd")
+    second, second_body = await _raw_get(client, url, "zstd")
+    assert first.headers.get("content-encoding") == second.headers.get("content-encoding")
+    assert first_body == second_body
+    assert response_cache.stats()["hits"] >= 1
+
+    entry = response_cache.get((f"/api/v1/theater/movies/{movie_id}?", "application/json"))
+    if first.headers.get("content-encoding") == "zstd":
+        assert entry.encoded["zstd"] == first_body, "The cache must serve the stored compressed body."
+        detail = json.loads(zstd.decompress(first_body))
+    else:
+        detail = json.loads(first_body)
+    assert detail["id"] == movie_id
+
+    response = await client.patch(url, json={"name": "Recompressed"})
+    assert response.status_code == 200
+    response = await client.get(url)
+    assert response.json()["name"] == "Recompressed", "The update must invalidate the cached detail."
@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database import Deadline, attach_deadline, get_db_contextmanager
+from middleware import RequestDeadlineMiddleware
+from routes.dependencies import get_db
+
+SLOW_QUERY = text(
+    "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 100000000) "
+    "SELECT count(*) FROM counter"
+)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_statement_stops_at_the_deadline():
+    """
+    Test that a running SQLite statement is aborted once the session's deadline passes.
+    """
+    async with get_db_contextmanager() as session:
+        attach_deadline(session, Deadline(0.05))
+        started = time.monotonic()
+        with pytest.raises(OperationalError, match="interrupted"):
+            await session.execute(SLOW_QUERY)
+        assert time.monotonic() - started < 2, "The statement kept running past its deadline."
+
+
+@pytest.mark.asyncio
+async def test_request_past_its_deadline_gets_504():
+    """
+    Test that a request whose header budget runs out gets 504 and that its query stops.
+    """
+    slow_app = FastAPI()
+    slow_app.add_middleware(RequestDeadlineMiddleware)
+
+    @slow_app.get("/slow/")
+    async def slow_route(db=Depends(get_db)) -> dict[str, int]:
+        return {"count": (await db.execute(SLOW_QUERY)).scalar_one()}
+
+    async with AsyncClient(transport=ASGITransport(app=slow_app), base_url="http://test") as client:
+        started = time.monotonic()
+        response = await client.get("/slow/", headers={"X-Request-Timeout": "0.1"})
+
+    assert response.status_code == 504, f"Expected status code 504, but got {response.status_code}"
+    assert response.json() == {"detail": "The request exceeded its deadline."}
+    assert time.monotonic() - started < 2
+
+    async with get_db_contextmanager() as session:
+        assert (await session.execute(text("SELECT 1"))).scalar_one() == 1, "The aborted statement kept the connection."
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_the_request():
+    """
+    Test that a client disconnect cancels the application task and the request's deadline.
+    """
+    observed = {}
+
+    async def endless_app(scope, receive, send) -> None:
+        observed["deadline"] = scope["state"]["deadline"]
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            observed["cancelled"] = True
+            raise
+
+    async def receive():
+        await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message) -> None:
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    await asyncio.wait_for(RequestDeadlineMiddleware(endless_app)(scope, receive, send), timeout=2)
+
+    assert observed["cancelled"], "The application task was not cancelled."
+    assert observed["deadline"].expired, "The deadline was not cancelled."
+    assert sent == [], "Nothing must be sent to a client that is gone."
+
+
+@pytest.mark.asyncio
+async def test_regular_requests_are_unaffected(client, seed_database):
+    """
+    Test that requests finishing within the default deadline behave as before.
+    """
+    response = await client.get("/api/v1/theater/movies/", headers={"X-Request-Timeout": "not-a-number"})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_deadline_spans_from_request_body_to_response_start():
+    """
+    Test that neither a slow request body nor a long response body counts against the deadline,
+    and that the body is read from the client only as fast as the application consumes it.
+    """
+    chunks = [b"a" * 10] * 5
+    received = []
+
+    async def receive():
+        await asyncio.sleep(0.05)
+        if len(received) < len(chunks):
+            received.append(chunks[len(received)])
+            return {"type": "http.request", "body": received[-1], "more_body": len(received) < len(chunks)}
+        await asyncio.sleep(10)
+        return {"type": "http.disconnect"}
+
+    async def slow_app(scope, receive, send) -> None:
+        await asyncio.sleep(0.2)
+        assert len(received) <= 2, "The request body was read ahead of the application."
+        body = b""
+        while True:
+            message = await receive()
+            body += message["body"]
+            if not message["more_body"]:
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for _ in range(3):
+            await asyncio.sleep(0.1)
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message) -> None:
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": [(b"x-request-timeout", b"0.15")]}
+    await asyncio.wait_for(RequestDeadlineMiddleware(slow_app)(scope, receive, send), timeout=5)
+
+    assert sent[0]["status"] == 200, "The request was stopped at its deadline."
+    assert b"".join(message.get("body", b"") for message in sent[1:]) == b"".join(chunks) * 3
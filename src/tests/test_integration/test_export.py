@@ -0,0 +1,133 @@
+import io
+import os
+import time
+
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+from sqlalchemy import func, select
+
+from config import override_settings
+from database.changes import catalogue_version_sequence
+from database.models import ActorsMoviesModel, MovieModel
+from services import export_cache
+
+EXPORTS_URL = "/api/v1/theater/exports/"
+
+MOVIE_DATA = {
+    "name": "Exported Movie",
+    "date": "2024-01-01",
+    "score": 50.0,
+    "overview": "Loaded into pandas.",
+    "status": "Released",
+    "budget": 1.0,
+    "revenue": 1.0,
+    "country": "US",
+    "genres": ["Drama"],
+    "actors": ["Export Actor"],
+    "languages": ["English"],
+}
+
+
+@pytest.mark.asyncio
+async def test_export_tables_as_parquet_and_arrow(client, db_session, seed_database):
+    """
+    Test that the movies and the exploded associations are exported with one row per movie or link.
+    """
+    movie_count = (await db_session.execute(select(func.count(MovieModel.id)))).scalar_one()
+    link_count = (await db_session.execute(select(func.count()).select_from(ActorsMoviesModel))).scalar_one()
+
+    response = await client.get(f"{EXPORTS_URL}movies/")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    movies = pyarrow.parquet.read_table(io.BytesIO(response.content))
+    assert movies.num_rows == movie_count
+    assert movies.column_names == [
+        "id", "name", "date", "score", "overview", "status", "budget", "revenue", "country"
+    ]
+    assert set(movies.column("status").to_pylist()) == {"Released"}
+
+    response = await client.get(f"{EXPORTS_URL}movie_actors/", params={"format": "arrow"})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    actors = pyarrow.ipc.open_file(io.BytesIO(response.content)).read_all()
+    assert actors.num_rows == link_count
+    assert actors.column_names == ["movie_id", "actor_id", "actor"]
+
+    response = await client.get(f"{EXPORTS_URL}ratings/")
+    assert response.status_code == 422, f"Expected status code 422, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_export_is_cached_by_catalogue_version(client, seed_database):
+    """
+    Test that repeated downloads reuse the file, that the ETag allows 304 responses, and that a
+    write produces a new export.
+    """
+    first = await client.get(f"{EXPORTS_URL}movies/")
+    etag = first.headers["etag"]
+    second = await client.get(f"{EXPORTS_URL}movies/")
+    assert second.content == first.content
+    assert (export_cache.builds, export_cache.hits) == (1, 1)
+
+    response = await client.get(f"{EXPORTS_URL}movies/", headers={"If-None-Match": etag})
+    assert response.status_code == 304, f"Expected status code 304, but got {response.status_code}"
+
+    assert (await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)).status_code == 201
+    response = await client.get(f"{EXPORTS_URL}movies/", headers={"If-None-Match": etag})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    assert response.headers["etag"] != etag
+    names = pyarrow.parquet.read_table(io.BytesIO(response.content)).column("name").to_pylist()
+    assert "Exported Movie" in names
+    assert export_cache.builds == 2
+
+
+@pytest.mark.asyncio
+async def test_export_build_keeps_newer_versions(client, seed_database):
+    """
+    Test that a build names its file after the version it read, and removes older versions of the table
+    but not newer ones another worker may be serving.
+    """
+    response = await client.get(f"{EXPORTS_URL}movies/")
+    version = response.headers["etag"].strip('"')
+    sequence = catalogue_version_sequence(version)
+    older = export_cache.path("movies", "parquet", f"{sequence}-older")
+    newer = export_cache.path("movies", "parquet", f"{sequence + 100}-newer")
+    for path in (older, newer):
+        with open(path, "wb"):
+            pass
+
+    assert (await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)).status_code == 201
+    path, built_version = await export_cache.get("movies", "parquet", f"{sequence}-stale")
+    assert catalogue_version_sequence(built_version) > sequence, "The build must read the version with the rows."
+    assert path == export_cache.path("movies", "parquet", built_version)
+    assert "Exported Movie" in pyarrow.parquet.read_table(path).column("name").to_pylist()
+
+    assert os.path.exists(newer), "A newer version must not be removed."
+    assert not os.path.exists(older) and not os.path.exists(export_cache.path("movies", "parquet", version))
+
+
+@pytest.mark.asyncio
+async def test_superseded_export_stays_servable_during_the_grace_period(client, seed_database):
+    """
+    Test that a version replaced by a newer build stays on disk for a request that was handed its path,
+    and that a build removes it once the newer version has been in place for the grace period.
+    """
+    async def download() -> str:
+        response = await client.get(f"{EXPORTS_URL}movies/")
+        assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+        return export_cache.path("movies", "parquet", response.headers["etag"].strip('"'))
+
+    with override_settings(EXPORT_STALE_GRACE_SECONDS=60.0):
+        old_path = await download()
+        assert (await client.post("/api/v1/theater/movies/", json=MOVIE_DATA)).status_code == 201
+        new_path = await download()
+        assert new_path != old_path
+        assert os.path.exists(old_path), "A version superseded within the grace period must be kept."
+
+        settled = time.time() - 120
+        os.utime(new_path, (settled, settled))
+        assert (await client.post("/api/v1/theater/movies/", json={**MOVIE_DATA, "name": "Later"})).status_code == 201
+        latest_path = await download()
+
+    assert not os.path.exists(old_path), "A version superseded before the grace period must be removed."
+    assert os.path.exists(new_path) and os.path.exists(latest_path)
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from config import override_settings
+from database import MovieModel
+from database.models import MovieHitModel
+from main import app, warm_up_services
+from services import hot_movies, response_cache, reset_services
+
+MOVIES_URL = "/api/v1/theater/movies/"
+ADMIN_HEADERS = {"X-API-Key": "test-admin-key"}
+
+
+async def _movie_ids(db_session, count: int) -> list[int]:
+    return list((await db_session.execute(select(MovieModel.id).order_by(MovieModel.id).limit(count))).scalars())
+
+
+async def _read(client, movie_id: int, times: int = 1) -> None:
+    for _ in range(times):
+        response = await client.get(f"{MOVIES_URL}{movie_id}/")
+        assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_hot_movies_are_ranked_by_reads(client, db_session, seed_database):
+    """
+    Test that the admin endpoint lists the most read movies first, and that missing movies are not counted.
+    """
+    first, second, third = await _movie_ids(db_session, 3)
+    await _read(client, first, 2)
+    await _read(client, second, 5)
+    await _read(client, third, 1)
+    await client.get(f"{MOVIES_URL}{first}/", params={"fields": "name"})
+
+    response = await client.get(f"{MOVIES_URL}999999/")
+    assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
+
+    response = await client.get("/api/v1/admin/hot-movies/", params={"limit": 2}, headers=ADMIN_HEADERS)
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    assert response.json() == {
+        "total_reads": 9,
+        "movies": [
+            {"movie_id": second, "reads": 5, "overcount": 0},
+            {"movie_id": first, "reads": 3, "overcount": 0},
+        ],
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("headers", [{}, {"X-API-Key": "test-ingest-key"}])
+async def test_admin_endpoints_require_an_admin_key(client, headers):
+    """
+    Test that the admin endpoints reject requests without an admin key, including ones with an ingest key.
+    """
+    for url in ("/api/v1/admin/hot-movies/", "/api/v1/admin/metrics/"):
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 401, f"Expected status code 401, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_hot_movie_is_rewarmed_after_an_update(client, db_session, seed_database):
+    """
+    Test that updating a hot movie puts its fresh detail response back into the cache.
+    """
+    movie_id, = await _movie_ids(db_session, 1)
+    await _read(client, movie_id, 3)
+
+    response = await client.patch(f"{MOVIES_URL}{movie_id}/", json={"name": "Rewarmed Title"})
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    for _ in range(100):
+        if hot_movies.stats()["warmed"]:
+            break
+        await asyncio.sleep(0.01)
+    assert hot_movies.stats()["warmed"] == 1
+
+    hits = response_cache.hits
+    response = await client.get(f"{MOVIES_URL}{movie_id}/")
+    assert response.json()["name"] == "Rewarmed Title"
+    assert response_cache.hits == hits + 1, "The re-warmed response was not served from the cache."
+
+
+@pytest.mark.asyncio
+async def test_restart_warms_the_hottest_movies(client, db_session, seed_database):
+    """
+    Test that saved counters survive a restart and that the warm-up caches those movies.
+    """
+    hot, cold = await _movie_ids(db_session, 2)
+    await _read(client, hot, 4)
+    await _read(client, cold, 1)
+    assert await hot_movies.save() == 2
+    saved = (await db_session.execute(select(MovieHitModel.movie_id, MovieHitModel.hits))).tuples().all()
+    assert sorted(saved) == sorted([(hot, 4), (cold, 1)])
+
+    reset_services()
+    with override_settings(RESPONSE_CACHE_TTL_SECONDS=0.01, HOT_MOVIES_WARM_TTL_SECONDS=60.0):
+        await warm_up_services(app)
+        assert [hitter.key for hitter in hot_movies.top(2)] == [hot, cold]
+        assert hot_movies.stats()["warmed"] == 2
+
+        await asyncio.sleep(0.05)
+        hits = response_cache.hits
+        await _read(client, hot)
+    assert response_cache.hits == hits + 1, "The warmed entry must outlive the default TTL."
+
+
+@pytest.mark.asyncio
+async def test_snapshot_loop_survives_an_unreachable_database(monkeypatch):
+    """
+    Test that the snapshot loop logs connection errors, which asyncpg raises as `OSError`, and keeps running.
+    """
+    failures = []
+
+    async def refuse() -> int:
+        failures.append(1)
+        raise ConnectionRefusedError("Connect call failed")
+
+    monkeypatch.setattr(hot_movies, "save", refuse)
+    with override_settings(HOT_MOVIES_SNAPSHOT_INTERVAL_SECONDS=0.01):
+        task = asyncio.create_task(hot_movies.save_periodically())
+        try:
+            for _ in range(200):
+                if len(failures) >= 2:
+                    break
+                await asyncio.sleep(0.01)
+            assert len(failures) >= 2 and not task.done(), "The snapshot loop must outlive connection errors."
+        finally:
+            task.cancel()
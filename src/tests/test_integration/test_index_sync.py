@@ -0,0 +1,138 @@
+import asyncio
+import datetime
+import importlib
+
+import pytest
+from sqlalchemy import delete, select
+
+from config import override_settings
+from database import MovieModel, get_db_contextmanager, get_write_db_contextmanager
+from database.associations import set_movie_associations
+from database.changes import record_movie_change
+from database.models import CountryModel
+from services import (
+    actor_autocomplete,
+    actor_graph,
+    catalogue_replica,
+    change_feed,
+    index_sync,
+    related_movies_index
+)
+
+# `services.index_sync` is shadowed by the singleton that `services` re-exports.
+index_sync_module = importlib.import_module("services.index_sync")
+
+
+async def _load_indexes() -> None:
+    async with get_db_contextmanager() as session:
+        await related_movies_index.load(session)
+        await actor_graph.load(session)
+        await actor_autocomplete.load(session)
+        await catalogue_replica.load(session)
+
+
+async def _create_movie_elsewhere() -> tuple[int, int, int]:
+    """
+    Write a movie and its outbox entry without touching the in-process indexes, as another worker would.
+
+    :return: The movie ID, the ID of its only actor and the sequence number of the change.
+    """
+    async with get_write_db_contextmanager() as session:
+        country_id = (await session.execute(select(CountryModel.id).limit(1))).scalar_one()
+        movie = MovieModel(
+            name="Synced Elsewhere",
+            date=datetime.date(2024, 1, 1),
+            score=50.0,
+            overview="Written by another worker.",
+            status="Released",
+            budget=1.0,
+            revenue=1.0,
+            country_id=country_id,
+        )
+        session.add(movie)
+        await session.flush()
+        linked = await set_movie_associations(
+            session, movie.id, {"actors": ["Zebedee Outbox"], "genres": ["Drama"], "languages": ["English"]}
+        )
+        sequence = await record_movie_change(session, movie.id, "created")
+        await session.commit()
+        return movie.id, linked["actors"][0], sequence
+
+
+@pytest.mark.asyncio
+async def test_writes_of_other_workers_reach_the_indexes(seed_database):
+    """
+    Test that a movie written without touching the indexes, as by another worker, is applied by a sync,
+    and that its deletion is applied as well.
+    """
+    await _load_indexes()
+    movies_before = catalogue_replica.stats()["movies"]
+
+    movie_id, actor_id, _ = await _create_movie_elsewhere()
+
+    assert related_movies_index.related(movie_id, 5) is None
+    assert not actor_graph.has_actor(actor_id)
+    assert actor_autocomplete.search("zebedee", 5) == []
+
+    assert await index_sync.sync() == 1
+    assert related_movies_index.related(movie_id, 5) is not None
+    assert actor_graph.has_actor(actor_id)
+    assert [match.id for match in actor_autocomplete.search("zebedee", 5)] == [actor_id]
+    assert catalogue_replica.stats()["movies"] == movies_before + 1
+    assert await index_sync.sync() == 0, "Changes already applied must not be read again."
+
+    async with get_write_db_contextmanager() as session:
+        await session.execute(delete(MovieModel).where(MovieModel.id == movie_id))
+        await record_movie_change(session, movie_id, "deleted")
+        await session.commit()
+
+    assert await index_sync.sync() == 1
+    assert related_movies_index.related(movie_id, 5) is None
+    assert actor_graph.movie_counts([actor_id]).tolist() == [0]
+    assert actor_autocomplete.search("zebedee", 5) == []
+    assert catalogue_replica.stats()["movies"] == movies_before
+
+
+@pytest.mark.asyncio
+async def test_sync_leaves_unloaded_indexes_alone(seed_database):
+    """
+    Test that a sync reads nothing while no index is loaded, so the indexes load the current state lazily.
+    """
+    assert await index_sync.sync() == 0
+    assert not related_movies_index.is_loaded and not catalogue_replica.is_loaded
+
+
+@pytest.mark.asyncio
+async def test_sync_loop_survives_an_unreachable_database(seed_database, monkeypatch):
+    """
+    Test that the sync loop logs connection errors, which asyncpg raises as `OSError`, and catches up
+    once the database is back.
+    """
+    await _load_indexes()
+    movie_id, _, sequence = await _create_movie_elsewhere()
+    get_movie_changes = index_sync_module.get_movie_changes
+    failures = []
+
+    async def refuse(*args, **kwargs):  # noqa: ANN002, ANN003
+        failures.append(1)
+        raise ConnectionRefusedError("Connect call failed")
+
+    monkeypatch.setattr(index_sync_module, "get_movie_changes", refuse)
+    with override_settings(INDEX_SYNC_INTERVAL_SECONDS=0.01):
+        task = asyncio.create_task(index_sync.run())
+        try:
+            change_feed.publish(sequence)
+            for _ in range(200):
+                if len(failures) >= 2:
+                    break
+                await asyncio.sleep(0.01)
+            assert len(failures) >= 2 and not task.done(), "The sync loop must outlive connection errors."
+
+            monkeypatch.setattr(index_sync_module, "get_movie_changes", get_movie_changes)
+            for _ in range(200):
+                if related_movies_index.related(movie_id, 5) is not None:
+                    break
+                await asyncio.sleep(0.01)
+            assert related_movies_index.related(movie_id, 5) is not None, "The sync loop did not catch up."
+        finally:
+            task.cancel()
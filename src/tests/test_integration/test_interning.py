@@ -0,0 +1,131 @@
+import pytest
+from sqlalchemy import delete, event, select
+
+from config import override_settings
+from database import get_write_db_contextmanager
+from database.associations import resolve_ids
+from database.cleanup import cleanup_orphans
+from database.interning import reference_cache
+from database.models import ActorModel, CountryModel, GenreModel, LanguageModel
+from database.session_sqlite import get_sqlite_writer_engine
+
+MOVIE_DATA = {
+    "name": "Interned Movie",
+    "date": "2024-01-01",
+    "score": 50.0,
+    "overview": "Only known names.",
+    "status": "Released",
+    "budget": 1.0,
+    "revenue": 1.0,
+    "country": "US",
+    "genres": ["Drama"],
+    "actors": ["Interned Actor"],
+    "languages": ["English"],
+}
+
+REFERENCE_TABLES = ("genres", "languages", "countries", "actors")
+
+
+async def _create_movie(client, **changes) -> list[str]:
+    """
+    Create a movie and return the statements that touched a reference table.
+    """
+    statements = []
+
+    def record_statement(*args) -> None:
+        statements.append(args[2])
+
+    engine = get_sqlite_writer_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        response = await client.post("/api/v1/theater/movies/", json={**MOVIE_DATA, **changes})
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    return [
+        statement for statement in statements
+        if any(f"INTO {table} " in statement or f"FROM {table} " in statement for table in REFERENCE_TABLES)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cached_names_cost_no_statements(client, db_session, seed_database):
+    """
+    Test that a write naming only cached entities does not look them up, and that new names are
+    cached once the write commits.
+    """
+    await reference_cache.load(db_session)
+    assert await _create_movie(client, actors=[]) == [], "Cached references were looked up."
+
+    statements = await _create_movie(client, name="Second Interned Movie", genres=["Brand New Genre"])
+    assert len(statements) == 2, f"Expected one INSERT of the new genre and one of the actor: {statements}"
+    assert await _create_movie(client, name="Third Interned Movie", genres=["Brand New Genre"]) == []
+
+    genre_id = (await db_session.execute(select(GenreModel.id).where(GenreModel.name == "Brand New Genre"))).scalar()
+    assert reference_cache.table(GenreModel, "name").lookup(["Brand New Genre"]) == {"Brand New Genre": genre_id}
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_names_are_not_cached(db_session):
+    """
+    Test that IDs created by a rolled-back transaction never reach the cache, and that names that
+    already exist are resolved by the database.
+    """
+    async with get_write_db_contextmanager() as session:
+        ids = await resolve_ids(session, CountryModel, "code", ["ZZ"])
+        await session.rollback()
+    assert ids and reference_cache.table(CountryModel, "code").lookup(["ZZ"]) == {}
+
+    db_session.add(CountryModel(code="ZZ"))
+    await db_session.commit()
+    async with get_write_db_contextmanager() as session:
+        ids = await resolve_ids(session, CountryModel, "code", ["ZZ", "ZY"])
+        await session.commit()
+    existing_id = (await db_session.execute(select(CountryModel.id).where(CountryModel.code == "ZZ"))).scalar_one()
+    assert ids["ZZ"] == existing_id
+    assert reference_cache.table(CountryModel, "code").lookup(["ZZ", "ZY"]) == ids
+
+
+@pytest.mark.asyncio
+async def test_actor_cache_is_bounded_and_cleanup_evicts(db_session):
+    """
+    Test that actors are kept in a bounded LRU, and that deleted orphans leave the cache.
+    """
+    with override_settings(ACTOR_CACHE_MAX_ENTRIES=2):
+        async with get_write_db_contextmanager() as session:
+            await resolve_ids(session, ActorModel, "name", ["First", "Second", "Third"])
+            await resolve_ids(session, LanguageModel, "name", ["Orphaned"])
+            await session.commit()
+        actors = reference_cache.table(ActorModel, "name")
+        assert len(actors) == 2
+        assert set(actors.lookup(["First", "Second", "Third"])) == {"Second", "Third"}
+
+    assert reference_cache.table(LanguageModel, "name").lookup(["Orphaned"])
+    await cleanup_orphans(batch_size=10)
+    assert reference_cache.table(LanguageModel, "name").lookup(["Orphaned"]) == {}
+    assert actors.lookup(["Second", "Third"]) == {}
+
+
+@pytest.mark.asyncio
+async def test_stale_cached_ids_are_evicted_and_retried(client, db_session, seed_database):
+    """
+    Test that a write naming an entity deleted behind the cache's back evicts it and succeeds on its retry.
+    """
+    response = await client.post("/api/v1/theater/movies/", json={**MOVIE_DATA, "languages": ["Klingon"]})
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    response = await client.delete(f"/api/v1/theater/movies/{response.json()['id']}/")
+    assert response.status_code == 204, f"Expected status code 204, but got {response.status_code}"
+
+    await db_session.execute(delete(LanguageModel).where(LanguageModel.name == "Klingon"))
+    await db_session.commit()
+    assert reference_cache.table(LanguageModel, "name").lookup(["Klingon"]), "Klingon should still be cached."
+
+    response = await client.post(
+        "/api/v1/theater/movies/", json={**MOVIE_DATA, "name": "Recreated Movie", "languages": ["Klingon"]}
+    )
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    language_id = (await db_session.execute(
+        select(LanguageModel.id).where(LanguageModel.name == "Klingon")
+    )).scalar_one()
+    assert [language["id"] for language in response.json()["languages"]] == [language_id]
+    assert reference_cache.table(LanguageModel, "name").lookup(["Klingon"]) == {"Klingon": language_id}
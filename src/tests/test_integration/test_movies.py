@@ -12,6 +12,8 @@ from database.models import (
     CountryModel
 )
 
+ADMIN_HEADERS = {"X-API-Key": "test-admin-key"}
+
 
 @pytest.mark.asyncio
 async def test_get_movies_empty_database(client):
@@ -536,3 +538,173 @@ async def test_update_movie_not_found(client):
     assert response_data["detail"] == expected_detail, (
         f"Expected detail message: {expected_detail}, but got: {response_data['detail']}"
     )
+
+
+@pytest.mark.asyncio
+async def test_update_movie_associations(client, db_session, seed_database):
+    """
+    Test that PATCH replaces genres, actors and languages, creating missing ones and keeping the rest.
+    """
+    stmt = select(MovieModel).options(joinedload(MovieModel.actors)).limit(1)
+    movie = (await db_session.execute(stmt)).unique().scalars().first()
+    kept_actor = movie.actors[0].name if movie.actors else "Kept Actor"
+
+    update_data = {
+        "actors": [kept_actor, "Brand New Actor"],
+        "genres": ["Brand New Genre"],
+    }
+    response = await client.patch(f"/api/v1/theater/movies/{movie.id}/", json=update_data)
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+
+    response = await client.get(f"/api/v1/theater/movies/{movie.id}/")
+    response_data = response.json()
+    assert sorted(actor["name"] for actor in response_data["actors"]) == sorted(update_data["actors"])
+    assert [genre["name"] for genre in response_data["genres"]] == update_data["genres"]
+    assert response_data["languages"], "Languages must be left untouched when they are not sent."
+
+
+@pytest.mark.asyncio
+async def test_update_movie_associations_statement_count(client, db_session, seed_database):
+    """
+    Test that replacing a cast costs the same number of statements for 5 and for 50 actors.
+    """
+    from sqlalchemy import event
+    from database.session_sqlite import get_sqlite_writer_engine
+
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+    statements = []
+
+    def count_statement(*args) -> None:
+        statements.append(args[2])
+
+    engine = get_sqlite_writer_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        counts = []
+        for cast_size in (5, 50):
+            statements.clear()
+            actors = [f"Statement Count Actor {cast_size}-{index}" for index in range(cast_size)]
+            response = await client.patch(f"/api/v1/theater/movies/{movie_id}/", json={"actors": actors})
+            assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+            counts.append(len(statements))
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert counts[0] == counts[1], f"Statement count grows with the cast size: {counts}"
+
+
+@pytest.mark.asyncio
+async def test_delete_movie_cascades_to_associations(client, db_session, seed_database):
+    """
+    Test that deleting a movie removes its association rows through the database cascade.
+    """
+    from database.models import ActorsMoviesModel, MoviesGenresModel, MoviesLanguagesModel
+
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+
+    response = await client.delete(f"/api/v1/theater/movies/{movie_id}/")
+    assert response.status_code == 204, f"Expected status code 204, but got {response.status_code}"
+
+    for table in (ActorsMoviesModel, MoviesGenresModel, MoviesLanguagesModel):
+        stmt = select(func.count()).select_from(table).where(table.c.movie_id == movie_id)
+        remaining = (await db_session.execute(stmt)).scalar_one()
+        assert remaining == 0, f"{table.name} still has {remaining} rows for the deleted movie."
+
+
+@pytest.mark.asyncio
+async def test_concurrent_movie_detail_requests_are_coalesced(client, db_session, seed_database):
+    """
+    Test that concurrent identical detail requests return the same body and are reported as coalesced.
+    """
+    import asyncio
+
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+
+    responses = await asyncio.gather(*(
+        client.get(f"/api/v1/theater/movies/{movie_id}/") for _ in range(20)
+    ))
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1, "Coalesced responses differ."
+    assert responses[0].json()["id"] == movie_id
+
+    response = await client.get("/api/v1/admin/metrics/", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    metrics = response.json()
+    detail_stats = metrics["single_flight"]["movie_detail"]
+    assert detail_stats["calls"] + metrics["response_cache"]["hits"] == 20
+    assert detail_stats["executions"] + detail_stats["coalesced"] == 20
+    assert detail_stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_movie_list_sparse_fieldset(client, seed_database):
+    """
+    Test that `fields=` limits the returned fields and is carried over to the pagination links.
+    """
+    response = await client.get("/api/v1/theater/movies/?page=2&per_page=5&fields=score,name")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+
+    response_data = response.json()
+    for movie in response_data["movies"]:
+        assert set(movie) == {"id", "name", "score"}, f"Unexpected fields: {sorted(movie)}"
+    assert response_data["next_page"] == "/theater/movies/?page=3&per_page=5&fields=name,score"
+    assert response_data["prev_page"] == "/theater/movies/?page=1&per_page=5&fields=name,score"
+
+
+@pytest.mark.asyncio
+async def test_movie_list_includes_relations_without_n_plus_one(client, db_session, seed_database):
+    """
+    Test that included relations match the database and cost the same number of statements for any page size.
+    """
+    from sqlalchemy import event
+    from database.session_sqlite import get_sqlite_engine
+
+    statements = []
+
+    def count_statement(*args) -> None:
+        statements.append(args[2])
+
+    engine = get_sqlite_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        counts = []
+        for per_page in (2, 20):
+            statements.clear()
+            response = await client.get(
+                f"/api/v1/theater/movies/?per_page={per_page}&fields=name&include=genres,actors,country,languages"
+            )
+            assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+            counts.append(len(statements))
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    assert counts[0] == counts[1], f"Statement count grows with the page size: {counts}"
+
+    movie = response.json()["movies"][0]
+    assert set(movie) == {"id", "name", "genres", "actors", "country", "languages"}
+    expected = (await db_session.execute(
+        select(MovieModel)
+        .options(joinedload(MovieModel.country), joinedload(MovieModel.genres), joinedload(MovieModel.actors))
+        .where(MovieModel.id == movie["id"])
+    )).unique().scalar_one()
+    assert movie["country"]["code"] == expected.country.code
+    assert sorted(genre["name"] for genre in movie["genres"]) == sorted(genre.name for genre in expected.genres)
+    assert sorted(actor["id"] for actor in movie["actors"]) == sorted(actor.id for actor in expected.actors)
+
+
+@pytest.mark.asyncio
+async def test_movie_detail_sparse_fieldset_and_include(client, db_session, seed_database):
+    """
+    Test that the detail endpoint honours `fields=` and `include=`, and rejects unknown names.
+    """
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+
+    response = await client.get(f"/api/v1/theater/movies/{movie_id}/?fields=name,budget&include=country")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    assert set(response.json()) == {"id", "name", "budget", "country"}
+
+    response = await client.get(f"/api/v1/theater/movies/{movie_id}/?fields=overview,rating&include=crew")
+    assert response.status_code == 400, f"Expected status code 400, but got {response.status_code}"
+    assert response.json() == {"detail": "Unknown fields: rating."}
+
+    response = await client.get(f"/api/v1/theater/movies/{movie_id}/?include=crew")
+    assert response.json() == {"detail": "Unknown include: crew."}
@@ -0,0 +1,96 @@
+import json
+
+import msgpack
+import pytest
+from sqlalchemy import select
+
+from database import MovieModel
+
+MSGPACK_HEADERS = {"Accept": "application/msgpack"}
+
+
+@pytest.mark.asyncio
+async def test_list_and_detail_in_msgpack_match_json(client, db_session, seed_database):
+    """
+    Test that MessagePack list and detail responses carry the same values as their JSON counterparts.
+    """
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+    for url in ("/api/v1/theater/movies/?per_page=5", f"/api/v1/theater/movies/{movie_id}/"):
+        as_json = await client.get(url)
+        as_msgpack = await client.get(url, headers=MSGPACK_HEADERS)
+        assert as_msgpack.status_code == 200
+        assert as_msgpack.headers["content-type"] == "application/msgpack"
+        assert "Accept" in as_msgpack.headers["vary"]
+        assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+
+        cached = await client.get(url, headers=MSGPACK_HEADERS)
+        assert cached.content == as_msgpack.content, "A cached MessagePack entry must not be served as JSON."
+        assert (await client.get(url)).json() == as_json.json()
+
+
+@pytest.mark.asyncio
+async def test_json_is_preferred_on_ties(client, seed_database):
+    """
+    Test that JSON is served unless the client prefers MessagePack.
+    """
+    url = "/api/v1/theater/movies/?per_page=1"
+    response = await client.get(url, headers={"Accept": "application/json, application/msgpack"})
+    assert response.headers["content-type"] == "application/json"
+
+    response = await client.get(url, headers={"Accept": "application/json;q=0.5, application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+
+
+@pytest.mark.asyncio
+async def test_create_and_patch_accept_msgpack_bodies(client, seed_database):
+    """
+    Test that create and patch decode MessagePack bodies and validate them like JSON ones.
+    """
+    movie_data = {
+        "name": "MessagePack Movie",
+        "date": "2025-05-01",
+        "score": 70.0,
+        "overview": "Sent in binary.",
+        "status": "Released",
+        "budget": 1000000.0,
+        "revenue": 2000000.0,
+        "country": "US",
+        "genres": ["Drama"],
+        "actors": ["Jane Doe"],
+        "languages": ["English"],
+    }
+    headers = {"Content-Type": "application/msgpack", **MSGPACK_HEADERS}
+    response = await client.post("/api/v1/theater/movies/", content=msgpack.packb(movie_data), headers=headers)
+    assert response.status_code == 201, response.content
+    created = msgpack.unpackb(response.content)
+    assert created["name"] == movie_data["name"]
+    assert [actor["name"] for actor in created["actors"]] == ["Jane Doe"]
+
+    response = await client.patch(
+        f"/api/v1/theater/movies/{created['id']}/",
+        content=msgpack.packb({"score": 95.5}),
+        headers={"Content-Type": "application/msgpack"},
+    )
+    assert response.status_code == 200
+    assert (await client.get(f"/api/v1/theater/movies/{created['id']}/")).json()["score"] == 95.5
+
+    response = await client.patch(
+        f"/api/v1/theater/movies/{created['id']}/",
+        content=msgpack.packb({"score": 150}),
+        headers={"Content-Type": "application/msgpack"},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_invalid_msgpack_body_is_rejected(client, seed_database):
+    """
+    Test that an undecodable MessagePack body yields 400 instead of a server error.
+    """
+    response = await client.patch(
+        "/api/v1/theater/movies/1/",
+        content=b"\xc1\xff",
+        headers={"Content-Type": "application/msgpack"},
+    )
+    assert response.status_code == 400
+    assert json.loads(response.content) == {"detail": "Invalid MessagePack body."}
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from database import MovieModel
+
+
+def _features(movie: MovieModel) -> set[tuple[str, int]]:
+    return (
+        {("actor", actor.id) for actor in movie.actors}
+        | {("genre", genre.id) for genre in movie.genres}
+        | {("language", language.id) for language in movie.languages}
+    )
+
+
+async def _load_movies(db_session) -> dict[int, MovieModel]:
+    result = await db_session.execute(
+        select(MovieModel).options(
+            selectinload(MovieModel.actors),
+            selectinload(MovieModel.genres),
+            selectinload(MovieModel.languages),
+        )
+    )
+    return {movie.id: movie for movie in result.scalars()}
+
+
+@pytest.mark.asyncio
+async def test_related_movies_share_features(client, db_session, seed_database):
+    """
+    Test that related movies are ranked by similarity, exclude the movie itself and share at least one feature.
+    """
+    movies = await _load_movies(db_session)
+    movie = next(iter(movies.values()))
+
+    response = await client.get(f"/api/v1/theater/movies/{movie.id}/related/?limit=5")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+
+    response_data = response.json()
+    assert response_data["movie_id"] == movie.id
+    related = response_data["related"]
+    assert 0 < len(related) <= 5, f"Expected between 1 and 5 related movies, got {len(related)}"
+
+    similarities = [item["similarity"] for item in related]
+    assert similarities == sorted(similarities, reverse=True), "Related movies are not sorted by similarity."
+    assert all(0 < similarity <= 1 for similarity in similarities), "Similarities must lie in (0, 1]."
+
+    for item in related:
+        assert item["id"] != movie.id, "A movie must not be related to itself."
+        assert _features(movies[item["id"]]) & _features(movie), "Related movie shares no feature."
+        assert item["name"] == movies[item["id"]].name, "Related movie name does not match."
+
+
+@pytest.mark.asyncio
+async def test_related_movies_not_found(client):
+    """
+    Test that asking for related movies of a missing movie returns 404.
+    """
+    response = await client.get("/api/v1/theater/movies/99999/related/")
+    assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
+    assert response.json() == {"detail": "Movie with the given ID was not found."}
+
+
+@pytest.mark.asyncio
+async def test_related_movies_follow_writes(client, db_session, seed_database):
+    """
+    Test that a newly created movie with the same cast becomes the best match, and disappears once deleted.
+    """
+    movies = await _load_movies(db_session)
+    source = next(movie for movie in movies.values() if movie.actors)
+
+    response = await client.get(f"/api/v1/theater/movies/{source.id}/related/")
+    assert response.status_code == 200
+
+    movie_data = {
+        "name": "Related Remake",
+        "date": "2024-01-01",
+        "score": 50.0,
+        "overview": "Same cast, same genres.",
+        "status": "Released",
+        "budget": 1.0,
+        "revenue": 1.0,
+        "country": "US",
+        "genres": [genre.name for genre in source.genres],
+        "actors": [actor.name for actor in source.actors],
+        "languages": [language.name for language in source.languages],
+    }
+    response = await client.post("/api/v1/theater/movies/", json=movie_data)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    remake_id = response.json()["id"]
+
+    response = await client.get(f"/api/v1/theater/movies/{source.id}/related/")
+    best_match = response.json()["related"][0]
+    assert best_match["id"] == remake_id, "A movie with identical memberships must be the best match."
+    assert best_match["similarity"] == pytest.approx(1.0, abs=0.05)
+
+    response = await client.delete(f"/api/v1/theater/movies/{remake_id}/")
+    assert response.status_code == 204
+
+    response = await client.get(f"/api/v1/theater/movies/{source.id}/related/")
+    assert remake_id not in [item["id"] for item in response.json()["related"]], "Deleted movie is still related."
@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from config import get_settings, override_settings
+from database.models import GenreModel, MovieModel, SeedCheckpointModel
+from database.populate import CSVDatabaseSeeder, dead_letter_path
+
+
+@pytest.fixture
+def seed_csv(tmp_path):
+    """
+    Provide a copy of the test CSV with one row that fails validation and one the database refuses.
+    """
+    data = pd.read_csv(get_settings().PATH_TO_MOVIES_CSV)
+    data.loc[3, "date_x"] = "not a date"
+    data.loc[7, "overview"] = None
+    path = tmp_path / "movies.csv"
+    data.to_csv(path, index=False)
+    return str(path), len(data)
+
+
+async def _movie_count(db_session) -> int:
+    return (await db_session.execute(select(func.count(MovieModel.id)))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_seed_dead_letters_rejected_rows(db_session, seed_csv):
+    """
+    Test that rows failing validation or refused by the database are written to the dead-letter file
+    while the other rows are seeded.
+    """
+    path, total = seed_csv
+    with override_settings(SEED_BATCH_SIZE=5):
+        await CSVDatabaseSeeder(path, db_session, show_progress=False).seed()
+
+    assert await _movie_count(db_session) == total - 2
+    rejected = pd.read_csv(dead_letter_path(path))
+    assert sorted(rejected["error"].str.split(" ").str[0]) == ["NOT", "invalid"], rejected["error"].tolist()
+
+    checkpoint = (await db_session.execute(select(SeedCheckpointModel))).scalar_one()
+    assert (checkpoint.stage, checkpoint.rows_done, checkpoint.rows_rejected) == ("done", total, 2)
+
+
+@pytest.mark.asyncio
+async def test_seed_resumes_from_checkpoint(db_session, seed_csv, monkeypatch):
+    """
+    Test that a failed run keeps its committed batches, and that the next run starts after them
+    and does not seed the file again once it is done.
+    """
+    path, total = seed_csv
+    upsert_chunk = CSVDatabaseSeeder.upsert_chunk
+    upserted_rows = []
+
+    async def failing_upsert_chunk(self, data):
+        if data.index[0] >= 10:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+        return await upsert_chunk(self, data)
+
+    async def recording_upsert_chunk(self, data):
+        upserted_rows.extend(data["names"])
+        return await upsert_chunk(self, data)
+
+    monkeypatch.setattr(CSVDatabaseSeeder, "upsert_chunk", failing_upsert_chunk)
+    with override_settings(SEED_BATCH_SIZE=5):
+        with pytest.raises(OperationalError):
+            await CSVDatabaseSeeder(path, db_session, show_progress=False).seed()
+
+        checkpoint = (await db_session.execute(select(SeedCheckpointModel))).scalar_one()
+        assert (checkpoint.stage, checkpoint.rows_done) == ("movies", 10)
+        assert await _movie_count(db_session) == 8
+
+        monkeypatch.setattr(CSVDatabaseSeeder, "upsert_chunk", recording_upsert_chunk)
+        seeder = CSVDatabaseSeeder(path, db_session, show_progress=False)
+        assert await seeder.needs_seeding()
+        await seeder.seed()
+
+    committed = set(pd.read_csv(path)["names"].head(10))
+    assert not committed.intersection(upserted_rows), "The committed batches should not be seeded again."
+    assert await _movie_count(db_session) == total - 2
+    assert not await seeder.needs_seeding()
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_tolerates_a_concurrent_create(db_session, seed_csv, monkeypatch):
+    """
+    Test that a name created by someone else between the lookup and the insert is read back instead of
+    failing the insert.
+    """
+    seeder = CSVDatabaseSeeder(seed_csv[0], db_session, show_progress=False)
+    execute = db_session.execute
+    created = []
+
+    async def create_after_lookup(statement, *args, **kwargs):  # noqa: ANN001, ANN002, ANN003
+        result = await execute(statement, *args, **kwargs)
+        if not created:
+            raced = await execute(insert(GenreModel).values(name="Raced").returning(GenreModel.id))
+            created.append(raced.scalar_one())
+        return result
+
+    monkeypatch.setattr(db_session, "execute", create_after_lookup)
+    genres = await seeder._get_or_create_bulk(GenreModel, ["Raced", "Fresh"], "name")
+
+    assert set(genres) == {"Raced", "Fresh"}
+    assert genres["Raced"].id == created[0]
@@ -0,0 +1,76 @@
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from database import session_sqlite
+from main import app
+
+SRC_DIR = Path(__file__).resolve().parents[2]
+
+
+def test_web_import_path_skips_seeding_dependencies():
+    """
+    Test that importing `main:app` does not pull in the seeding-only dependencies or create engines.
+    """
+    probe = (
+        "import sys\n"
+        "from main import app\n"
+        "from database import session_postgresql, session_sqlite\n"
+        "print(sorted(name for name in ('pandas', 'tqdm', 'database.populate') if name in sys.modules))\n"
+        "print(session_postgresql._postgresql_engine is None and session_sqlite._sqlite_engine is None)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+    leaked_modules, engines_are_lazy = result.stdout.strip().splitlines()
+
+    assert leaked_modules == "[]", f"Seeding dependencies leaked into the web import path: {leaked_modules}"
+    assert engines_are_lazy == "True", "Engines must not be created at import time."
+
+
+@pytest.mark.asyncio
+async def test_lifespan_creates_and_disposes_engines():
+    """
+    Test that the lifespan handler creates the engines on startup and disposes them on shutdown.
+    """
+    async with app.router.lifespan_context(app):
+        assert session_sqlite._sqlite_engine is not None, "Engine was not created on startup."
+
+    assert session_sqlite._sqlite_engine is None, "Engine was not disposed on shutdown."
+
+
+def test_app_starts_and_stops_without_a_reachable_database():
+    """
+    Test that the lifespan survives a PostgreSQL server that refuses connections: the warm-up is
+    skipped and the shutdown does not fail on saving the hot movies.
+    """
+    with socket.socket() as probe_socket:
+        probe_socket.bind(("127.0.0.1", 0))
+        closed_port = probe_socket.getsockname()[1]
+    probe = (
+        "import asyncio\n"
+        "from main import app\n"
+        "async def main():\n"
+        "    async with app.router.lifespan_context(app):\n"
+        "        print('started')\n"
+        "asyncio.run(main())\n"
+        "print('stopped')\n"
+    )
+    env = {
+        **os.environ,
+        "ENVIRONMENT": "developing",
+        "DATABASE_BACKEND": "postgresql",
+        "POSTGRES_HOST": "127.0.0.1",
+        "POSTGRES_DB_PORT": str(closed_port),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=SRC_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+
+    assert result.returncode == 0, f"The app did not survive an unreachable database:\n{result.stderr}"
+    assert result.stdout.split() == ["started", "stopped"]
+    assert "Skipping service warm-up" in result.stderr
@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, select, func, update
+
+import database.stats as stats_module
+from config import override_settings
+from database import MovieModel, get_write_db_contextmanager
+from database.models import MovieStatsModel
+from database.session_sqlite import get_sqlite_writer_engine
+from database.stats import (
+    check_catalogue_stats,
+    recompute_catalogue_stats,
+    reconcile_catalogue_stats,
+    run_stats_reconciliation_periodically
+)
+
+
+@pytest.mark.asyncio
+async def test_get_stats_matches_recomputation(client, db_session, seed_database):
+    """
+    Test that the `/stats/` endpoint serves the precomputed buckets of the seeded catalogue.
+    """
+    response = await client.get("/api/v1/theater/stats/")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+
+    response_data = response.json()
+    assert set(response_data) == {"genre", "country", "language", "status", "year"}, "Unexpected dimensions."
+
+    expected = await recompute_catalogue_stats(db_session)
+    for dimension, buckets in response_data.items():
+        for bucket in buckets:
+            movie_count, score_sum, revenue_sum = expected[(dimension, bucket["key"])]
+            assert bucket["movie_count"] == movie_count, f"Movie count mismatch for {dimension}={bucket['key']}."
+            assert bucket["average_score"] == pytest.approx(score_sum / movie_count)
+            assert bucket["total_revenue"] == pytest.approx(revenue_sum)
+
+    total_movies = (await db_session.execute(select(func.count(MovieModel.id)))).scalar_one()
+    assert sum(bucket["movie_count"] for bucket in response_data["status"]) == total_movies, (
+        "Status buckets must cover every movie exactly once."
+    )
+
+
+@pytest.mark.asyncio
+async def test_stats_empty_catalogue(client):
+    """
+    Test that the `/stats/` endpoint returns empty dimensions when there are no movies.
+    """
+    response = await client.get("/api/v1/theater/stats/")
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    assert all(buckets == [] for buckets in response.json().values()), "Expected no buckets."
+
+
+@pytest.mark.asyncio
+async def test_stats_are_maintained_by_writes(client, db_session, seed_database):
+    """
+    Test that creating, updating and deleting movies keeps the statistics consistent with the source tables.
+    """
+    movie_data = {
+        "name": "Stats Movie",
+        "date": "2024-05-01",
+        "score": 66.0,
+        "overview": "A movie that moves the statistics.",
+        "status": "Released",
+        "budget": 1000000.00,
+        "revenue": 3000000.00,
+        "country": "US",
+        "genres": ["Drama", "Brand New Genre"],
+        "actors": ["Stats Actor"],
+        "languages": ["English"]
+    }
+    response = await client.post("/api/v1/theater/movies/", json=movie_data)
+    assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}"
+    movie_id = response.json()["id"]
+    assert await check_catalogue_stats(db_session) == [], "Statistics drifted after create."
+
+    update_data = {"score": 12.5, "date": "2019-02-03", "status": "In Production", "revenue": 10.0}
+    response = await client.patch(f"/api/v1/theater/movies/{movie_id}/", json=update_data)
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    await db_session.rollback()
+    assert await check_catalogue_stats(db_session) == [], "Statistics drifted after update."
+
+    response = await client.delete(f"/api/v1/theater/movies/{movie_id}/")
+    assert response.status_code == 204, f"Expected status code 204, but got {response.status_code}"
+    await db_session.rollback()
+    assert await check_catalogue_stats(db_session) == [], "Statistics drifted after delete."
+
+    response = await client.get("/api/v1/theater/stats/")
+    genre_keys = {bucket["key"] for bucket in response.json()["genre"]}
+    assert "Brand New Genre" not in genre_keys, "Empty buckets must be removed."
+
+
+@pytest.mark.asyncio
+async def test_update_moves_stats_in_one_statement(client, db_session, seed_database):
+    """
+    Test that an update changing several buckets writes `movie_stats` with a single statement.
+    """
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+    statements = []
+
+    def record_statement(*args) -> None:
+        if "movie_stats" in args[2] and not args[2].startswith("SELECT"):
+            statements.append(args[2])
+
+    engine = get_sqlite_writer_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        response = await client.patch(
+            f"/api/v1/theater/movies/{movie_id}/", json={"score": 1.5, "date": "1999-09-09"}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+    assert len(statements) == 2, f"Expected one upsert and one cleanup of empty buckets: {statements}"
+    await db_session.rollback()
+    assert await check_catalogue_stats(db_session) == [], "Statistics drifted after update."
+
+
+@pytest.mark.asyncio
+async def test_delete_reads_its_stats_with_the_delete(client, db_session, seed_database):
+    """
+    Test that a delete finds the movie's buckets with one read of its names and `DELETE ... RETURNING`,
+    instead of loading the movie first, and keeps the statistics consistent.
+    """
+    movie_id = (await db_session.execute(select(MovieModel.id).limit(1))).scalar_one()
+    statements = []
+
+    def record_statement(*args) -> None:
+        if "movie_stats" not in args[2] and "movie_changes" not in args[2]:
+            statements.append(args[2])
+
+    engine = get_sqlite_writer_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        response = await client.delete(f"/api/v1/theater/movies/{movie_id}/")
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+    assert response.status_code == 204, f"Expected status code 204, but got {response.status_code}"
+    assert len(statements) == 2, f"Expected one read of the names and the DELETE: {statements}"
+    assert statements[1].startswith("DELETE FROM movies") and "RETURNING" in statements[1]
+    await db_session.rollback()
+    assert await check_catalogue_stats(db_session) == [], "Statistics drifted after delete."
+
+    response = await client.delete(f"/api/v1/theater/movies/{movie_id}/")
+    assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_reconciliation_rebuilds_drifted_stats(db_session, seed_database):
+    """
+    Test that reconciliation leaves consistent statistics alone and rebuilds drifted ones.
+    """
+    async with get_write_db_contextmanager() as session:
+        assert await reconcile_catalogue_stats(session) == 0
+        await session.execute(
+            update(MovieStatsModel).where(MovieStatsModel.dimension == "status").values(score_sum=-1.0)
+        )
+        drifted = await reconcile_catalogue_stats(session)
+        await session.commit()
+
+    assert drifted == len(set((await recompute_catalogue_stats(db_session)).keys()) & {
+        ("status", status) for status in ("Released", "Post Production", "In Production")
+    })
+    assert await check_catalogue_stats(db_session) == [], "Reconciliation did not repair the statistics."
+
+
+@pytest.mark.asyncio
+async def test_reconciliation_loop_survives_an_unreachable_database(monkeypatch):
+    """
+    Test that the periodic reconciliation logs connection errors, which asyncpg raises as `OSError`,
+    and keeps running.
+    """
+    failures = []
+
+    async def refuse(session):  # noqa: ANN001
+        failures.append(1)
+        raise ConnectionRefusedError("Connect call failed")
+
+    monkeypatch.setattr(stats_module, "reconcile_catalogue_stats", refuse)
+    with override_settings(STATS_RECONCILE_INTERVAL_SECONDS=0.01):
+        task = asyncio.create_task(run_stats_reconciliation_periodically())
+        try:
+            for _ in range(200):
+                if len(failures) >= 2:
+                    break
+                await asyncio.sleep(0.01)
+            assert len(failures) >= 2 and not task.done(), "The reconciliation loop must outlive connection errors."
+        finally:
+            task.cancel()
@@ -0,0 +1,180 @@
+import asyncio
+import io
+
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+from config import get_settings, override_settings
+from database import get_db_contextmanager
+from database.models import MovieChangeModel, MovieModel
+from database.populate import CSVDatabaseSeeder
+from database.stats import check_catalogue_stats
+from services import catalogue_replica, index_sync
+
+UPLOADS_URL = "/api/v1/theater/movies/uploads/"
+API_KEY_HEADERS = {"X-API-Key": "test-ingest-key"}
+
+
+def _csv_upload(data: pd.DataFrame) -> dict:
+    buffer = io.StringIO()
+    data.to_csv(buffer, index=False)
+    return {"file": ("movies.csv", buffer.getvalue().encode(), "text/csv")}
+
+
+async def _wait_for_job(client, job_id: str) -> dict:
+    for _ in range(200):
+        response = await client.get(f"{UPLOADS_URL}{job_id}/", headers=API_KEY_HEADERS)
+        assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+        job = response.json()
+        if job["status"] not in ("pending", "running"):
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"Upload job {job_id} did not finish.")
+
+
+@pytest.mark.asyncio
+async def test_upload_requires_api_key(client):
+    """
+    Test that uploads and their jobs are refused without a valid X-API-Key header.
+    """
+    data = pd.read_csv(get_settings().PATH_TO_MOVIES_CSV).head(1)
+    for headers in ({}, {"X-API-Key": "wrong-key"}):
+        response = await client.post(UPLOADS_URL, files=_csv_upload(data), headers=headers)
+        assert response.status_code == 401, f"Expected status code 401, but got {response.status_code}"
+
+    response = await client.get(f"{UPLOADS_URL}unknown/")
+    assert response.status_code == 401, f"Expected status code 401, but got {response.status_code}"
+
+    response = await client.get(f"{UPLOADS_URL}unknown/", headers=API_KEY_HEADERS)
+    assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_upload_upserts_movies_in_chunks(client, db_session, seed_database):
+    """
+    Test that an upload inserts new movies, updates existing ones by name and date, and replaces their
+    relations, and that uploading the same file again creates nothing.
+    """
+    movie_count = (await db_session.execute(select(func.count(MovieModel.id)))).scalar_one()
+    async with get_db_contextmanager() as session:
+        await catalogue_replica.load(session)
+    data = pd.read_csv(get_settings().PATH_TO_MOVIES_CSV).head(4)
+    data.loc[0, "score"] = 1.5
+    data.loc[0, "genre"] = "Uploaded Genre"
+    new_movie = data.iloc[[1]].copy()
+    new_movie["names"] = "Uploaded Movie"
+    data = pd.concat([data, new_movie], ignore_index=True)
+
+    with override_settings(INGEST_CHUNK_SIZE=2):
+        response = await client.post(UPLOADS_URL, files=_csv_upload(data), headers=API_KEY_HEADERS)
+        assert response.status_code == 202, f"Expected status code 202, but got {response.status_code}"
+        job = response.json()
+        assert response.headers["location"].endswith(f"{UPLOADS_URL}{job['id']}/")
+        job = await _wait_for_job(client, job["id"])
+
+    assert job["status"] == "succeeded", f"Upload failed: {job['error']}"
+    assert (job["rows"], job["created"], job["updated"]) == (5, 1, 4)
+    assert job["bytes_read"] == job["bytes_total"]
+
+    await db_session.rollback()
+    count = (await db_session.execute(select(func.count(MovieModel.id)))).scalar_one()
+    assert count == movie_count + 1, "Only the new movie should have been inserted."
+    changes = (await db_session.execute(select(func.count(MovieChangeModel.sequence)))).scalar_one()
+    assert changes == 5, "Every upserted movie should be recorded in the change feed."
+    assert await check_catalogue_stats(db_session) == [], "Statistics drifted after the upload."
+
+    await index_sync.sync()
+    assert catalogue_replica.is_loaded, "Uploads must not drop the in-process indexes."
+    assert catalogue_replica.stats()["movies"] == movie_count + 1
+
+    movie_id = (await db_session.execute(
+        select(MovieModel.id).where(MovieModel.name == data.loc[0, "names"])
+    )).scalar_one()
+    response = await client.get(f"/api/v1/theater/movies/{movie_id}/")
+    movie = response.json()
+    assert movie["score"] == 1.5
+    assert [genre["name"] for genre in movie["genres"]] == ["Uploaded Genre"]
+
+    response = await client.post(UPLOADS_URL, files=_csv_upload(data), headers=API_KEY_HEADERS)
+    job = await _wait_for_job(client, response.json()["id"])
+    assert (job["status"], job["created"], job["updated"]) == ("succeeded", 0, 5)
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_invalid_files(client):
+    """
+    Test that a CSV in the wrong format fails its job, and that oversized or malformed requests are refused.
+    """
+    response = await client.post(
+        UPLOADS_URL,
+        files={"file": ("movies.csv", b"title,year\nAlien,1979\n", "text/csv")},
+        headers=API_KEY_HEADERS
+    )
+    job = await _wait_for_job(client, response.json()["id"])
+    assert job["status"] == "failed"
+    assert "Missing CSV columns" in job["error"]
+
+    response = await client.post(UPLOADS_URL, data={"note": "no file"}, headers=API_KEY_HEADERS)
+    assert response.status_code == 400, f"Expected status code 400, but got {response.status_code}"
+
+    with override_settings(INGEST_MAX_UPLOAD_BYTES=10):
+        response = await client.post(
+            UPLOADS_URL,
+            files={"file": ("movies.csv", b"names,date_x\n" * 10, "text/csv")},
+            headers=API_KEY_HEADERS
+        )
+    assert response.status_code == 413, f"Expected status code 413, but got {response.status_code}"
+
+
+@pytest.mark.asyncio
+async def test_failed_upload_keeps_stats_of_committed_chunks(client, db_session, seed_database, monkeypatch):
+    """
+    Test that when a later chunk fails, the statistics match the chunks committed before it.
+    """
+    data = pd.read_csv(get_settings().PATH_TO_MOVIES_CSV).head(4)
+    data["names"] = [f"Partial Upload {i}" for i in range(len(data))]
+    upsert_chunk = CSVDatabaseSeeder.upsert_chunk
+    calls = []
+
+    async def fail_second_chunk(self, chunk, update_stats=False):  # noqa: ANN001
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise RuntimeError("Chunk refused.")
+        return await upsert_chunk(self, chunk, update_stats)
+
+    monkeypatch.setattr(CSVDatabaseSeeder, "upsert_chunk", fail_second_chunk)
+    with override_settings(INGEST_CHUNK_SIZE=2):
+        response = await client.post(UPLOADS_URL, files=_csv_upload(data), headers=API_KEY_HEADERS)
+        job = await _wait_for_job(client, response.json()["id"])
+
+    assert (job["status"], job["created"]) == ("failed", 2)
+    await db_session.rollback()
+    assert await check_catalogue_stats(db_session) == [], "Statistics drifted after a failed upload."
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_is_cut_off_at_the_limit(client):
+    """
+    Test that a body without a Content-Length is refused once it passes the limit, without reading the rest.
+    """
+    boundary = "upload-boundary"
+    sent = []
+
+    async def body():
+        yield (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"movies.csv\"\r\n"
+            "Content-Type: text/csv\r\n\r\n"
+        ).encode()
+        for _ in range(100):
+            sent.append(1)
+            yield b"names,date_x\n" * 10
+
+    with override_settings(INGEST_MAX_UPLOAD_BYTES=1000):
+        response = await client.post(
+            UPLOADS_URL,
+            content=body(),
+            headers={**API_KEY_HEADERS, "Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+    assert response.status_code == 413, f"Expected status code 413, but got {response.status_code}"
+    assert len(sent) < 100, "The body should not be read past the limit."
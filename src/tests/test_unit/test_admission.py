@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from config import override_settings
+from services.admission import AdaptiveLimiter, AdmissionRejected
+
+
+def _limiter(**settings) -> AdaptiveLimiter:
+    defaults = {
+        "ADMISSION_READ_INITIAL_LIMIT": 2,
+        "ADMISSION_READ_MAX_LIMIT": 10,
+        "ADMISSION_MIN_LIMIT": 1,
+        "ADMISSION_TARGET_LATENCY_MS": 50.0,
+        "ADMISSION_BACKOFF_RATIO": 0.5,
+        "ADMISSION_QUEUE_TIMEOUT_SECONDS": 0.2,
+    }
+    with override_settings(**{**defaults, **settings}):
+        return AdaptiveLimiter("test", "READ")
+
+
+@pytest.mark.asyncio
+async def test_fast_requests_increase_the_limit_additively():
+    """
+    Test that requests finishing within the target latency grow the limit by about one per round.
+    """
+    limiter = _limiter()
+    for _ in range(6):
+        async with limiter.admit():
+            pass
+    assert 3.5 < limiter.limit < 4.5, f"Unexpected limit after 6 fast requests: {limiter.limit}"
+    assert limiter.stats()["admitted"] == 6
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_decrease_the_limit_multiplicatively():
+    """
+    Test that a request slower than the target halves the limit, but never below the minimum.
+    """
+    limiter = _limiter(ADMISSION_READ_INITIAL_LIMIT=8, ADMISSION_TARGET_LATENCY_MS=1.0)
+    async with limiter.admit():
+        await asyncio.sleep(0.01)
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+    for _ in range(5):
+        limiter._last_decrease = 0.0
+        async with limiter.admit():
+            await asyncio.sleep(0.01)
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_waiting_request_is_admitted_when_a_slot_frees():
+    """
+    Test that a queued request gets the slot released by a finishing request.
+    """
+    limiter = _limiter(ADMISSION_READ_INITIAL_LIMIT=1)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with limiter.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    async def wait_for_slot() -> str:
+        async with limiter.admit():
+            return "admitted"
+
+    waiter = asyncio.create_task(wait_for_slot())
+    await asyncio.sleep(0)
+    assert limiter.queued == 1
+    release.set()
+    assert await waiter == "admitted"
+    await holder
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_are_rejected_past_their_deadline():
+    """
+    Test that a request waiting longer than its deadline is rejected, and that a hopeless one is rejected at once.
+    """
+    limiter = _limiter(ADMISSION_READ_INITIAL_LIMIT=1)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with limiter.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with limiter.admit(timeout=0.01):
+            pass
+    assert exc_info.value.retry_after >= 1
+
+    limiter._latency = 10.0
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(AdmissionRejected):
+        async with limiter.admit(timeout=1.0):
+            pass
+    assert loop.time() - started < 0.5, "A request that cannot make its deadline must be rejected without waiting."
+
+    release.set()
+    await holder
+    assert limiter.rejected == 2
+    assert limiter.queued == 0
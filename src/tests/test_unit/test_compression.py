@@ -0,0 +1,23 @@
+import pytest
+
+from services.compression import available_encodings, negotiate_encoding
+
+
+def test_negotiation_prefers_the_strongest_accepted_encoding():
+    """
+    Test that the preferred codec wins among accepted encodings and that q-values are honoured.
+    """
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("*") == available_encodings()[0]
+
+
+@pytest.mark.skipif("zstd" not in available_encodings(), reason="Zstandard is not installed.")
+def test_negotiation_orders_by_quality_then_preference():
+    """
+    Test that a higher q-value beats the default preference order.
+    """
+    assert negotiate_encoding("gzip, zstd") == "zstd"
+    assert negotiate_encoding("gzip;q=1.0, zstd;q=0.5") == "gzip"
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from services.hot_movies import SpaceSaving
+
+
+def test_counts_are_exact_within_capacity():
+    """
+    Test that every item is counted exactly while there are no more items than counters.
+    """
+    tracker = SpaceSaving(capacity=3)
+    for key in "abacab":
+        tracker.record(key)
+    assert [(hitter.key, hitter.count, hitter.error) for hitter in tracker.top(3)] == [
+        ("a", 3, 0), ("b", 2, 0), ("c", 1, 0)
+    ]
+    assert tracker.total == 6
+
+
+def test_heavy_hitters_survive_a_long_tail():
+    """
+    Test that items above total / capacity keep their counters among many one-off items, and that
+    count - error never exceeds the true count.
+    """
+    stream = [1] * 500 + [2] * 300 + list(range(1000, 3000))
+    random.Random(7).shuffle(stream)
+    tracker = SpaceSaving(capacity=20)
+    for key in stream:
+        tracker.record(key)
+
+    assert len(tracker) == 20
+    top = tracker.top(2)
+    assert [hitter.key for hitter in top] == [1, 2]
+    for hitter, true_count in zip(top, (500, 300)):
+        assert hitter.count - hitter.error <= true_count <= hitter.count
+    assert len(tracker._heap) <= 2 * tracker.capacity
+
+
+def test_weighted_records_and_invalid_capacity():
+    """
+    Test that a weight counts as that many occurrences, and that the capacity must be positive.
+    """
+    tracker = SpaceSaving(capacity=1)
+    tracker.record("a", 5)
+    tracker.record("b")
+    assert [(hitter.key, hitter.count, hitter.error) for hitter in tracker.top(5)] == [("b", 6, 5)]
+
+    with pytest.raises(ValueError):
+        SpaceSaving(capacity=0)
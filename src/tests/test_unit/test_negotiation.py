@@ -0,0 +1,30 @@
+import datetime
+
+import msgpack
+import pytest
+
+from routes.negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, negotiate_media_type, render
+from schemas import MovieListItemSchema
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("*/*", JSON_MEDIA_TYPE),
+        ("application/msgpack", MSGPACK_MEDIA_TYPE),
+        ("application/x-msgpack", MSGPACK_MEDIA_TYPE),
+        ("application/msgpack, */*", JSON_MEDIA_TYPE),
+        ("application/msgpack, */*;q=0.1", MSGPACK_MEDIA_TYPE),
+        ("application/msgpack;q=0.2, application/json;q=0.9", JSON_MEDIA_TYPE),
+        ("application/msgpack;q=0", JSON_MEDIA_TYPE),
+    ],
+)
+def test_negotiate_media_type(accept, expected):
+    assert negotiate_media_type(accept) == expected
+
+
+def test_render_encodes_the_same_values():
+    movie = MovieListItemSchema(id=1, name="Movie", date=datetime.date(2020, 1, 2), score=7.5, overview="Text")
+    assert msgpack.unpackb(render(movie, MSGPACK_MEDIA_TYPE)) == movie.model_dump(mode="json")
+    assert render(movie, JSON_MEDIA_TYPE) == movie.model_dump_json().encode()
@@ -0,0 +1,36 @@
+from config import get_settings, reload_settings, override_settings
+
+
+def test_get_settings_is_memoized():
+    """
+    Test that `get_settings` parses the environment once and then returns the same object.
+    """
+    assert get_settings() is get_settings(), "Expected the cached settings instance to be reused."
+
+
+def test_reload_settings_rereads_environment(monkeypatch):
+    """
+    Test that `reload_settings` replaces the cached object with one built from the current environment.
+    """
+    original = get_settings()
+    monkeypatch.setenv("SQLITE_READ_POOL_SIZE", "17")
+    try:
+        reloaded = reload_settings()
+        assert reloaded is not original, "Expected a new settings instance after reload."
+        assert get_settings().SQLITE_READ_POOL_SIZE == 17, "Reloaded settings did not pick up the environment."
+    finally:
+        monkeypatch.delenv("SQLITE_READ_POOL_SIZE")
+        reload_settings()
+
+
+def test_override_settings_is_scoped():
+    """
+    Test that `override_settings` changes the settings only inside its block.
+    """
+    original_pool_size = get_settings().SQLITE_READ_POOL_SIZE
+
+    with override_settings(SQLITE_READ_POOL_SIZE=original_pool_size + 1) as overridden:
+        assert get_settings() is overridden, "Expected the override to be returned inside the block."
+        assert get_settings().SQLITE_READ_POOL_SIZE == original_pool_size + 1, "Override value was not applied."
+
+    assert get_settings().SQLITE_READ_POOL_SIZE == original_pool_size, "Override leaked outside its block."
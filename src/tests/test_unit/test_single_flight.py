@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """
+    Test that identical concurrent calls run the work once and all receive its result.
+    """
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+    calls = 0
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return 42
+
+    waiters = [asyncio.create_task(flight.run("key", work)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [42] * 10
+    assert calls == 1
+    assert flight.stats()["coalescing_ratio"] == pytest.approx(0.9)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_are_not_cached():
+    """
+    Test that the leader's exception is raised in every follower and that the next call runs again.
+    """
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def failing_work() -> int:
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(flight.run("key", failing_work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def working() -> int:
+        return 1
+
+    assert await flight.run("key", working) == 1
+    assert flight.executions == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_hands_over_to_a_follower():
+    """
+    Test that cancelling the leader does not cancel the followers; one of them runs the work instead.
+    """
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def work() -> str:
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.run("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("key", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert flight.executions == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_leaves_the_flight_running():
+    """
+    Test that a cancelled follower stops waiting without affecting the leader.
+    """
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def work() -> str:
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.run("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("key", work))
+    await asyncio.sleep(0)
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    release.set()
+    assert await leader == "done"